@@ -0,0 +1,131 @@
+# app/api/common/cache.py
+
+import hashlib, os, time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, TypeVar
+
+import numpy as np
+from loguru import logger
+from numpy.typing import NDArray
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class LRUCache(Generic[K, V]):
+    """Bounded mapping that evicts the least recently used key. Not thread-safe: use it from one event loop."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[K, V] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        value = self._entries.get(key, _MISSING)
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: K) -> V | None:
+        return self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class TTLCache(LRUCache[K, V]):
+    """``LRUCache`` whose entries also expire ``ttl`` seconds after they were stored."""
+
+    def __init__(self, maxsize: int, ttl: float, clock: Callable[[], float] = time.monotonic) -> None:
+        super().__init__(maxsize)
+        self.ttl = ttl
+        self.clock = clock
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        entry = self._entries.get(key, _MISSING)
+        if entry is not _MISSING and entry[0] <= self.clock():
+            del self._entries[key]
+            entry = _MISSING
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: K, value: V) -> None:
+        if self.ttl > 0:
+            super().put(key, (self.clock() + self.ttl, value))
+
+
+class MemmapVectorCache:
+    """
+    Fixed-capacity on-disk map of string keys to float32 vectors, kept in two
+    memory-mapped arrays: ``vectors`` (capacity x dim) and a slot table of key
+    digests with a write sequence. Slots are reused oldest-first once full. The
+    page cache keeps hot vectors in memory and the files survive restarts.
+    """
+
+    # Raw digest bytes: an "S" field would strip trailing NULs
+    SLOT_DTYPE = np.dtype([("key", "u1", (16,)), ("seq", "<u8")])
+
+    def __init__(self, directory: str, name: str, dim: int, capacity: int) -> None:
+        self.dim = dim
+        self.capacity = capacity
+        os.makedirs(directory, exist_ok=True)
+        base = os.path.join(directory, f"{name}-{dim}d-{capacity}")
+        self.vectors = self._open(f"{base}.f32", np.float32, (capacity, dim))
+        self.slots = self._open(f"{base}.slots", self.SLOT_DTYPE, (capacity,))
+        self._index = {key.tobytes(): i for i, key in enumerate(self.slots["key"]) if self.slots["seq"][i]}
+        self._seq = int(self.slots["seq"].max(initial=0))
+        logger.debug(f"Opened {base} with {len(self._index)} cached vectors")
+
+    @staticmethod
+    def _open(path: str, dtype, shape: tuple[int, ...]) -> np.memmap:
+        mode = "r+" if os.path.exists(path) else "w+"
+        return np.memmap(path, dtype=dtype, mode=mode, shape=shape)
+
+    @staticmethod
+    def digest(key: str) -> bytes:
+        return hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, key: str) -> NDArray[np.float32] | None:
+        slot = self._index.get(self.digest(key))
+        return None if slot is None else np.array(self.vectors[slot])
+
+    def put(self, key: str, vector) -> None:
+        digest = self.digest(key)
+        slot = self._index.get(digest)
+        if slot is None:
+            slot = len(self._index) if len(self._index) < self.capacity else int(np.argmin(self.slots["seq"]))
+            if self.slots["seq"][slot]:
+                self._index.pop(self.slots["key"][slot].tobytes(), None)
+            self._index[digest] = slot
+        self._seq += 1
+        self.vectors[slot] = vector
+        self.slots["key"][slot] = np.frombuffer(digest, np.uint8)
+        self.slots["seq"][slot] = self._seq
+
+    def flush(self) -> None:
+        self.vectors.flush()
+        self.slots.flush()
@@ -0,0 +1,150 @@
+# app/api/common/html_extractor.py
+
+import codecs, re
+from typing import NamedTuple, Sequence
+
+from loguru import logger
+from lxml import etree
+
+from app.api.core.config import settings
+
+# Never part of the readable content, even inside a matched container
+SKIP_TAGS = ("script", "style", "noscript", "template", "svg", "nav", "header", "footer", "aside", "form")
+# Fallback when no selector matches: paragraphs shorter than this are mostly menus and captions
+MIN_PARAGRAPH_CHARS = 40
+
+SELECTOR = re.compile(r"^(?P<tag>[\w-]+)?(?:#(?P<id>[\w-]+))?(?P<classes>(?:\.[\w-]+)*)"
+                      r"(?:\[(?P<attr>[\w-]+)=[\"']?(?P<value>[^\]\"']*)[\"']?\])?$")
+
+
+class Selector(NamedTuple):
+    """The simple CSS subset content containers are addressed with: ``tag#id.class[attr=value]``."""
+    tag: str | None
+    id: str | None
+    classes: frozenset[str]
+    attr: tuple[str, str] | None
+
+    @classmethod
+    def parse(cls, selector: str) -> "Selector":
+        match = SELECTOR.match(selector.strip())
+        if not match or not any(match.groups()):
+            raise ValueError(f"Unsupported selector: {selector!r}")
+        classes = frozenset(name for name in match["classes"].split(".") if name)
+        attr = (match["attr"], match["value"]) if match["attr"] else None
+        return cls(match["tag"], match["id"], classes, attr)
+
+    def matches(self, element) -> bool:
+        if self.tag and element.tag != self.tag:
+            return False
+        if self.id and element.get("id") != self.id:
+            return False
+        if self.classes and not self.classes <= set(element.get("class", "").split()):
+            return False
+        return not self.attr or element.get(self.attr[0]) == self.attr[1]
+
+
+def clean_whitespace(text: str) -> str:
+    text = re.sub(r"[ \t\r\f\v]+", " ", text)
+    return re.sub(r"\s*\n\s*", "\n", text).strip()
+
+
+def pull_parser(encoding: str | None) -> etree.HTMLPullParser:
+    """
+    Parser for a declared charset. libxml2 knows fewer names than Python
+    (``latin-1``, ``utf-8-sig``), so unknown ones are retried under their Python
+    codec name and then dropped, leaving libxml2 to detect the encoding.
+    """
+    candidates = [encoding] if encoding else []
+    try:
+        candidates.append(codecs.lookup(encoding).name if encoding else None)
+    except LookupError:
+        pass
+    for candidate in candidates:
+        try:
+            return etree.HTMLPullParser(events=("start", "end"), encoding=candidate,
+                                        remove_comments=True, no_network=True)
+        except LookupError:
+            continue
+    if encoding:
+        logger.debug(f"Unknown charset {encoding!r}, detecting the encoding instead")
+    return etree.HTMLPullParser(events=("start", "end"), remove_comments=True, no_network=True)
+
+
+def element_text(element) -> str:
+    etree.strip_elements(element, *SKIP_TAGS, etree.Comment, with_tail=False)
+    return clean_whitespace("".join(element.itertext()))
+
+
+class StreamingTextExtractor:
+    """
+    Incremental main-content extraction with lxml's pull parser. Bytes are fed
+    as they arrive; the first matched element is returned as soon as its end tag
+    is parsed, and ``done`` tells the caller to stop reading. Earlier selectors
+    win when matches nest (``main`` around ``div#bodyContent``). Elements outside
+    a match are freed once parsed, so memory stays flat on large pages. Without a
+    match, ``close`` falls back to the page's substantial ``<p>`` paragraphs.
+    """
+
+    def __init__(self, selectors: Sequence[str] | None = None, encoding: str | None = None) -> None:
+        self.selectors = [Selector.parse(selector) for selector in (selectors or settings.html_content_selectors)]
+        self.parser = pull_parser(encoding)
+        self.open_match = None
+        self.open_rank = len(self.selectors)
+        self.paragraphs: list[str] = []
+        self.text: str | None = None
+        self.bytes_read = 0
+
+    @property
+    def done(self) -> bool:
+        return self.text is not None
+
+    def feed(self, data: bytes | str) -> bool:
+        if not self.done:
+            self.bytes_read += len(data)
+            self.parser.feed(data)
+            self._drain()
+        return self.done
+
+    def close(self) -> str:
+        if not self.done:
+            try:
+                self.parser.close()
+            except etree.XMLSyntaxError:
+                pass  # empty or truncated document; use what was parsed
+            self._drain()
+        if self.text is None:
+            self.text = "\n".join(self.paragraphs)
+        return self.text
+
+    def _drain(self) -> None:
+        for event, element in self.parser.read_events():
+            if not isinstance(element.tag, str):
+                continue
+            if event == "start":
+                # Only a better-ranked selector can take over an open match; it is nested, so it ends first
+                for rank, selector in enumerate(self.selectors[:self.open_rank]):
+                    if selector.matches(element):
+                        self.open_match, self.open_rank = element, rank
+                        break
+                continue
+            if element is self.open_match:
+                self.text = element_text(element)
+                return
+            if self.open_match is not None:
+                continue  # freed with the match, the text is needed until then
+            if element.tag == "p":
+                paragraph = element_text(element)
+                if len(paragraph) >= MIN_PARAGRAPH_CHARS:
+                    self.paragraphs.append(paragraph)
+            # Parsed and outside any match: free it and the siblings before it
+            element.clear(keep_tail=True)
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+
+
+def extract_main_text(html: bytes | str, selectors: Sequence[str] | None = None) -> str:
+    extractor = StreamingTextExtractor(selectors)
+    extractor.feed(html)
+    return extractor.close()
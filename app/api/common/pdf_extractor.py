@@ -1,14 +1,68 @@
 # app/api/common/pdf_extractor.py
 
-from app.api.common import file_upload
+import asyncio, os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterator
+
 from pypdf import PdfReader
 
-def pdf_to_text_extractor(filepath: str) -> str:
-    content = ""
+from app.api.core.config import settings
+
+# Text extraction is pure-Python and holds the GIL, so pages are spread over processes
+pdf_workers = settings.pdf_extract_workers or os.cpu_count() or 1
+# Started on first use, so importing the module (or a reload) spawns no processes
+_pdf_executor: ProcessPoolExecutor | None = None
+
+
+def pdf_executor() -> ProcessPoolExecutor:
+    global _pdf_executor
+    if _pdf_executor is None:
+        _pdf_executor = ProcessPoolExecutor(max_workers=pdf_workers)
+    return _pdf_executor
+
+
+def shutdown_pdf_executor() -> None:
+    global _pdf_executor
+    if _pdf_executor is not None:
+        _pdf_executor.shutdown(wait=False, cancel_futures=True)
+        _pdf_executor = None
+
+
+def page_count(filepath: str) -> int:
+    return len(PdfReader(filepath, strict=True).pages)
+
+
+def extract_page_range(filepath: str, start: int, stop: int) -> list[str]:
+    """Text of pages ``start``..``stop - 1``; runs in a worker process, which opens the PDF itself."""
     pdf_reader = PdfReader(filepath, strict=True)
-    for page in pdf_reader.pages:
-        page_text = page.extract_text()
-        if page_text:
-            content += f'{page_text}\n\n'
-    with open(filepath.replace('pdf','txt'),'w',encoding='utf-8') as file:
-        file.write(content)
+    return [pdf_reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+async def extract_pages(filepath: str, pages_per_task: int | None = None) -> AsyncIterator[tuple[int, str]]:
+    """
+    Yield ``(page number, text)`` in page order while later ranges are still being
+    extracted. At most two ranges per worker are in flight, so a slow consumer
+    holds back extraction instead of buffering the whole document.
+    """
+    loop = asyncio.get_running_loop()
+    executor = pdf_executor()
+    pages_per_task = pages_per_task or settings.pdf_pages_per_task
+    total = await loop.run_in_executor(executor, page_count, filepath)
+    ranges = deque(
+        (start, min(start + pages_per_task, total)) for start in range(0, total, pages_per_task)
+    )
+    pending: deque[tuple[int, asyncio.Future]] = deque()
+    try:
+        while ranges or pending:
+            while ranges and len(pending) < 2 * pdf_workers:
+                start, stop = ranges.popleft()
+                pending.append((start, loop.run_in_executor(executor, extract_page_range, filepath, start, stop)))
+            start, future = pending.popleft()
+            for offset, page_text in enumerate(await future):
+                if page_text:
+                    yield start + offset + 1, page_text
+    finally:
+        for _, future in pending:
+            future.cancel()
+
@@ -0,0 +1,166 @@
+# app/api/common/url_cache.py
+
+import asyncio, hashlib, json, os, time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from uuid import uuid4
+
+from loguru import logger
+
+from app.api.common.cache import LRUCache
+from app.api.core.config import settings
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+# extract_url keeps whatever punctuation follows a URL in prose
+TRAILING_PUNCTUATION = ".,;:!?)]}'\""
+
+
+def normalize_url(url: str) -> str:
+    """
+    Cache key for ``url``, and the URL that is actually fetched: lower-cased scheme
+    and host, no default port, fragment or trailing punctuation, sorted query.
+    """
+    parts = urlsplit(url.strip().rstrip(TRAILING_PUNCTUATION))
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if ":" in host:
+        host = f"[{host}]"  # IPv6 literal
+    if parts.username is not None:
+        userinfo = parts.netloc.rpartition("@")[0]
+        host = f"{userinfo}@{host}"
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+@dataclass
+class CachedPage:
+    text: str
+    expires: float                # wall clock, so disk entries stay meaningful after a restart
+    etag: str | None = None
+    last_modified: str | None = None
+
+    @property
+    def fresh(self) -> bool:
+        return self.expires > time.time()
+
+    def validators(self) -> dict[str, str]:
+        """Conditional request headers; the server answers 304 if the page is unchanged."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class URLContentCache:
+    """
+    Parsed page text per normalized URL. Entries are served as is while fresh
+    and revalidated with their ``ETag``/``Last-Modified`` once stale, so they are
+    kept (LRU-bounded) past expiry. With ``directory`` set, entries are also
+    written there as JSON and survive restarts; files are read and written on a
+    worker thread, while the index of them is only touched on the event loop.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, directory: str | None = None, disk_capacity: int = 10_000) -> None:
+        self.ttl = ttl
+        self.memory: LRUCache[str, CachedPage] = LRUCache(maxsize)
+        self.directory = directory
+        self.disk_capacity = disk_capacity
+        # File name -> size of every disk entry, oldest write first; scanned once here, kept up to date by put
+        self.disk_index: OrderedDict[str, int] = OrderedDict()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            entries = [entry for entry in os.scandir(directory) if entry.name.endswith(".json")]
+            stats = {entry.name: entry.stat() for entry in entries}
+            for name in sorted(stats, key=lambda name: stats[name].st_mtime):
+                self.disk_index[name] = stats[name].st_size
+            self._remove(self._evictions())
+
+    @property
+    def disk_bytes(self) -> int:
+        return sum(self.disk_index.values())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest() + ".json")
+
+    async def get(self, url: str) -> CachedPage | None:
+        key = normalize_url(url)
+        if (page := self.memory.get(key)) is not None or not self.directory:
+            return page
+        if (page := await asyncio.to_thread(self._read, key)) is not None:
+            self.memory.put(key, page)
+        return page
+
+    async def put(self, url: str, text: str, etag: str | None = None,
+                  last_modified: str | None = None, max_age: float | None = None) -> CachedPage:
+        key = normalize_url(url)
+        ttl = self.ttl if max_age is None else min(max_age, self.ttl)
+        page = CachedPage(text, time.time() + ttl, etag, last_modified)
+        self.memory.put(key, page)
+        if self.directory:
+            await self._store(key, page)
+        return page
+
+    async def refresh(self, url: str, page: CachedPage, max_age: float | None = None) -> CachedPage:
+        """Extend ``page`` after a 304."""
+        return await self.put(url, page.text, page.etag, page.last_modified, max_age)
+
+    async def _store(self, key: str, page: CachedPage) -> None:
+        try:
+            name, size = await asyncio.to_thread(self._write, key, page)
+        except OSError as e:
+            logger.warning(f"Could not write the URL cache entry for {key}: {e}")
+            return
+        self.disk_index[name] = size
+        self.disk_index.move_to_end(name)
+        if evicted := self._evictions():
+            await asyncio.to_thread(self._remove, evicted)
+
+    def _read(self, key: str) -> CachedPage | None:
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                return CachedPage(**json.load(f)["page"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write(self, key: str, page: CachedPage) -> tuple[str, int]:
+        path = self._path(key)
+        # Unique per write: two writes of one URL may be on different threads at once
+        temporary = f"{path}.{uuid4().hex}.tmp"
+        try:
+            with open(temporary, "w", encoding="utf-8") as f:
+                json.dump({"url": key, "page": asdict(page)}, f)
+            os.replace(temporary, path)
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        return os.path.basename(path), os.path.getsize(path)
+
+    def _evictions(self) -> list[str]:
+        evicted = []
+        while len(self.disk_index) > self.disk_capacity:
+            evicted.append(self.disk_index.popitem(last=False)[0])
+        return evicted
+
+    def _remove(self, names: list[str]) -> None:
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def clear(self) -> None:
+        self.memory.clear()
+
+
+url_cache = URLContentCache(
+    settings.url_cache_size,
+    settings.url_cache_ttl,
+    settings.url_cache_dir,
+    settings.url_cache_disk_capacity,
+)
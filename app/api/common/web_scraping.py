@@ -1,32 +1,136 @@
 # app/api/common/web_scraping.py
 
 import re, asyncio, aiohttp
-from bs4 import BeautifulSoup
 from loguru import logger
 
+from app.api.common.html_extractor import StreamingTextExtractor, extract_main_text
+from app.api.common.url_cache import URLContentCache, normalize_url, url_cache
+from app.api.core.config import settings
+
+USER_AGENT = "generative-ai-service/1.0 (+aiohttp)"
+
+
+def create_http_session() -> aiohttp.ClientSession:
+    """
+    Long-lived session for outbound fetches: pooled keep-alive connections, cached
+    DNS and a per-host cap so one site cannot take the whole pool.
+    """
+    connector = aiohttp.TCPConnector(
+        limit=settings.http_max_connections,
+        limit_per_host=settings.http_max_connections_per_host,
+        ttl_dns_cache=settings.http_dns_cache_ttl,
+        use_dns_cache=True,
+        keepalive_timeout=settings.http_keepalive_timeout,
+        enable_cleanup_closed=True,
+    )
+    timeout = aiohttp.ClientTimeout(
+        total=settings.http_fetch_timeout,
+        sock_connect=settings.http_connect_timeout,
+        sock_read=settings.http_read_timeout,
+    )
+    return aiohttp.ClientSession(
+        connector=connector, timeout=timeout, headers={"User-Agent": USER_AGENT}, raise_for_status=True,
+    )
+
 
 def extract_url(text: str) -> list[str]:
     url_pattern = r"(?P<url>https?:\/\/[^\s]+)"
     return re.findall(url_pattern,text)
 
 def parse_inner_text(html_string: str) -> str:
-    soup = BeautifulSoup(html_string, "lxml")
-    if content := soup.find("div",id="bodyContent"):
-        return content.get_text()
+    if text := extract_main_text(html_string):
+        return text
     logger.warning("Could not parse HTML Content")
     return ""
 
-async def fetch(session: aiohttp.ClientSession, url: str) -> str:
-    async with session.get(url) as response:
-        html_string = await response.text()
-        return parse_inner_text(html_string)
-
-async def fetch_all_urls(urls: list[str]) -> str:
-    async with aiohttp.ClientSession() as session:
-        results = await asyncio.gather(
-            *[fetch(session, url) for url in urls], return_exceptions=True
-        )
-    success_results = [results for result in results if isinstance(result, str)]
+async def read_text(response: aiohttp.ClientResponse, max_bytes: int) -> str:
+    # Parsed as it streams in: reading stops once the main content has been seen or at max_bytes
+    extractor = StreamingTextExtractor(encoding=response.charset)
+    async for chunk in response.content.iter_chunked(64 * 1024):
+        if extractor.feed(chunk[:max_bytes - extractor.bytes_read]):
+            logger.debug(f"Main content of {response.url} found after {extractor.bytes_read} bytes")
+            break
+        if extractor.bytes_read >= max_bytes:
+            logger.warning(f"Truncated {response.url} at {max_bytes} bytes")
+            break
+    if not (text := extractor.close()):
+        logger.warning(f"Could not parse HTML Content of {response.url}")
+    return text
+
+def cache_directives(cache_control: str) -> list[str]:
+    return [directive.strip().lower() for directive in cache_control.split(",") if directive.strip()]
+
+def max_age(cache_control: str) -> float | None:
+    """
+    Seconds the page may be reused without asking the server; None leaves it to
+    the cache TTL, 0 means revalidate on every use (``no-cache``, ``max-age=0``).
+    """
+    directives = cache_directives(cache_control)
+    if "no-cache" in directives:
+        return 0.0
+    for directive in directives:
+        name, _, value = directive.partition("=")
+        if name == "max-age" and value.isdigit():
+            return float(value)
+    return None
+
+async def download(session: aiohttp.ClientSession, url: str, max_bytes: int | None = None,
+                   cache: URLContentCache | None = None) -> str:
+    max_bytes = max_bytes or settings.http_max_body_bytes
+    cached = await cache.get(url) if cache else None
+    if cached is not None and cached.fresh:
+        logger.debug(f"URL cache hit for {url}")
+        return cached.text
+    headers = cached.validators() if cached is not None else {}
+    async with session.get(url, headers=headers) as response:
+        cache_control = response.headers.get("Cache-Control", "")
+        freshness = max_age(cache_control)
+        if response.status == 304 and cached is not None:
+            logger.debug(f"{url} not modified, reusing the cached text")
+            await cache.refresh(url, cached, freshness)
+            return cached.text
+        if (response.content_length or 0) > max_bytes:
+            logger.warning(f"{url} declares {response.content_length} bytes, reading the first {max_bytes}")
+        text = await read_text(response, max_bytes)
+        # Only no-store keeps a page out; one that must be revalidated is stored already stale,
+        # so the next use sends its ETag/Last-Modified and a 304 reuses the text
+        if cache is not None and response.status == 200 and "no-store" not in cache_directives(cache_control):
+            await cache.put(url, text, response.headers.get("ETag"), response.headers.get("Last-Modified"), freshness)
+        return text
+
+# Downloads in progress per normalized URL, so prompts citing the same page share one request
+_in_flight: dict[str, asyncio.Future[str]] = {}
+
+def _finish_download(key: str, done: asyncio.Future[str]) -> None:
+    _in_flight.pop(key, None)
+    # Callers may have stopped waiting (context deadline); retrieve the error so it isn't reported as lost
+    if not done.cancelled() and (error := done.exception()) is not None:
+        logger.debug(f"Download of {key} failed: {error!r}")
+
+def in_flight_download(url: str) -> asyncio.Future[str] | None:
+    return _in_flight.get(normalize_url(url))
+
+async def fetch(session: aiohttp.ClientSession, url: str, max_bytes: int | None = None,
+                cache: URLContentCache | None = url_cache) -> str:
+    # Fetch the URL the cache and the in-flight table are keyed on, so spellings that
+    # share an entry (trailing punctuation from prose, query order) also share the request
+    key = normalize_url(url)
+    if (pending := _in_flight.get(key)) is None:
+        pending = asyncio.ensure_future(download(session, key, max_bytes, cache))
+        _in_flight[key] = pending
+        pending.add_done_callback(lambda done: _finish_download(key, done))
+    return await asyncio.shield(pending)
+
+async def fetch_all_urls(urls: list[str], session: aiohttp.ClientSession | None = None) -> str:
+    """Fetch ``urls`` concurrently on ``session``; without one, a short-lived session is used."""
+    if session is None:
+        async with create_http_session() as own_session:
+            return await fetch_all_urls(urls, own_session)
+    results = await asyncio.gather(
+        *[fetch(session, url) for url in urls], return_exceptions=True
+    )
+    success_results = [result for result in results if isinstance(result, str)]
     if len(results) != len(success_results):
-        logger.warning('Some URL could not be fetch')
-    return " ".join(success_results)
\ No newline at end of file
+        failures = [f"{url}: {type(result).__name__} {result}" for url, result in zip(urls, results) if isinstance(result, BaseException)]
+        logger.warning(f"Some URL could not be fetch: {'; '.join(failures)}")
+    return " ".join(success_results)
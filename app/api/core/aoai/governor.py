@@ -0,0 +1,138 @@
+# app/api/core/aoai/governor.py
+
+import asyncio, time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Callable
+
+from fastapi import HTTPException, status
+from loguru import logger
+
+from app.api.core.config import settings
+
+
+class TokenBucket:
+    """Holds up to ``capacity`` units and refills at ``rate`` units per second."""
+
+    def __init__(self, capacity: float, rate: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.capacity = capacity
+        self.rate = rate
+        self.clock = clock
+        self.level = capacity
+        self.updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until ``amount`` (clamped to the capacity) is available; 0 if it is now."""
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(missing, 0.0) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+
+@dataclass(eq=False)
+class _Waiter:
+    cost: int
+    future: asyncio.Future
+    enqueued: float = field(default_factory=time.monotonic)
+
+
+class RateGovernor:
+    """
+    Admission control in front of Azure OpenAI. Each request costs one request
+    and ``cost`` tokens against RPM/TPM buckets that hold ``burst_seconds`` worth
+    of the per-minute limits, so bursts are spread out instead of meeting 429s.
+    Waiting requests are queued per client and admitted round-robin, so one
+    busy client cannot starve the others; within a client order is FIFO.
+    """
+
+    def __init__(self, rpm: int | None, tpm: int | None, burst_seconds: float = 10.0,
+                 queue_limit: int = 256, queue_timeout: float = 30.0) -> None:
+        self.requests = TokenBucket(max(rpm * burst_seconds / 60, 1), rpm / 60) if rpm else None
+        self.tokens = TokenBucket(max(tpm * burst_seconds / 60, 1), tpm / 60) if tpm else None
+        self.queue_limit = queue_limit
+        self.queue_timeout = queue_timeout
+        self.queues: OrderedDict[str, deque[_Waiter]] = OrderedDict()
+        self.queued = 0
+        self._timer: asyncio.TimerHandle | None = None
+
+    def _wait_time(self, cost: int) -> float:
+        return max(
+            self.requests.wait_time(1) if self.requests else 0.0,
+            self.tokens.wait_time(cost) if self.tokens else 0.0,
+        )
+
+    def _admit_ready(self) -> None:
+        self._timer = None
+        while self.queues:
+            client, queue = next(iter(self.queues.items()))
+            waiter = queue[0]
+            if (wait := self._wait_time(waiter.cost)) > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._admit_ready)
+                return
+            queue.popleft()
+            self.queued -= 1
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens:
+                self.tokens.take(waiter.cost)
+            waiter.future.set_result(None)
+            # Round-robin: the client goes to the back of the line
+            self.queues.move_to_end(client)
+            if not queue:
+                del self.queues[client]
+
+    def _forget(self, client: str, waiter: _Waiter) -> None:
+        waiter.future.cancel()
+        queue = self.queues.get(client)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            self.queued -= 1
+            if not queue:
+                del self.queues[client]
+
+    async def acquire(self, client: str, cost: int) -> float:
+        """Wait until ``cost`` tokens may be sent for ``client``; returns the seconds spent queued."""
+        if self.queued >= self.queue_limit:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Azure OpenAI request queue is full, retry later",
+                headers={"Retry-After": str(max(int(self.queue_timeout), 1))},
+            )
+        waiter = _Waiter(cost, asyncio.get_running_loop().create_future())
+        self.queues.setdefault(client, deque()).append(waiter)
+        self.queued += 1
+        if self._timer is None:
+            self._admit_ready()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._forget(client, waiter)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"Waited {self.queue_timeout:g}s for Azure OpenAI capacity, retry later",
+                headers={"Retry-After": str(max(int(self.queue_timeout), 1))},
+            )
+        except asyncio.CancelledError:
+            self._forget(client, waiter)  # the client went away while queued
+            raise
+        waited = time.monotonic() - waiter.enqueued
+        if waited >= 0.001:
+            logger.info(f"Azure OpenAI request of {client} ({cost} tokens) queued for {waited * 1000:.0f}ms")
+        return waited
+
+
+rate_governor = RateGovernor(
+    settings.azure_rpm_limit,
+    settings.azure_tpm_limit,
+    settings.azure_rate_burst_seconds,
+    settings.azure_queue_limit,
+    settings.azure_queue_timeout,
+)
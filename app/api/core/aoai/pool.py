@@ -0,0 +1,180 @@
+# app/api/core/aoai/pool.py
+
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Mapping, Sequence
+
+from loguru import logger
+from openai import AsyncAzureOpenAI, AsyncOpenAI
+
+from app.api.core.config import settings
+
+
+class CircuitBreaker:
+    """
+    Closed until ``failures`` consecutive failures, then open for ``reset_timeout``
+    seconds (or the server's ``Retry-After``). After that one probe request is let
+    through (half-open): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failures: int, reset_timeout: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.failures = failures
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.probing = False
+
+    @property
+    def state(self) -> str:
+        if self.consecutive_failures < self.failures and not self.open_until:
+            return "closed"
+        return "open" if self.clock() < self.open_until else "half-open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "half-open":
+            if self.probing:
+                return False
+            self.probing = True
+        return state != "open"
+
+    def record_success(self) -> None:
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.probing = False
+
+    def record_failure(self, retry_after: float | None = None) -> None:
+        self.consecutive_failures += 1
+        self.probing = False
+        if retry_after is not None or self.consecutive_failures >= self.failures:
+            self.trip(self.reset_timeout if retry_after is None else retry_after)
+
+    def release(self) -> None:
+        """The call ended without telling anything about the deployment (e.g. it was cancelled)."""
+        self.probing = False
+
+    def trip(self, seconds: float) -> None:
+        self.open_until = max(self.open_until, self.clock() + seconds)
+
+
+def _header_number(headers: Mapping[str, str], name: str) -> float | None:
+    try:
+        return float(headers[name])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+@dataclass(eq=False)
+class Deployment:
+    """A deployment behind its own client, with the capacity its last response reported."""
+    name: str
+    client: AsyncOpenAI
+    model: str
+    weight: float = 1.0
+    breaker: CircuitBreaker = field(default_factory=lambda: CircuitBreaker(
+        settings.azure_breaker_failures, settings.azure_breaker_reset
+    ))
+    remaining_requests: float | None = None
+    remaining_tokens: float | None = None
+    limit_requests: float | None = None
+    limit_tokens: float | None = None
+    in_flight: int = 0
+
+    def capacity(self) -> float:
+        """Smallest remaining share of the request and token limits; 1.0 until headers were seen."""
+        shares = [
+            remaining / limit if limit else (1.0 if remaining else 0.0)
+            for remaining, limit in ((self.remaining_requests, self.limit_requests),
+                                     (self.remaining_tokens, self.limit_tokens))
+            if remaining is not None
+        ]
+        return min(shares, default=1.0)
+
+    def score(self) -> float:
+        # Requests already in flight haven't shown up in the headers yet
+        return self.weight * self.capacity() / (1 + self.in_flight)
+
+    def observe(self, headers: Mapping[str, str]) -> None:
+        for kind in ("requests", "tokens"):
+            remaining = _header_number(headers, f"x-ratelimit-remaining-{kind}")
+            if remaining is None:
+                continue
+            # Azure doesn't always send the limit; the highest remaining seen is the next best guess
+            limit = _header_number(headers, f"x-ratelimit-limit-{kind}") or \
+                max(getattr(self, f"limit_{kind}") or 0.0, remaining)
+            setattr(self, f"remaining_{kind}", remaining)
+            setattr(self, f"limit_{kind}", limit)
+
+
+def retry_after(headers: Mapping[str, str] | None) -> float | None:
+    if not headers:
+        return None
+    if (milliseconds := _header_number(headers, "retry-after-ms")) is not None:
+        return milliseconds / 1000
+    return _header_number(headers, "retry-after")
+
+
+class DeploymentPool:
+    def __init__(self, deployments: Sequence[Deployment]) -> None:
+        if not deployments:
+            raise RuntimeError("The Azure OpenAI deployment pool is empty.")
+        self.deployments = list(deployments)
+
+    def choose(self, exclude: Sequence[Deployment] = ()) -> Deployment | None:
+        """The allowed deployment with the most weighted remaining capacity, or None if every circuit is open."""
+        candidates = sorted(
+            (deployment for deployment in self.deployments if deployment not in exclude),
+            key=Deployment.score, reverse=True,
+        )
+        for deployment in candidates:
+            if deployment.breaker.allow():
+                return deployment
+        return None
+
+    def status(self) -> list[dict]:
+        return [
+            {"name": deployment.name, "state": deployment.breaker.state, "capacity": round(deployment.capacity(), 3),
+             "in_flight": deployment.in_flight, "weight": deployment.weight}
+            for deployment in self.deployments
+        ]
+
+    async def aclose(self) -> None:
+        for deployment in self.deployments:
+            try:
+                await deployment.client.close()
+            except Exception as e:
+                logger.debug(f"Closing the client of {deployment.name} failed: {e}")
+
+
+def azure_deployment(endpoint: str, api_key: str, api_version: str, deployment: str,
+                     weight: float = 1.0, max_retries: int = 2) -> Deployment:
+    client = AsyncAzureOpenAI(
+        api_key=api_key,
+        api_version=api_version,
+        azure_endpoint=endpoint,
+        azure_deployment=deployment,
+        max_retries=max_retries,
+    )
+    return Deployment(name=f"{endpoint.rstrip('/')}/{deployment}", client=client, model=deployment, weight=weight)
+
+
+def deployments_from_settings() -> list[Deployment]:
+    configured = settings.azure_deployments
+    if not configured:
+        return [azure_deployment(
+            str(settings.azure_endpoint_url), settings.azure_openai_api_key,
+            settings.azure_openai_version, settings.azure_deployment_name,
+        )]
+    # The pool fails over itself; SDK retries would hold a request on a throttled deployment
+    return [
+        azure_deployment(
+            str(entry.endpoint or settings.azure_endpoint_url),
+            entry.api_key or settings.azure_openai_api_key,
+            entry.api_version or settings.azure_openai_version,
+            entry.deployment or settings.azure_deployment_name,
+            entry.weight,
+            max_retries=0 if len(configured) > 1 else 2,
+        )
+        for entry in configured
+    ]
@@ -1,111 +1,255 @@
 # app/api/core/aoai/service.py
 
 import asyncio
-from typing import AsyncGenerator, Optional
-from openai import AsyncAzureOpenAI
+from typing import Any, AsyncGenerator, AsyncIterator, Optional, Sequence
+from loguru import logger
+from openai import APIConnectionError, APIStatusError, AsyncOpenAI
+from app.api.core.aoai.pool import (
+    Deployment,
+    DeploymentPool,
+    azure_deployment,
+    deployments_from_settings,
+    retry_after,
+)
 from app.api.core.config import settings
 
+HEARTBEAT = ': heartbeat\n\n'
+DONE = 'data: [DONE]\n\n'
+# Queue marker for the end of the upstream stream
+_END = object()
 
-class AzureOpenAIChatClient:
-    def __init__(self) -> None:
-        # Cast validated types (e.g., HttpUrl) to str so the SDK can .rstrip("/")
-        self.endpoint: str = str(settings.azure_endpoint_url)
-        self.api_key: str = str(settings.azure_openai_api_key)
-        self.api_version: str = str(settings.azure_openai_version)
-        self.deployment: Optional[str] = (
-            str(settings.azure_deployment_name) if settings.azure_deployment_name else None
-        )
 
-        if not self.endpoint or not self.api_key or not self.api_version:
-            raise RuntimeError("Missing Azure OpenAI settings (endpoint/api_key/api_version).")
+def sse_frame(data: str, event: str | None = None) -> str:
+    """One SSE frame; every line of ``data`` gets its own ``data:`` field so newlines survive."""
+    lines = [f"event: {event}"] if event else []
+    lines.extend(f"data: {line}" for line in data.split("\n"))
+    return "\n".join(lines) + "\n\n"
 
-        self.aclient = AsyncAzureOpenAI(
-            api_key=self.api_key,
-            api_version=self.api_version,
-            azure_endpoint=self.endpoint,
-            azure_deployment=self.deployment,  # keep if you want a client-level default
-        )
 
-        # Default model (Azure uses deployment name as the "model" value)
-        self.default_model = self.deployment
+class NoDeploymentAvailable(RuntimeError):
+    pass
 
-    async def chat_stream(self, prompt: str) -> AsyncGenerator[str, None]:
+
+def is_retriable(error: Exception) -> bool:
+    """Throttling, server errors and transport failures are worth trying elsewhere."""
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, APIConnectionError)
+
+
+def is_misconfigured(error: Exception) -> bool:
+    """Bad key, missing access or unknown deployment: the deployment is at fault, not the request."""
+    return isinstance(error, APIStatusError) and error.status_code in (401, 403, 404)
+
+
+class AzureOpenAIChatClient:
+    def __init__(self,
+                 endpoint: str | None = None,
+                 api_key: str | None = None,
+                 api_version: str | None = None,
+                 deployment: str | None = None,
+                 client: AsyncOpenAI | None = None,
+                 flush_chars: int | None = None,
+                 flush_interval_ms: float | None = None,
+                 heartbeat_interval: float | None = None,
+                 deployments: Sequence[Deployment] | None = None) -> None:
         """
-        Streams Server-Sent Events lines:
-          - text tokens:      data: <chunk>\n\n
-          - heartbeat:        : heartbeat\n\n
-          - finish reason:    event: finish\ndata: <reason>\n\n
-          - terminal marker:  data: [DONE]\n\n
+        Streams from a pool of deployments: ``deployments`` if given, else one built
+        from the explicit endpoint/key/deployment/client arguments, else the pool
+        configured in ``settings.azure_deployments`` (or the single azure_* deployment).
         """
-        model = self.default_model or str(settings.azure_deployment_name)
-        if not model:
-            yield 'data: [ERROR] Missing Azure deployment/model name\n\n'
-            yield 'data: [DONE]\n\n'
-            return
+        explicit = endpoint or api_key or deployment
+        # Cast validated types (e.g., HttpUrl) to str so the SDK can .rstrip("/")
+        self.endpoint: str = str(endpoint or settings.azure_endpoint_url)
+        self.api_key: str = str(api_key or settings.azure_openai_api_key)
+        self.api_version: str = str(api_version or settings.azure_openai_version)
+        deployment = deployment or settings.azure_deployment_name
+        self.deployment: Optional[str] = str(deployment) if deployment else None
 
-        # Kick off with a heartbeat so the client renders quickly
-        yield ': heartbeat\n\n'
+        if not self.endpoint or not self.api_key or not self.api_version:
+            raise RuntimeError("Missing Azure OpenAI settings (endpoint/api_key/api_version).")
 
+        if deployments is None and client is not None:
+            deployments = [Deployment(name=self.endpoint, client=client, model=self.deployment or "")]
+        elif deployments is None and explicit:
+            deployments = [azure_deployment(self.endpoint, self.api_key, self.api_version, self.deployment or "")]
+        self.pool = DeploymentPool(deployments or deployments_from_settings())
+        if not all(member.model for member in self.pool.deployments):
+            raise RuntimeError("Missing Azure deployment/model name.")
+        # Primary client; Azure uses the deployment name as the "model" value
+        self.aclient = self.pool.deployments[0].client
+        self.default_model = self.pool.deployments[0].model
+
+        self.flush_chars = flush_chars or settings.sse_flush_chars
+        self.flush_interval = (settings.sse_flush_interval_ms if flush_interval_ms is None else flush_interval_ms) / 1000
+        self.heartbeat_interval = heartbeat_interval or settings.sse_heartbeat_interval
+
+    async def _frames(self, deployment: Deployment, stream: AsyncIterator[Any], queue: asyncio.Queue) -> None:
+        """Turn upstream chunks into queue items: text pieces (str) and ready frames (tuple)."""
+        started = False
         try:
-            stream = await self.aclient.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                stream=True,
-                # Optional: cap tokens so Azure doesn't end immediately with finish_reason="stop"
-                #max_tokens=512,
-            )
-
-            heartbeat_every = 15.0
-            next_hb = asyncio.get_event_loop().time() + heartbeat_every
-
             async for chunk in stream:
-                # Some chunks may have no choices. Guard accordingly.
-                choices = getattr(chunk, "choices", None) or []
-                if not choices:
-                    # No payload in this chunk (keepalive, metadata, etc.)
-                    pass
-
-                for choice in choices:
+                # Some chunks may have no choices (keepalive, metadata, etc.)
+                for choice in getattr(chunk, "choices", None) or []:
                     delta = getattr(choice, "delta", None)
 
                     # 1) Content delta (most common during streaming)
                     piece = getattr(delta, "content", None) if delta else None
                     if piece:
-                        yield f"data: {piece}\n\n"
+                        started = True
+                        queue.put_nowait(piece)
 
                     # 2) Tool calls delta (if you use tools/function calling)
                     tool_calls = getattr(delta, "tool_calls", None) if delta else None
                     if tool_calls:
-                        # Emit tool call JSON so your client can handle it if needed
-                        # You can json.dumps(tool_calls) if you prefer one-line payloads
-                        yield f"event: tool_calls\ndata: {tool_calls}\n\n"
+                        queue.put_nowait((sse_frame(str(tool_calls), "tool_calls"),))
 
                     # 3) Finish reason (stop, length, tool_calls, content_filter, etc.)
                     finish = getattr(choice, "finish_reason", None)
                     if finish:
-                        yield f"event: finish\ndata: {finish}\n\n"
+                        queue.put_nowait((sse_frame(finish, "finish"),))
+            queue.put_nowait(_END)
+        except Exception as e:
+            if not started:
+                # The deployment accepted the request but produced nothing usable
+                deployment.breaker.record_failure()
+            queue.put_nowait(e)
 
-                # Heartbeat to keep proxies from closing the connection
-                now = asyncio.get_event_loop().time()
-                if now >= next_hb:
-                    yield ': heartbeat\n\n'
-                    next_hb = now + heartbeat_every
+    async def chat_stream(self, prompt: str) -> AsyncGenerator[str, None]:
+        """
+        Streams Server-Sent Events lines:
+          - text tokens:      data: <chunk>\n\n   (coalesced, see below)
+          - heartbeat:        : heartbeat\n\n
+          - finish reason:    event: finish\ndata: <reason>\n\n
+          - terminal marker:  data: [DONE]\n\n
 
-                await asyncio.sleep(0.01)
+        Upstream is read by a separate task. Text is buffered and flushed as one
+        frame once ``flush_chars`` characters are waiting or the oldest piece is
+        ``flush_interval`` old; the first piece goes out at once. A heartbeat is
+        sent whenever nothing was written for ``heartbeat_interval`` seconds, on
+        a timer, so a stalled upstream still keeps proxies from closing the connection.
 
-            # End-of-stream marker
-            yield 'data: [DONE]\n\n'
+        Deployments are tried best-capacity first; a 429, 5xx, connection error or
+        a 401/403/404 of a misconfigured deployment moves on to the next one, which
+        is always before any token was sent.
+        """
+        # Kick off with a heartbeat so the client renders quickly
+        yield HEARTBEAT
 
+        try:
+            deployment, stream = await self._open_stream([{"role": "user", "content": prompt}])
         except Exception as e:
             # Send an SSE-friendly error event and close cleanly
             yield f'data: [ERROR] {type(e).__name__}: {e}\n\n'
-            yield 'data: [DONE]\n\n'
+            yield DONE
+            return
 
-    async def aclose(self) -> None:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        reader = asyncio.create_task(self._frames(deployment, stream, queue))
+        getter: asyncio.Future | None = None
+        buffered: list[str] = []
+        size = 0
+        flush_at = 0.0
+        first = True
+        heartbeat_at = loop.time() + self.heartbeat_interval
         try:
-            await self.aclient.close()
-        except Exception:
-            pass
+            while True:
+                deadline = min(heartbeat_at, flush_at) if buffered else heartbeat_at
+                getter = getter or asyncio.ensure_future(queue.get())
+                done, _ = await asyncio.wait({getter}, timeout=max(deadline - loop.time(), 0))
+                item = getter.result() if done else None
+                if done:
+                    getter = None
+
+                if isinstance(item, str):
+                    if not buffered:
+                        flush_at = loop.time() + self.flush_interval
+                    buffered.append(item)
+                    size += len(item)
+                now = loop.time()
+                # Anything other than text ends the current batch, so frames stay in order
+                if buffered and (first or size >= self.flush_chars or now >= flush_at or
+                                 (done and not isinstance(item, str))):
+                    yield sse_frame("".join(buffered))
+                    buffered, size, first = [], 0, False
+                    heartbeat_at = now + self.heartbeat_interval
+
+                if isinstance(item, tuple):
+                    yield item[0]
+                    heartbeat_at = now + self.heartbeat_interval
+                elif item is _END:
+                    # End-of-stream marker
+                    yield DONE
+                    return
+                elif isinstance(item, Exception):
+                    yield f'data: [ERROR] {type(item).__name__}: {item}\n\n'
+                    yield DONE
+                    return
+                elif not done and now >= heartbeat_at:
+                    # Heartbeat to keep proxies from closing the connection
+                    yield HEARTBEAT
+                    heartbeat_at = now + self.heartbeat_interval
+        finally:
+            # Also reached when the client disconnects mid-stream
+            deployment.in_flight -= 1
+            for task in (reader, getter):
+                if task is not None:
+                    task.cancel()
+            close = getattr(stream, "close", None)
+            if close is not None:
+                await close()
+
+    async def _open_stream(self, messages: list[dict]) -> tuple[Deployment, AsyncIterator[Any]]:
+        """Start a completion stream on the best deployment, failing over on retriable errors."""
+        tried: list[Deployment] = []
+        last_error: Exception | None = None
+        # Only an explicitly configured cap is sent: reasoning tokens count toward it, so a
+        # default cap would cut long answers off (finish_reason=length) or leave them empty
+        limits = {}
+        if settings.azure_max_completion_tokens is not None:
+            limits["max_completion_tokens"] = settings.azure_max_completion_tokens
+        while (deployment := self.pool.choose(tried)) is not None:
+            tried.append(deployment)
+            deployment.in_flight += 1
+            try:
+                response = await deployment.client.chat.completions.with_raw_response.create(
+                    model=deployment.model,
+                    messages=messages,
+                    stream=True,
+                    **limits,
+                )
+            except Exception as e:
+                deployment.in_flight -= 1
+                headers = getattr(getattr(e, "response", None), "headers", None)
+                if headers is not None:
+                    deployment.observe(headers)
+                if is_misconfigured(e):
+                    # Won't fix itself on the next request; keep it out until the breaker's probe
+                    deployment.breaker.record_failure()
+                    deployment.breaker.trip(deployment.breaker.reset_timeout)
+                elif not is_retriable(e):
+                    deployment.breaker.record_success()  # it answered; the request itself is at fault
+                    raise
+                else:
+                    deployment.breaker.record_failure(retry_after(headers) if isinstance(e, APIStatusError) else None)
+                logger.warning(f"Azure OpenAI deployment {deployment.name} failed ({type(e).__name__}: {e}); "
+                               f"{deployment.breaker.state}, trying the next one")
+                last_error = e
+                continue
+            except BaseException:
+                deployment.in_flight -= 1
+                deployment.breaker.release()
+                raise
+            deployment.observe(response.headers)
+            deployment.breaker.record_success()
+            return deployment, response.parse()
+        if last_error is not None:
+            raise last_error
+        raise NoDeploymentAvailable("Every Azure OpenAI deployment is circuit-broken; retry later")
+
+    async def aclose(self) -> None:
+        await self.pool.aclose()
 
 
-azure_chat_client = AzureOpenAIChatClient()
\ No newline at end of file
+azure_chat_client = AzureOpenAIChatClient()
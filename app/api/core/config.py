@@ -1,8 +1,22 @@
 # generative-ai-service/app/api/core/config.py
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from pydantic import Field, HttpUrl
-from typing import Annotated
+from pydantic import BaseModel, Field, HttpUrl
+from typing import Annotated, Literal
+
+# Where VectorRepository keeps vectors: a Qdrant server or the embedded local index
+VectorBackend = Literal['qdrant', 'local']
+
+# Memory/speed trade-off applied to the diffusion pipelines at load time
+MemoryMode = Literal['none', 'balanced', 'low', 'minimal']
+
+class AzureDeployment(BaseModel):
+    """One pool member; unset fields fall back to the single-deployment azure_* settings."""
+    endpoint:   HttpUrl | None = None
+    api_key:    str | None = None
+    api_version: str | None = None
+    deployment: str | None = None
+    weight:     Annotated[float, Field(gt=0, default=1.0)]
 
 class Settings(BaseSettings):
     # Define the application name with a default value
@@ -11,9 +25,85 @@ class Settings(BaseSettings):
     azure_deployment_name:  Annotated[str, Field(min_length=5, default='gpt-5-nano')]
     azure_openai_api_key:   Annotated[str, Field(min_length=5)]
     azure_openai_version:   Annotated[str, Field(min_length=5, default='2024-12-01-preview')]
+    sse_flush_chars:        Annotated[int, Field(ge=1, default=48)]      # flush buffered tokens at this size...
+    sse_flush_interval_ms:  Annotated[float, Field(ge=0, default=40.0)]  # ...or once the oldest has waited this long
+    sse_heartbeat_interval: Annotated[float, Field(gt=0, default=15.0)]  # seconds without any frame
+    # JSON list of AzureDeployment; empty = the single deployment above
+    azure_deployments:      Annotated[list[AzureDeployment], Field(default=[])]
+    azure_breaker_failures: Annotated[int, Field(ge=1, default=3)]       # consecutive failures that open the circuit
+    azure_breaker_reset:    Annotated[float, Field(gt=0, default=30.0)]  # seconds before a half-open probe
+    azure_max_completion_tokens: Annotated[int | None, Field(ge=1, default=None)]  # None = no cap sent upstream
+    # Completion tokens the rate governor charges per request when no cap is set (reasoning tokens included)
+    azure_completion_token_estimate: Annotated[int, Field(ge=0, default=1024)]
+    azure_rpm_limit:        Annotated[int | None, Field(ge=1, default=None)]  # None = no request bucket
+    azure_tpm_limit:        Annotated[int | None, Field(ge=1, default=None)]  # None = no token bucket
+    azure_rate_burst_seconds: Annotated[float, Field(gt=0, le=60, default=10.0)]  # bucket size, in seconds of the limit
+    azure_queue_limit:      Annotated[int, Field(ge=1, default=256)]
+    azure_queue_timeout:    Annotated[float, Field(gt=0, default=30.0)]
     postgres_username:      Annotated[str, Field(min_length=5)]
     postgres_password:      Annotated[str, Field(min_length=5)]
     postgres_db:            Annotated[str, Field(min_length=5)]
+    diffusion_memory_mode:  Annotated[MemoryMode, Field(default='balanced')]
+    video_decode_chunk_max: Annotated[int, Field(ge=1, default=8)]
+    svd_conditioning_cache_size: Annotated[int, Field(ge=0, default=16)]
+    embedding_batch_size:   Annotated[int, Field(ge=1, default=16)]
+    chunk_overlap_tokens:   Annotated[int, Field(ge=0, default=64)]
+    vector_backend:         Annotated[VectorBackend, Field(default='qdrant')]
+    qdrant_host:            Annotated[str, Field(default='localhost')]
+    qdrant_port:            Annotated[int, Field(default=6333)]
+    vector_store_path:      Annotated[str, Field(min_length=1, default='vector_store')]
+    local_ivf_min_vectors:  Annotated[int, Field(ge=1, default=50_000)]
+    local_ivf_nprobe:       Annotated[int, Field(ge=1, default=32)]
+    search_hnsw_ef:         Annotated[int | None, Field(ge=1, default=None)]
+    search_oversampling:    Annotated[float, Field(ge=1.0, default=2.0)]
+    search_rescore:         Annotated[bool, Field(default=True)]
+    rag_candidates:         Annotated[int, Field(ge=1, default=12)]
+    rag_context_chunks:     Annotated[int, Field(ge=1, default=3)]
+    rag_score_threshold:    Annotated[float, Field(default=0.7)]
+    rag_mmr_lambda:         Annotated[float, Field(ge=0.0, le=1.0, default=0.7)]
+    rag_duplicate_threshold: Annotated[float, Field(ge=0.0, le=1.0, default=0.95)]
+    rag_collections:        Annotated[list[str], Field(default=["knowledgebase"])]
+    rag_query_variants:     Annotated[int, Field(ge=1, default=4)]   # 1 = the prompt alone
+    rag_rrf_k:              Annotated[int, Field(ge=1, default=60)]
+    context_deadline:       Annotated[float, Field(gt=0, default=5.0)]   # seconds for URL fetching + retrieval
+    vector_upsert_batch_size:  Annotated[int, Field(ge=1, default=256)]
+    vector_upsert_parallelism: Annotated[int, Field(ge=1, default=4)]
+    ingestion_queue_size:      Annotated[int, Field(ge=1, default=8)]
+    ingestion_embed_workers:   Annotated[int, Field(ge=1, default=1)]
+    ingestion_upsert_workers:  Annotated[int, Field(ge=1, default=2)]
+    pdf_extract_workers:    Annotated[int, Field(ge=0, default=0)]  # 0 = one per CPU
+    pdf_pages_per_task:     Annotated[int, Field(ge=1, default=8)]
+    query_embed_workers:    Annotated[int, Field(ge=1, default=1)]
+    query_embed_batch_max:  Annotated[int, Field(ge=1, default=16)]
+    query_embed_wait_ms:    Annotated[float, Field(ge=0, default=2.0)]
+    query_cache_size:       Annotated[int, Field(ge=0, default=2048)]
+    query_cache_dir:        Annotated[str | None, Field(default=None)]  # enables the on-disk tier
+    query_cache_disk_capacity: Annotated[int, Field(ge=1, default=100_000)]
+    search_cache_size:      Annotated[int, Field(ge=0, default=512)]
+    search_cache_ttl:       Annotated[float, Field(ge=0, default=30.0)]
+    job_workers:            Annotated[int, Field(ge=1, default=1)]
+    job_queue_limit:        Annotated[int, Field(ge=1, default=32)]
+    job_results_dir:        Annotated[str, Field(min_length=1, default='jobs')]
+    # Live jobs are touched every heartbeat; queued/running jobs untouched for a lease are failed,
+    # whichever process ran them, so keep the lease a few heartbeats long
+    job_heartbeat_seconds:  Annotated[float, Field(gt=0, default=15.0)]
+    job_lease_seconds:      Annotated[float, Field(gt=0, default=60.0)]
+    http_max_connections:   Annotated[int, Field(ge=1, default=100)]
+    http_max_connections_per_host: Annotated[int, Field(ge=1, default=8)]
+    http_dns_cache_ttl:     Annotated[int, Field(ge=0, default=300)]
+    http_keepalive_timeout: Annotated[float, Field(ge=0, default=30.0)]
+    http_connect_timeout:   Annotated[float, Field(gt=0, default=3.0)]
+    http_read_timeout:      Annotated[float, Field(gt=0, default=5.0)]    # between two reads
+    http_fetch_timeout:     Annotated[float, Field(gt=0, default=10.0)]   # whole request, per URL
+    http_max_body_bytes:    Annotated[int, Field(ge=1, default=2 * 1024 * 1024)]
+    url_cache_size:         Annotated[int, Field(ge=0, default=256)]
+    url_cache_ttl:          Annotated[float, Field(ge=0, default=300.0)]   # fresh for this long, then revalidated
+    url_cache_dir:          Annotated[str | None, Field(default=None)]     # enables the on-disk tier
+    url_cache_disk_capacity: Annotated[int, Field(ge=1, default=10_000)]
+    # Main-content containers, tried as the page streams in: tag, #id, .class and [attr=value]
+    html_content_selectors: Annotated[list[str], Field(default=[
+        "div#bodyContent", "article", "main", "[role=main]", "div#content", "div.entry-content", "div.post-content",
+    ])]
 
     model_config = SettingsConfigDict(
         env_file = ".env",
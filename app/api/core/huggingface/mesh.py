@@ -0,0 +1,260 @@
+# generative-ai-service/app/api/core/huggingface/mesh.py
+
+import json, struct, zipfile
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Literal, TypeAlias
+
+import numpy as np
+from numpy.typing import NDArray
+
+MeshFormat: TypeAlias = Literal["obj", "ply", "glb"]
+mesh_media_types: dict[MeshFormat, str] = {
+    "obj": "model/obj",
+    "ply": "application/octet-stream",
+    "glb": "model/gltf-binary",
+}
+
+# Fraction of the marching-cubes faces kept per level of detail
+LevelOfDetail: TypeAlias = Literal["full", "high", "medium", "low"]
+lod_face_ratios: dict[LevelOfDetail, float] = {"full": 1.0, "high": 0.5, "medium": 0.2, "low": 0.05}
+MIN_FACES = 4
+
+# glTF constants
+GLB_MAGIC = 0x46546C67  # "glTF"
+GLB_JSON_CHUNK = 0x4E4F534A
+GLB_BIN_CHUNK = 0x004E4942
+GL_ARRAY_BUFFER = 34962
+GL_ELEMENT_ARRAY_BUFFER = 34963
+GL_UNSIGNED_BYTE = 5121
+GL_UNSIGNED_INT = 5125
+GL_FLOAT = 5126
+
+
+@dataclass
+class MeshArrays:
+    vertices: NDArray[np.float32]         # (N, 3)
+    faces: NDArray[np.uint32]             # (M, 3)
+    colors: NDArray[np.float32] | None    # (N, 3) in [0, 1]
+
+    @classmethod
+    def from_decoder_output(cls, mesh) -> "MeshArrays":
+        """Copy a Shap-E ``MeshDecoderOutput`` into NumPy arrays."""
+        vertices = mesh.verts.detach().cpu().numpy().astype(np.float32, copy=False)
+        faces = mesh.faces.detach().cpu().numpy().astype(np.uint32, copy=False)
+        colors = None
+        channels = getattr(mesh, "vertex_channels", None)
+        if channels and len(channels) == 3:
+            colors = np.stack(
+                [channels[c].detach().cpu().numpy() for c in "RGB"], axis=1
+            ).astype(np.float32, copy=False)
+        return cls(vertices, faces, colors)
+
+    @property
+    def num_vertices(self) -> int:
+        return len(self.vertices)
+
+    @property
+    def num_faces(self) -> int:
+        return len(self.faces)
+
+    def colors_u8(self) -> NDArray[np.uint8] | None:
+        if self.colors is None:
+            return None
+        return (np.clip(self.colors, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8)
+
+
+def to_obj(mesh: MeshArrays) -> bytes:
+    # One %-format over the flattened arrays instead of a Python call per row
+    if mesh.colors is not None:
+        vertex_rows = np.hstack([mesh.vertices, np.clip(mesh.colors, 0.0, 1.0)])
+        vertex_fmt = "v %.6f %.6f %.6f %.6f %.6f %.6f\n"
+    else:
+        vertex_rows = mesh.vertices
+        vertex_fmt = "v %.6f %.6f %.6f\n"
+    vertices = (vertex_fmt * mesh.num_vertices) % tuple(vertex_rows.ravel().tolist())
+    faces = ("f %d %d %d\n" * mesh.num_faces) % tuple((mesh.faces.astype(np.int64) + 1).ravel().tolist())
+    return (vertices + faces).encode("ascii")
+
+
+def to_ply(mesh: MeshArrays) -> bytes:
+    colors = mesh.colors_u8()
+    vertex_fields = [("x", "<f4"), ("y", "<f4"), ("z", "<f4")]
+    if colors is not None:
+        vertex_fields += [("red", "u1"), ("green", "u1"), ("blue", "u1")]
+    vertex_data = np.empty(mesh.num_vertices, dtype=vertex_fields)
+    vertex_data["x"], vertex_data["y"], vertex_data["z"] = mesh.vertices.T
+    if colors is not None:
+        vertex_data["red"], vertex_data["green"], vertex_data["blue"] = colors.T
+
+    face_data = np.empty(mesh.num_faces, dtype=[("n", "u1"), ("v", "<u4", (3,))])
+    face_data["n"] = 3
+    face_data["v"] = mesh.faces
+
+    header = [
+        "ply",
+        "format binary_little_endian 1.0",
+        f"element vertex {mesh.num_vertices}",
+        "property float x",
+        "property float y",
+        "property float z",
+    ]
+    if colors is not None:
+        header += ["property uchar red", "property uchar green", "property uchar blue"]
+    header += [
+        f"element face {mesh.num_faces}",
+        "property list uchar uint vertex_indices",
+        "end_header",
+    ]
+    return ("\n".join(header) + "\n").encode("ascii") + vertex_data.tobytes() + face_data.tobytes()
+
+
+def _pad4(data: bytes, fill: bytes = b"\x00") -> bytes:
+    return data + fill * (-len(data) % 4)
+
+
+def to_glb(mesh: MeshArrays) -> bytes:
+    positions = np.ascontiguousarray(mesh.vertices, dtype="<f4")
+    indices = np.ascontiguousarray(mesh.faces, dtype="<u4").ravel()
+    colors = mesh.colors_u8()
+
+    views, accessors, blobs = [], [], []
+    offset = 0
+
+    def add_view(data: bytes, target: int) -> int:
+        nonlocal offset
+        views.append({"buffer": 0, "byteOffset": offset, "byteLength": len(data), "target": target})
+        blobs.append(_pad4(data))
+        offset += len(blobs[-1])
+        return len(views) - 1
+
+    attributes = {"POSITION": len(accessors)}
+    accessors.append({
+        "bufferView": add_view(positions.tobytes(), GL_ARRAY_BUFFER),
+        "componentType": GL_FLOAT,
+        "count": mesh.num_vertices,
+        "type": "VEC3",
+        "min": positions.min(axis=0).tolist() if mesh.num_vertices else [0, 0, 0],
+        "max": positions.max(axis=0).tolist() if mesh.num_vertices else [0, 0, 0],
+    })
+    if colors is not None:
+        # Vertex attributes must be 4-byte aligned, so colors go out as opaque RGBA
+        rgba = np.concatenate([colors, np.full((len(colors), 1), 255, np.uint8)], axis=1)
+        attributes["COLOR_0"] = len(accessors)
+        accessors.append({
+            "bufferView": add_view(rgba.tobytes(), GL_ARRAY_BUFFER),
+            "componentType": GL_UNSIGNED_BYTE,
+            "normalized": True,
+            "count": mesh.num_vertices,
+            "type": "VEC4",
+        })
+    index_accessor = len(accessors)
+    accessors.append({
+        "bufferView": add_view(indices.tobytes(), GL_ELEMENT_ARRAY_BUFFER),
+        "componentType": GL_UNSIGNED_INT,
+        "count": len(indices),
+        "type": "SCALAR",
+    })
+
+    document = {
+        "asset": {"version": "2.0", "generator": "generative-ai-service"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0}],
+        "meshes": [{"primitives": [{"attributes": attributes, "indices": index_accessor, "mode": 4}]}],
+        "buffers": [{"byteLength": offset}],
+        "bufferViews": views,
+        "accessors": accessors,
+    }
+    json_chunk = _pad4(json.dumps(document, separators=(",", ":")).encode("utf-8"), b" ")
+    bin_chunk = b"".join(blobs)
+    total = 12 + 8 + len(json_chunk) + 8 + len(bin_chunk)
+    return b"".join([
+        struct.pack("<III", GLB_MAGIC, 2, total),
+        struct.pack("<II", len(json_chunk), GLB_JSON_CHUNK), json_chunk,
+        struct.pack("<II", len(bin_chunk), GLB_BIN_CHUNK), bin_chunk,
+    ])
+
+
+exporters = {"obj": to_obj, "ply": to_ply, "glb": to_glb}
+
+
+def simplify_mesh(mesh: MeshArrays, target_faces: int) -> MeshArrays:
+    """Quadric-error decimation down to roughly ``target_faces`` triangles, keeping vertex colors."""
+    if target_faces >= mesh.num_faces:
+        return mesh
+    import open3d as o3d  # lazy import
+
+    mesh_o3d = o3d.geometry.TriangleMesh(
+        o3d.utility.Vector3dVector(mesh.vertices.astype(np.float64)),
+        o3d.utility.Vector3iVector(mesh.faces.astype(np.int32)),
+    )
+    if mesh.colors is not None:
+        mesh_o3d.vertex_colors = o3d.utility.Vector3dVector(mesh.colors.astype(np.float64))
+    simplified = mesh_o3d.simplify_quadric_decimation(target_number_of_triangles=max(MIN_FACES, target_faces))
+    simplified.remove_degenerate_triangles()
+    simplified.remove_unreferenced_vertices()
+    return MeshArrays(
+        np.asarray(simplified.vertices, dtype=np.float32),
+        np.asarray(simplified.triangles, dtype=np.uint32),
+        np.asarray(simplified.vertex_colors, dtype=np.float32) if simplified.has_vertex_colors() else None,
+    )
+
+
+def lod_target_faces(mesh: MeshArrays, lod: LevelOfDetail) -> int:
+    return max(MIN_FACES, int(mesh.num_faces * lod_face_ratios[lod]))
+
+
+@dataclass
+class MeshExport:
+    name: str
+    buffer: BytesIO
+    vertices: int
+    faces: int
+
+    @property
+    def size(self) -> int:
+        return self.buffer.getbuffer().nbytes
+
+    def stats(self) -> dict:
+        return {"name": self.name, "vertices": self.vertices, "faces": self.faces, "bytes": self.size}
+
+
+def export_lod(mesh, mesh_format: MeshFormat = "obj", lod: LevelOfDetail = "full",
+               target_faces: int | None = None) -> MeshExport:
+    """Decimate to ``target_faces`` (or the ``lod`` ratio) and serialize."""
+    if not isinstance(mesh, MeshArrays):
+        mesh = MeshArrays.from_decoder_output(mesh)
+    target = target_faces if target_faces is not None else lod_target_faces(mesh, lod)
+    simplified = simplify_mesh(mesh, target)
+    name = f"{target_faces}_faces" if target_faces is not None else lod
+    return MeshExport(name, BytesIO(exporters[mesh_format](simplified)), simplified.num_vertices, simplified.num_faces)
+
+
+def export_lod_bundle(mesh, mesh_format: MeshFormat, lods: list[LevelOfDetail]) -> tuple[BytesIO, list[dict]]:
+    """
+    Zip several levels of detail plus a ``manifest.json`` of their sizes. Levels are
+    decimated in cascade, each from the previous one, which is much cheaper than
+    starting from the full mesh every time.
+    """
+    if not isinstance(mesh, MeshArrays):
+        mesh = MeshArrays.from_decoder_output(mesh)
+    compression = zipfile.ZIP_DEFLATED if mesh_format == "obj" else zipfile.ZIP_STORED
+    buffer, manifest, current = BytesIO(), [], mesh
+    with zipfile.ZipFile(buffer, "w", compression) as bundle:
+        for lod in sorted(set(lods), key=lambda level: -lod_face_ratios[level]):
+            current = simplify_mesh(current, lod_target_faces(mesh, lod))
+            data = exporters[mesh_format](current)
+            bundle.writestr(f"{lod}.{mesh_format}", data)
+            manifest.append({"name": lod, "vertices": current.num_vertices,
+                             "faces": current.num_faces, "bytes": len(data)})
+        bundle.writestr("manifest.json", json.dumps(manifest, indent=2))
+    buffer.seek(0)
+    return buffer, manifest
+
+
+def export_mesh(mesh, mesh_format: MeshFormat = "obj") -> BytesIO:
+    """Serialize a Shap-E mesh (or ``MeshArrays``) in memory, without touching disk."""
+    if not isinstance(mesh, MeshArrays):
+        mesh = MeshArrays.from_decoder_output(mesh)
+    return BytesIO(exporters[mesh_format](mesh))
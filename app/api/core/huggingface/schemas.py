@@ -15,6 +15,7 @@ from pydantic import (
 )
 
 from app.api.core.huggingface.utils import count_tokens
+from app.api.rag.schemas import SourceTiming
 
 VoicePresets = Literal['v2/en_speaker_1', 'v2/en_speaker_9']
 ImageSize = Annotated[
@@ -49,6 +50,7 @@ class TextModelResponse(ModelResponse):
     model: SupportedModels
     price: Annotated[float, Field(ge=0, default=0.01)]
     temperature: Annotated[float, Field(ge=0, le=1.0, default=0.1)]
+    context_timings: list[SourceTiming] | None = None   # per context source, when context was assembled
     #cost: Annotated[float, Field(ge=0.0, le=1.0, default=0.1)] | None = None
 
     @property
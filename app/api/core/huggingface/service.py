@@ -6,7 +6,7 @@ from app.api.models.huggingface.models import (
     load_text_model,  generate_text,
     load_audio_model, generate_audio,
     load_image_model, generate_image,
-    load_video_model, generate_video,
+    load_video_model, generate_video, generate_video_chunks, adaptive_decode_chunk_size,
     load_3d_model,    generate_3d_geometry
 )
 
@@ -42,14 +42,22 @@ class GenerationService:
         self.image_pipe = self.image_pipe        
         return generate_image(self.image_pipe, prompt)
 
-    def generate_video(self, image_bytes: bytes, num_frames: int):
+    def generate_video(self, image_bytes: bytes, num_frames: int, progress=None):
         self.video_pipe = self.video_pipe       
         image = Image.open(BytesIO(image_bytes))
-        frames = generate_video(self.video_pipe, image, num_frames)
+        frames = generate_video(self.video_pipe, image, num_frames, progress=progress)
         return frames
 
-    def generate_3d(self,prompt: str, num_inference_steps: int = 25):
+    def generate_video_chunks(self, image_bytes: bytes, num_frames: int, decode_chunk_size: int | None = None):
+        image = Image.open(BytesIO(image_bytes))
+        return generate_video_chunks(self.video_pipe, image, num_frames, decode_chunk_size)
+
+    def video_decode_chunk_size(self, num_frames: int) -> int:
+        return adaptive_decode_chunk_size(num_frames)
+
+    def generate_3d(self,prompt: str, num_inference_steps: int = 25, progress=None):
         self.threeD_pipe = self.geometry_pipe
-        return  generate_3d_geometry(self.threeD_pipe,prompt=prompt,num_inference_steps=num_inference_steps)
+        return  generate_3d_geometry(self.threeD_pipe,prompt=prompt,num_inference_steps=num_inference_steps,
+                                     progress=progress)
         
 
@@ -1,24 +1,32 @@
 # generative-ai-service/app/api/core/huggingface/utils.py
 
-import soundfile, wave, av, os, tempfile
+import soundfile, wave, av
 import numpy as np
-import open3d as o3d
-import torch
 import tiktoken
 
 from PIL import Image
-from typing import Literal, TypeAlias
+from typing import Iterable, Iterator, Literal, TypeAlias
 from io import BytesIO
 from numpy.typing import NDArray
 from pathlib import Path
 from loguru import logger
 
-from diffusers.pipelines.shap_e.renderer import MeshDecoderOutput
+from app.api.core.huggingface.mesh import export_mesh
 
 SupportedModels: TypeAlias = Literal["gpt-3.5", "gpt-4"]
 PriceTable: TypeAlias = dict[SupportedModels, float]
 price_table: PriceTable = {"gpt-3.5": 0.0030, "gpt-4": 0.0200}
 
+# archival: near-lossless yuv444p (the original output); web: browser-playable yuv420p, much smaller
+VideoEncoding: TypeAlias = Literal["archival", "web"]
+video_encodings: dict[VideoEncoding, dict] = {
+    "archival": {"pix_fmt": "yuv444p", "options": {"crf": "17"}},
+    "web":      {"pix_fmt": "yuv420p", "options": {"crf": "23", "preset": "veryfast"}},
+}
+# A fragment per frame: the muxer closes a fragment only when the next packet arrives, so
+# cutting on keyframes would hold every chunk back until the next one had been decoded
+FRAGMENTED_MP4_FLAGS = "frag_every_frame+empty_moov+default_base_moof"
+
 def export_to_image_buffer(image: Image.Image) -> BytesIO:
     buffer = BytesIO()
     image.save(buffer, format="PNG")
@@ -26,49 +34,84 @@ def export_to_image_buffer(image: Image.Image) -> BytesIO:
     return buffer
 
 
-def mesh_to_obj_buffer(mesh):
-    mesh_o3d = o3d.geometry.TriangleMesh()
-    mesh_o3d.vertices = o3d.utility.Vector3dVector(mesh.verts.cpu().detach().numpy())
-    mesh_o3d.triangles = o3d.utility.Vector3iVector(mesh.faces.cpu().detach().numpy())
-
-    # Handle vertex colors if present
-    if hasattr(mesh, "vertex_channels") and len(mesh.vertex_channels) == 3:
-        vert_color = torch.stack([mesh.vertex_channels[channel] for channel in "RGB"], dim=1)
-        mesh_o3d.vertex_colors = o3d.utility.Vector3dVector(vert_color.cpu().detach().numpy())
-
-    # Create a temporary file and close its handle immediately after getting the name
-    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".obj")
-    tmp_path = tmp.name
-    tmp.close()  # Close so Open3D can write to it on Windows
-
-    try:
-        o3d.io.write_triangle_mesh(tmp_path, mesh_o3d, write_ascii=True)
-        with open(tmp_path, "rb") as f:
-            buffer = BytesIO(f.read())
-    finally:
-        os.remove(tmp_path)
-
-    return buffer
+def mesh_to_obj_buffer(mesh) -> BytesIO:
+    return export_mesh(mesh, "obj")
 
 
-def export_to_video_buffer(images: list[Image.Image]) -> BytesIO:
+def _add_video_stream(output, image: Image.Image, encoding: VideoEncoding,
+                      gop_size: int | None = None, streaming: bool = False):
+    stream = output.add_stream("h264", 30)
+    stream.width = image.width
+    stream.height = image.height
+    stream.pix_fmt = video_encodings[encoding]["pix_fmt"]
+    options = dict(video_encodings[encoding]["options"])
+    if gop_size:
+        # Fragments are cut per frame (FRAGMENTED_MP4_FLAGS); this only spaces keyframes, e.g. one
+        # per decode chunk so a player can start or seek at the first fragment of every chunk
+        options["g"] = str(gop_size)
+    if streaming:
+        # No lookahead or B-frames: x264 otherwise holds frames back and a chunk's fragment only appears at flush
+        options["tune"] = "zerolatency"
+    stream.options = options
+    return stream
+
+
+def export_to_video_buffer(images: list[Image.Image], encoding: VideoEncoding = "archival") -> BytesIO:
     buffer = BytesIO()
     output = av.open(buffer, "w", format="mp4")
-    stream = output.add_stream("h264", 30)
-    stream.width = images[0].width
-    stream.height = images[0].height
-    stream.pix_fmt = "yuv444p"
-    stream.options = {"crf": "17"}
+    stream = _add_video_stream(output, images[0], encoding)
     for image in images:
         frame = av.VideoFrame.from_image(image)
         packet = stream.encode(frame)
         output.mux(packet)
     packet = stream.encode(None)
     output.mux(packet)
+    output.close()
     buffer.seek(0)
     return buffer
 
 
+class _FragmentSink:
+    """Write-only file object that hands back whatever the muxer wrote since the last drain."""
+
+    def __init__(self) -> None:
+        self._parts: list[bytes] = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def stream_video_fragments(
+    frame_chunks: Iterable[list[Image.Image]],
+    encoding: VideoEncoding = "archival",
+    gop_size: int | None = None,
+) -> Iterator[bytes]:
+    """Encode frame chunks into fragmented MP4, yielding bytes as soon as the muxer emits them."""
+    sink = _FragmentSink()
+    output = av.open(sink, "w", format="mp4", options={"movflags": FRAGMENTED_MP4_FLAGS})
+    stream = None
+    try:
+        for images in frame_chunks:
+            if stream is None:
+                stream = _add_video_stream(output, images[0], encoding, gop_size, streaming=True)
+            for image in images:
+                output.mux(stream.encode(av.VideoFrame.from_image(image)))
+            if data := sink.drain():
+                yield data
+        if stream is not None:
+            output.mux(stream.encode(None))
+    finally:
+        output.close()
+    if data := sink.drain():
+        yield data
+
+
 def img_to_bytes(image: Image.Image, img_format: Literal["PNG", "JPEG"] = "PNG") -> bytes:
     buffer = BytesIO()
     image.save(buffer, format=img_format)
@@ -0,0 +1,162 @@
+# app/api/core/jobs/service.py
+
+import asyncio, os, socket
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Callable
+from uuid import uuid4
+
+from fastapi import HTTPException, status
+from loguru import logger
+from sqlalchemy.exc import IntegrityError
+
+from app.api.core.config import settings
+from app.api.db.database import async_session
+from app.api.db.entities import Job
+from app.api.db.schemas import JobOut
+from app.api.repository.job_repository import JobRepository
+
+# A job's work runs on a pool thread, reports 0..1 progress and returns (payload, media type, filename)
+JobWork = Callable[[Callable[[float], None]], tuple[BytesIO, str, str]]
+
+# Report progress to the database at most once per this much change
+PROGRESS_STEP = 0.02
+
+
+class JobService:
+    def __init__(self, workers: int, queue_limit: int, results_dir: str,
+                 heartbeat_seconds: float = 15.0, lease_seconds: float = 60.0) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self.queue_limit = queue_limit
+        self.results_dir = results_dir
+        self.heartbeat_seconds = heartbeat_seconds
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}"  # informational only
+        self.tasks: set[asyncio.Task] = set()
+        self.active: set[str] = set()  # ids of this process's queued and running jobs
+        self._lease_task: asyncio.Task | None = None
+
+    async def submit(self, kind: str, work: JobWork, idempotency_key: str | None = None) -> tuple[JobOut, bool]:
+        """Queue ``work`` and return the job, or the existing ``kind`` job for a repeated idempotency key."""
+        async with async_session() as session:
+            repo = JobRepository(session)
+            if idempotency_key and (job := await repo.get_by_idempotency_key(kind, idempotency_key)):
+                return JobOut.model_validate(job), False
+            if len(self.tasks) >= self.queue_limit:
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Job queue is full, retry later",
+                )
+            try:
+                job = await repo.create(Job(
+                    id=uuid4().hex, kind=kind, status="queued", progress=0.0,
+                    idempotency_key=idempotency_key, owner=self.worker_id,
+                ))
+            except IntegrityError:
+                if not idempotency_key:
+                    raise
+                # A concurrent retry with the same key won the insert
+                await session.rollback()
+                job = await repo.get_by_idempotency_key(kind, idempotency_key)
+                return JobOut.model_validate(job), False
+            job_out = JobOut.model_validate(job)
+
+        self.active.add(job_out.id)
+        task = asyncio.create_task(self._run(job_out.id, work))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        logger.debug(f"Queued {kind} job {job_out.id}")
+        return job_out, True
+
+    async def get(self, job_id: str) -> Job | None:
+        async with async_session() as session:
+            return await JobRepository(session).get(job_id)
+
+    async def heartbeat(self) -> None:
+        """
+        Renew the lease of this process's jobs, then fail queued or running jobs whose
+        lease ran out. Those belong to a process that crashed or was killed; a live
+        one keeps touching its jobs, so no worker id has to survive a restart.
+        """
+        async with async_session() as session:
+            repo = JobRepository(session)
+            if self.active:
+                await repo.touch(list(self.active))
+            if failed := await repo.fail_stale(
+                ["queued", "running"], self.lease_seconds, "Interrupted: the worker running it stopped"
+            ):
+                logger.warning(f"Failed {failed} orphaned job(s)")
+
+    async def _keep_leases(self) -> None:
+        while True:
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                logger.warning(f"Job heartbeat failed. Error: {e}")
+            await asyncio.sleep(self.heartbeat_seconds)
+
+    def start(self) -> None:
+        self._lease_task = asyncio.create_task(self._keep_leases())
+
+    def shutdown(self) -> None:
+        if self._lease_task:
+            self._lease_task.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _update(self, job_id: str, **fields) -> None:
+        async with async_session() as session:
+            await JobRepository(session).update(job_id, **fields)
+
+    async def _advance(self, job_id: str, progress: float) -> None:
+        async with async_session() as session:
+            await JobRepository(session).advance_progress(job_id, progress)
+
+    async def _run(self, job_id: str, work: JobWork) -> None:
+        loop = asyncio.get_running_loop()
+        reported = 0.0
+
+        def report(progress: float) -> None:
+            nonlocal reported
+            if progress - reported >= PROGRESS_STEP:
+                reported = progress
+                asyncio.run_coroutine_threadsafe(self._advance(job_id, round(progress, 4)), loop)
+
+        def execute() -> tuple[str, str, str]:
+            asyncio.run_coroutine_threadsafe(self._update(job_id, status="running"), loop).result()
+            buffer, media_type, filename = work(report)
+            os.makedirs(self.results_dir, exist_ok=True)
+            path = os.path.join(self.results_dir, job_id + os.path.splitext(filename)[1])
+            with open(path, "wb") as f:
+                f.write(buffer.getbuffer())
+            return path, media_type, filename
+
+        try:
+            path, media_type, filename = await loop.run_in_executor(self.executor, execute)
+        except Exception as e:
+            logger.warning(f"Job {job_id} failed. Error: {e}")
+            await self._update(job_id, status="failed", error=f"{type(e).__name__}: {e}")
+            return
+        else:
+            await self._update(
+                job_id, status="succeeded", progress=1.0,
+                result_path=path, media_type=media_type, filename=filename,
+            )
+            logger.debug(f"Job {job_id} finished, result at {path}")
+        finally:
+            self.active.discard(job_id)
+
+
+job_service = JobService(
+    settings.job_workers, settings.job_queue_limit, settings.job_results_dir,
+    settings.job_heartbeat_seconds, settings.job_lease_seconds,
+)
+
+
+async def get_job(job_id: str) -> Job:
+    job = await job_service.get(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Job not found"
+        )
+    return job
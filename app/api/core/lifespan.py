@@ -3,7 +3,12 @@ from contextlib import asynccontextmanager
 from typing import AsyncIterator
 from fastapi import FastAPI
 
+from app.api.common.pdf_extractor import shutdown_pdf_executor
+from app.api.common.web_scraping import create_http_session
 from app.api.db.database import engine, init_db
+from app.api.core.jobs.service import job_service
+from app.api.rag.query_embedding import query_embedding_service
+from app.api.rag.rag_services import vector_service
 
 
 from app.api.models.huggingface.models import (
@@ -26,9 +31,16 @@ async def ai_lifespan(app: FastAPI) -> AsyncIterator[None]:
         "HF_video": load_video_model(),
         "HF_3d":    load_3d_model(),
     }
+    app.state.http_session = create_http_session()
     await init_db()
+    job_service.start()
     try:
         yield
     finally:
+       job_service.shutdown()
+       shutdown_pdf_executor()
+       await query_embedding_service.shutdown()
+       await vector_service.close()
+       await app.state.http_session.close()
        app.state.models.clear()
        await engine.dispose()
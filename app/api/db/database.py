@@ -12,9 +12,15 @@ f"postgresql+asyncpg://{settings.postgres_username}:{settings.postgres_password}
 
 engine = create_async_engine(database_url, echo=True)
 
+# Tables that must survive restarts; everything else is recreated on startup
+PERSISTENT_TABLES = {"jobs"}
+
 async def init_db() -> None:
     async with engine.begin() as con:
-        await con.run_sync(Base.metadata.drop_all)
+        await con.run_sync(
+            Base.metadata.drop_all,
+            tables=[t for t in Base.metadata.sorted_tables if t.name not in PERSISTENT_TABLES],
+        )
         await con.run_sync(Base.metadata.create_all)
 
 async_session = async_sessionmaker(
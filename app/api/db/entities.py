@@ -1,7 +1,7 @@
 # app/api/db/entities.py
 
 from datetime import UTC, datetime
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, UniqueConstraint
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 
@@ -38,4 +38,21 @@ class Message(Base):
                                         )
     conversation: Mapped["Conversation"] = relationship(
                                             "Conversation", back_populates="messages"
-                                        )
\ No newline at end of file
+                                        )
+
+class Job(Base):
+    __tablename__ = "jobs"
+    # Idempotency keys are scoped to the job kind: a key reused on another endpoint is a new job
+    __table_args__ = (UniqueConstraint("kind", "idempotency_key"),)
+    id: Mapped[str]                     = mapped_column(primary_key=True)
+    kind: Mapped[str]                   = mapped_column(index=True)
+    status: Mapped[str]                 = mapped_column(index=True)
+    progress: Mapped[float]             = mapped_column(default=0.0)
+    idempotency_key: Mapped[str | None] = mapped_column()
+    result_path: Mapped[str | None]     = mapped_column()
+    media_type: Mapped[str | None]      = mapped_column()
+    filename: Mapped[str | None]        = mapped_column()
+    error: Mapped[str | None]           = mapped_column()
+    owner: Mapped[str | None]           = mapped_column(index=True)   # host-pid of the process that queued it
+    created_at: Mapped[datetime]        = mapped_column(server_default=func.now())
+    updated_at: Mapped[datetime]        = mapped_column(server_default=func.now(), onupdate=func.now())
@@ -1,5 +1,6 @@
 # app/api/db/schemas.py
 from datetime import datetime
+from typing import Literal
 from pydantic import BaseModel, ConfigDict
 
 class ConversationBase(BaseModel):
@@ -16,4 +17,16 @@ class ConversationUpdate(ConversationBase):
 class ConversationOut(ConversationBase):
     id: int
     created_at: datetime
-    updated_at:datetime
\ No newline at end of file
+    updated_at:datetime
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+class JobOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: str
+    kind: str
+    status: JobStatus
+    progress: float
+    error: str | None = None
+    created_at: datetime
+    updated_at: datetime
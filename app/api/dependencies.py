@@ -1,16 +1,17 @@
 # generative-ai-service/app/api/deppendencies.py
 import asyncio
-from fastapi import Body
+from fastapi import Body, Request
 from loguru import logger
 
 from app.api.common.web_scraping import extract_url, fetch_all_urls
 from app.api.core.huggingface.schemas import TextModelRequest
 
-async def get_urls_contents(body: TextModelRequest = Body(...)) -> str:
+async def get_urls_contents(request: Request, body: TextModelRequest = Body(...)) -> str:
     urls = extract_url(body.prompt)
     if urls:
         try:
-            urls_content = await fetch_all_urls(urls)
+            # Pooled session opened in ai_lifespan
+            urls_content = await fetch_all_urls(urls, getattr(request.app.state, "http_session", None))
             return urls_content
         except Exception as e:
             logger.warning(f"Failed to fetch of several URL. Error: {e}")
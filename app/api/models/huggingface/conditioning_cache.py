@@ -0,0 +1,80 @@
+# app/api/models/huggingface/conditioning_cache.py
+from __future__ import annotations
+
+import functools, hashlib, threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from loguru import logger
+from PIL import Image
+
+
+class ConditioningCache:
+    """
+    LRU of Stable Video Diffusion conditioning tensors (CLIP image embeddings and
+    VAE image latents) keyed by the content hash of the resized input image.
+
+    ``bind`` wraps the pipeline's image and VAE encoders once at load time; a call
+    only reads or fills the cache while a key is active via ``using``, so other
+    callers of the pipeline are unaffected.
+    """
+
+    def __init__(self, maxsize: int = 16) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[tuple, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @staticmethod
+    def image_key(image: Image.Image) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(f"{image.mode}:{image.size}".encode())
+        digest.update(image.tobytes())
+        return digest.hexdigest()
+
+    @contextmanager
+    def using(self, key: str) -> Iterator[None]:
+        self._local.key = key if self.maxsize > 0 else None
+        try:
+            yield
+        finally:
+            self._local.key = None
+
+    def bind(self, pipe):
+        if getattr(pipe, "_conditioning_cache", None) is self:
+            return pipe
+        pipe._encode_image = self._wrap(pipe._encode_image, "image_embeddings")
+        pipe._encode_vae_image = self._wrap(pipe._encode_vae_image, "image_latents")
+        pipe._conditioning_cache = self
+        return pipe
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def _wrap(self, encode, name: str):
+        @functools.wraps(encode)
+        def cached(image, *args, **kwargs):
+            key = getattr(self._local, "key", None)
+            if key is None:
+                return encode(image, *args, **kwargs)
+            # Remaining arguments are device, videos per prompt and the CFG flag
+            entry_key = (key, name, *args, *sorted(kwargs.items()))
+            with self._lock:
+                if entry_key in self._entries:
+                    self._entries.move_to_end(entry_key)
+                    self.hits += 1
+                    return self._entries[entry_key]
+                self.misses += 1
+            value = encode(image, *args, **kwargs)
+            with self._lock:
+                self._entries[entry_key] = value
+                while len(self._entries) > self.maxsize * 2:  # two tensors per image
+                    self._entries.popitem(last=False)
+            logger.debug(f"Cached {name} for conditioning image {key[:12]}")
+            return value
+
+        return cached
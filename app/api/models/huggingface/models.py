@@ -1,16 +1,20 @@
 # app/api/models/huggingface/models.py
 from __future__ import annotations
 
-import os
+import inspect, os, threading
+from contextlib import contextmanager
 from functools import lru_cache
-from typing import Tuple, List
+from typing import Callable, Tuple, List, Iterator
 
 import numpy as np
 import torch
+from loguru import logger
 from numpy.typing import NDArray
 from PIL import Image
 
+from app.api.core.config import settings, MemoryMode
 from app.api.core.huggingface.schemas import VoicePresets
+from app.api.models.huggingface.conditioning_cache import ConditioningCache
 
 # ----- Global runtime config (lightweight) -----
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
@@ -23,6 +27,131 @@ Always respond in markdown.
 """.strip()
 
 
+# -------------------------
+# MEMORY MODES
+# -------------------------
+# Pipeline switches enabled per memory mode, from fastest to leanest.
+MEMORY_MODE_FEATURES: dict[str, tuple[str, ...]] = {
+    "none": (),
+    "balanced": ("enable_attention_slicing", "enable_vae_slicing"),
+    "low": (
+        "enable_attention_slicing", "enable_vae_slicing", "enable_vae_tiling",
+        "enable_model_cpu_offload",
+    ),
+    "minimal": (
+        "enable_attention_slicing", "enable_vae_slicing", "enable_vae_tiling",
+        "enable_sequential_cpu_offload",
+    ),
+}
+# Offloading moves weights between host and accelerator, so it is a no-op on CPU nodes
+OFFLOAD_FEATURES = {"enable_model_cpu_offload", "enable_sequential_cpu_offload"}
+
+# Approximate peak bytes the SVD temporal VAE needs to decode one 1024x576 fp32 frame
+SVD_DECODE_BYTES_PER_FRAME = int(1.2 * 1024**3)
+
+
+def apply_memory_mode(pipe, mode: MemoryMode | None = None):
+    """Enable the memory savers of ``mode`` the pipeline supports and place it on the device."""
+    mode = mode or settings.diffusion_memory_mode
+    offloaded = False
+    for feature in MEMORY_MODE_FEATURES[mode]:
+        if feature in OFFLOAD_FEATURES and device.type != "cuda":
+            continue
+        enable = getattr(pipe, feature, None)
+        if enable is None:
+            logger.debug(f"{type(pipe).__name__} does not support {feature}")
+            continue
+        try:
+            enable()
+        except Exception as e:
+            logger.warning(f"Could not apply {feature} to {type(pipe).__name__}: {e}")
+            continue
+        offloaded = offloaded or feature in OFFLOAD_FEATURES
+    # Offloaded pipelines manage device placement themselves
+    if not offloaded:
+        pipe.to(device)
+    logger.debug(f"Loaded {type(pipe).__name__} with memory mode '{mode}'")
+    return pipe
+
+
+def available_memory() -> int | None:
+    """Bytes currently available to the inference device, if it can be determined."""
+    if device.type == "cuda":
+        free, _ = torch.cuda.mem_get_info(device)
+        return free
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def adaptive_decode_chunk_size(
+    num_frames: int, width: int = 1024, height: int = 576, headroom: float = 0.5
+) -> int:
+    """Largest VAE decode chunk that fits in ``headroom`` of the available memory."""
+    upper = min(num_frames, settings.video_decode_chunk_max)
+    if settings.diffusion_memory_mode == "minimal":
+        return 1
+    free = available_memory()
+    if free is None:
+        return upper
+    bytes_per_frame = SVD_DECODE_BYTES_PER_FRAME * (width * height) / (1024 * 576)
+    bytes_per_frame *= torch.finfo(dtype).bits / 32
+    fit = int(free * headroom // bytes_per_frame)
+    return max(1, min(upper, fit))
+
+
+# -------------------------
+# PROGRESS
+# -------------------------
+ProgressCallback = Callable[[float], None]
+
+
+@contextmanager
+def step_progress(pipe, progress: ProgressCallback | None, total_steps: int):
+    """
+    Yield extra pipeline kwargs that report denoising progress (0..1) to ``progress``.
+    Uses ``callback_on_step_end`` where the pipeline has it, otherwise counts forward
+    passes of the pipeline's prior (Shap-E) from the calling thread only.
+    """
+    if progress is None:
+        yield {}
+        return
+
+    if "callback_on_step_end" in inspect.signature(pipe.__call__).parameters:
+        def on_step_end(pipeline, step, timestep, callback_kwargs):
+            progress(min(1.0, (step + 1) / total_steps))
+            return callback_kwargs
+        yield {"callback_on_step_end": on_step_end}
+        return
+
+    denoiser = getattr(pipe, "prior", None)
+    if denoiser is None:
+        yield {}
+        return
+    owner = threading.get_ident()
+    steps = 0
+
+    def on_forward(module, args, output):
+        nonlocal steps
+        if threading.get_ident() == owner:
+            steps += 1
+            progress(min(1.0, steps / total_steps))
+
+    handle = denoiser.register_forward_hook(on_forward)
+    try:
+        yield {}
+    finally:
+        handle.remove()
+
+
 # -------------------------
 # TEXT
 # -------------------------
@@ -116,14 +245,13 @@ def generate_audio(
 # IMAGE (Tiny SD)
 # -------------------------
 @lru_cache(maxsize=1)
-def load_image_model():
+def load_image_model(memory_mode: MemoryMode | None = None):
     from diffusers import DiffusionPipeline  # lazy import
     pipe = DiffusionPipeline.from_pretrained(
         "segmind/tiny-sd", torch_dtype=dtype
     )
-    # Move after construction (not in from_pretrained)
-    pipe.to(device)
-    return pipe
+    # Memory savers and device placement after construction (not in from_pretrained)
+    return apply_memory_mode(pipe, memory_mode)
 
 
 def generate_image(pipe, prompt: str) -> Image.Image:
@@ -134,45 +262,96 @@ def generate_image(pipe, prompt: str) -> Image.Image:
 # -------------------------
 # VIDEO (SVD)
 # -------------------------
+SVD_INFERENCE_STEPS = 25  # pipeline default, made explicit for progress reporting
+SVD_SEED = 42
+# The noised VAE latent depends on the seed, which is part of every cache key
+conditioning_cache = ConditioningCache(settings.svd_conditioning_cache_size)
+
+
+def conditioning_key(image: Image.Image) -> str:
+    return f"{ConditioningCache.image_key(image)}:{SVD_SEED}"
+
+
 @lru_cache(maxsize=1)
-def load_video_model():
+def load_video_model(memory_mode: MemoryMode | None = None):
     from diffusers import StableVideoDiffusionPipeline  # lazy import
     pipe = StableVideoDiffusionPipeline.from_pretrained(
         "stabilityai/stable-video-diffusion-img2vid",
         dtype=dtype,
         variant="fp16" if dtype == torch.float16 else None,
     )
-    pipe.to(device)
-    return pipe
+    conditioning_cache.bind(pipe)
+    return apply_memory_mode(pipe, memory_mode)
 
 
-def generate_video(pipe, image: Image.Image, num_frames: int = 25) -> List[Image.Image]:
+def generate_video(
+    pipe, image: Image.Image, num_frames: int = 25, decode_chunk_size: int | None = None,
+    progress: ProgressCallback | None = None,
+) -> List[Image.Image]:
     image = image.resize((1024, 576))
-    generator = torch.manual_seed(42)
-    frames = pipe(
-        image, decode_chunk_size=8, generator=generator, num_frames=num_frames
-    ).frames[0]
+    generator = torch.manual_seed(SVD_SEED)
+    if decode_chunk_size is None:
+        decode_chunk_size = adaptive_decode_chunk_size(num_frames, *image.size)
+    logger.debug(f"Decoding {num_frames} frames in chunks of {decode_chunk_size}")
+    with step_progress(pipe, progress, SVD_INFERENCE_STEPS) as progress_kwargs, \
+            conditioning_cache.using(conditioning_key(image)):
+        frames = pipe(
+            image, decode_chunk_size=decode_chunk_size, generator=generator, num_frames=num_frames,
+            num_inference_steps=SVD_INFERENCE_STEPS, **progress_kwargs,
+        ).frames[0]
     return frames
 
 
+def generate_video_chunks(
+    pipe, image: Image.Image, num_frames: int = 25, decode_chunk_size: int | None = None
+) -> Iterator[List[Image.Image]]:
+    """Run the denoising loop once, then VAE-decode and yield frames one chunk at a time."""
+    image = image.resize((1024, 576))
+    generator = torch.manual_seed(SVD_SEED)
+    if decode_chunk_size is None:
+        decode_chunk_size = adaptive_decode_chunk_size(num_frames, *image.size)
+    with conditioning_cache.using(conditioning_key(image)):
+        latents = pipe(
+            image, generator=generator, num_frames=num_frames, output_type="latent"
+        ).frames
+
+    # Mirror the pipeline's own fp16 VAE upcast before decoding
+    needs_upcasting = pipe.vae.dtype == torch.float16 and pipe.vae.config.force_upcast
+    if needs_upcasting:
+        pipe.vae.to(dtype=torch.float32)
+    try:
+        for start in range(0, num_frames, decode_chunk_size):
+            chunk = latents[:, start:start + decode_chunk_size]
+            if needs_upcasting:
+                chunk = chunk.to(torch.float32)
+            with torch.inference_mode():
+                frames = pipe.decode_latents(chunk, chunk.shape[1], chunk.shape[1])
+            yield pipe.video_processor.postprocess_video(video=frames, output_type="pil")[0]
+    finally:
+        if needs_upcasting:
+            pipe.vae.to(dtype=torch.float16)
+
+
 # -------------------------
 # 3D (Shap-E)
 # -------------------------
 @lru_cache(maxsize=1)
-def load_3d_model():
+def load_3d_model(memory_mode: MemoryMode | None = None):
     from diffusers import ShapEPipeline  # lazy import
     pipe = ShapEPipeline.from_pretrained("openai/shap-e")
-    pipe.to(device)
-    return pipe
-
-
-def generate_3d_geometry(pipe, prompt: str, num_inference_steps: int):
-    result = pipe(
-        prompt,
-        guidance_scale=15.0,
-        num_inference_steps=num_inference_steps,  # NOTE: is it "num_inference_steps"?
-        output_type="mesh",
-    )
+    return apply_memory_mode(pipe, memory_mode)
+
+
+def generate_3d_geometry(pipe, prompt: str, num_inference_steps: int,
+                         progress: ProgressCallback | None = None):
+    with step_progress(pipe, progress, num_inference_steps) as progress_kwargs:
+        result = pipe(
+            prompt,
+            guidance_scale=15.0,
+            num_inference_steps=num_inference_steps,  # NOTE: is it "num_inference_steps"?
+            output_type="mesh",
+            **progress_kwargs,
+        )
    
     #print("Result keys:", result.keys())
     #print("Images:", result.images)
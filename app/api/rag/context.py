@@ -0,0 +1,109 @@
+# app/api/rag/context.py
+
+import re
+from typing import Iterable, Sequence
+
+import numpy as np
+from loguru import logger
+from qdrant_client.http.models import ScoredPoint
+
+from app.api.core.config import settings
+
+
+STOPWORDS = frozenset("""
+a about an and are as at be but by can could did do does for from how i in is it me my of on or
+please should so tell that the their then there these this to was we what when where which who
+why will with would you your
+""".split())
+
+# Sentence ends and the conjunctions that usually join separate questions
+SUBQUESTION_SPLIT = re.compile(r"(?<=[?.!;])\s+|\s+(?:and also|and then|as well as)\s+|\n+", re.IGNORECASE)
+WORD = re.compile(r"[\w'-]+")
+
+
+def query_variants(prompt: str, limit: int | None = None) -> list[str]:
+    """
+    The prompt itself, then each sub-question of a multi-part prompt, then the
+    prompt with stopwords stripped; deduplicated and capped at ``limit``.
+    """
+    limit = limit or settings.rag_query_variants
+    variants = [prompt.strip()]
+    parts = [part.strip() for part in SUBQUESTION_SPLIT.split(prompt) if part and part.strip()]
+    if len(parts) > 1:
+        variants.extend(parts)
+    keywords = " ".join(word for word in WORD.findall(prompt) if word.lower() not in STOPWORDS)
+    if keywords:
+        # Keep it ahead of the sub-questions the cap would otherwise cut
+        variants.insert(1, keywords)
+
+    unique: dict[str, str] = {}
+    for variant in variants:
+        unique.setdefault(variant.lower(), variant)
+    return list(unique.values())[:limit]
+
+
+def rrf_fuse(result_lists: Iterable[Sequence[ScoredPoint]], k: int | None = None) -> list[ScoredPoint]:
+    """
+    Reciprocal rank fusion: a point scores ``sum(1 / (k + rank))`` over the lists
+    it appears in. Scores are rescaled so the best fused point gets 1.0, which
+    keeps them comparable with the cosine similarities ``mmr_select`` trades
+    against.
+    """
+    k = k or settings.rag_rrf_k
+    fused: dict[str, float] = {}
+    first_seen: dict[str, ScoredPoint] = {}
+    for points in result_lists:
+        for rank, point in enumerate(points, start=1):
+            point_id = str(point.id)
+            fused[point_id] = fused.get(point_id, 0.0) + 1.0 / (k + rank)
+            first_seen.setdefault(point_id, point)
+    if not fused:
+        return []
+    best = max(fused.values())
+    ranked = sorted(fused, key=fused.__getitem__, reverse=True)
+    return [first_seen[point_id].model_copy(update={"score": fused[point_id] / best}) for point_id in ranked]
+
+
+def mmr_select(points: Sequence[ScoredPoint],
+               k: int | None = None,
+               lambda_mult: float | None = None,
+               duplicate_threshold: float | None = None) -> list[ScoredPoint]:
+    """
+    Maximal marginal relevance over retrieved points (searched ``with_vectors``).
+    Each step picks the candidate with the best ``lambda * score - (1 - lambda) *
+    similarity to the already picked ones``. Candidates at least
+    ``duplicate_threshold`` similar to a picked point are dropped outright. The
+    survivors come back ordered by their retrieval score.
+    """
+    k = k or settings.rag_context_chunks
+    lambda_mult = settings.rag_mmr_lambda if lambda_mult is None else lambda_mult
+    duplicate_threshold = settings.rag_duplicate_threshold if duplicate_threshold is None else duplicate_threshold
+    points = [point for point in points if point.vector is not None]
+    if not points:
+        return []
+
+    vectors = np.asarray([point.vector for point in points], np.float32)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    similarity = vectors @ vectors.T
+    relevance = np.asarray([point.score for point in points], np.float32)
+
+    selected: list[int] = []
+    # Highest similarity of every candidate to anything selected so far
+    redundancy = np.full(len(points), -np.inf, np.float32)
+    available = np.ones(len(points), bool)
+    while len(selected) < k and available.any():
+        gain = lambda_mult * relevance - (1 - lambda_mult) * np.maximum(redundancy, 0.0)
+        best = int(np.argmax(np.where(available, gain, -np.inf)))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, similarity[best])
+        available &= redundancy < duplicate_threshold
+
+    dropped = len(points) - len(selected)
+    if dropped:
+        logger.debug(f"Context compaction kept {len(selected)} of {len(points)} retrieved chunks")
+    return sorted((points[i] for i in selected), key=lambda point: point.score, reverse=True)
+
+
+def join_context(points: Sequence[ScoredPoint]) -> str:
+    return "\n".join(point.payload['original_text'] for point in points)
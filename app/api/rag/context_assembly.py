@@ -0,0 +1,120 @@
+# app/api/rag/context_assembly.py
+
+import asyncio, time
+from typing import Awaitable, NamedTuple
+
+import aiohttp
+from loguru import logger
+
+from app.api.common.web_scraping import create_http_session, extract_url, fetch, in_flight_download
+from app.api.core.config import settings
+from app.api.rag.context import join_context, mmr_select, query_variants, rrf_fuse
+from app.api.rag.query_embedding import query_embedding_service
+from app.api.rag.rag_services import vector_service
+from app.api.rag.schemas import SourceTiming
+
+
+# Sessions opened for a single assembly, closed once their downloads have finished
+_closing: set[asyncio.Task] = set()
+
+
+async def _close_after(session: aiohttp.ClientSession, downloads: list[asyncio.Future]) -> None:
+    await asyncio.gather(*downloads, return_exceptions=True)
+    await session.close()
+
+
+class AssembledContext(NamedTuple):
+    urls_content: str
+    rag_content: str
+    timings: list[SourceTiming]
+
+
+def elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+async def retrieve(prompt: str, timings: list[SourceTiming] | None = None) -> str:
+    """
+    Several phrasings of the prompt embedded in one batch and searched in one
+    call per collection; fused by rank, then cut down to a few diverse chunks.
+    """
+    timings = [] if timings is None else timings
+    start = time.perf_counter()
+    variants = query_variants(prompt)
+    vectors = await query_embedding_service.embed_many(variants)
+    timings.append(SourceTiming(source="embedding", status="ok", elapsed_ms=elapsed_ms(start)))
+
+    start = time.perf_counter()
+    results = await vector_service.search_collections(
+        settings.rag_collections,
+        vectors,
+        settings.rag_candidates,
+        settings.rag_score_threshold,
+        with_vectors=True,
+    )
+    candidates = rrf_fuse(points for lists in results.values() for points in lists)[:settings.rag_candidates]
+    logger.debug(f"Retrieved {len(candidates)} candidates for {len(variants)} query variants")
+    content = join_context(mmr_select(candidates))
+    timings.append(SourceTiming(source="vector_search", status="ok", elapsed_ms=elapsed_ms(start), chars=len(content)))
+    return content
+
+
+async def assemble_context(prompt: str,
+                           session: aiohttp.ClientSession | None = None,
+                           deadline: float | None = None) -> AssembledContext:
+    """
+    Fetch every URL of ``prompt`` and retrieve knowledge-base chunks concurrently.
+    Whatever has not finished ``deadline`` seconds in is cancelled and left out;
+    ``timings`` records each source, including the dropped and failed ones.
+    """
+    deadline = settings.context_deadline if deadline is None else deadline
+    started = time.perf_counter()
+    urls = extract_url(prompt)
+    rag_timings: list[SourceTiming] = []
+    # Without the app's pooled session, one configured the same way serves this whole call
+    own_session = create_http_session() if session is None and urls else None
+
+    jobs: dict[str, Awaitable[str]] = {f"url:{url}": fetch(session or own_session, url) for url in urls}
+    jobs["rag"] = retrieve(prompt, rag_timings)
+    tasks = {source: asyncio.ensure_future(job) for source, job in jobs.items()}
+    finished: dict[str, float] = {}
+    for source, task in tasks.items():
+        task.add_done_callback(lambda _, source=source: finished.setdefault(source, elapsed_ms(started)))
+    done, pending = await asyncio.wait(tasks.values(), timeout=deadline)
+    for task in pending:
+        task.cancel()
+    # Let cancellation run (shared downloads are shielded and carry on into the URL cache)
+    await asyncio.gather(*pending, return_exceptions=True)
+    if own_session is not None:
+        # Shielded downloads cut off by the deadline keep running on it into the URL cache
+        downloads = [download for url in urls if (download := in_flight_download(url)) is not None]
+        closing = asyncio.create_task(_close_after(own_session, downloads))
+        _closing.add(closing)
+        closing.add_done_callback(_closing.discard)
+
+    timings: list[SourceTiming] = []
+    contents: dict[str, str] = {}
+    for source, task in tasks.items():
+        if task in pending:
+            status = "timeout"
+        elif task.exception() is not None:
+            status = "error"
+            logger.warning(f"Context source {source} failed: {task.exception()!r}")
+        else:
+            status = "ok"
+            contents[source] = task.result()
+        if source == "rag":
+            timings.extend(rag_timings)
+            # Whichever retrieval step was still running when the deadline hit
+            if status != "ok":
+                step = "vector_search" if rag_timings else "embedding"
+                timings.append(SourceTiming(source=step, status=status, elapsed_ms=finished[source]))
+        else:
+            timings.append(SourceTiming(source=source, status=status, elapsed_ms=finished[source],
+                                        chars=len(contents.get(source, ""))))
+
+    dropped = [timing.source for timing in timings if timing.status != "ok"]
+    if dropped:
+        logger.warning(f"Context assembly left out {dropped} after {elapsed_ms(started)}ms (deadline {deadline}s)")
+    urls_content = " ".join(contents[f"url:{url}"] for url in urls if f"url:{url}" in contents)
+    return AssembledContext(urls_content, contents.get("rag", ""), timings)
@@ -1,16 +1,21 @@
 # app/api/rag/data_transformation.py
 
 import re, aiofiles
+from bisect import bisect_left, bisect_right
 
 from transformers import AutoModel
 from transformers import AutoTokenizer
-from typing import Any, AsyncGenerator
+from typing import Any, AsyncGenerator, Iterator, NamedTuple, Sequence
+
+from app.api.core.config import settings
 
 #DEFAULT_CHUNK_SIZE = 1024 * 1024 * 50 # 50 megabytes
 DEFAULT_CHUNK_SIZE = 1024 * 4  # 4 KB
 
-embedder = AutoModel.from_pretrained('jinaai/jina-embeddings-v2-base-en', trust_remote_code=True)
-tokenizer = AutoTokenizer.from_pretrained('jinaai/jina-embeddings-v2-base-en', trust_remote_code=True)
+EMBEDDING_MODEL = 'jinaai/jina-embeddings-v2-base-en'
+
+embedder = AutoModel.from_pretrained(EMBEDDING_MODEL, trust_remote_code=True)
+tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_MODEL, trust_remote_code=True)
 async def load(filepath: str) -> AsyncGenerator[str, Any]:
     async with aiofiles.open(filepath, "r", encoding="utf-8") as f:
         while chunk := await f.read(DEFAULT_CHUNK_SIZE):
@@ -24,13 +29,159 @@ def clean_text(content: str) -> str:
     t = t.replace(". .", ".")
     return t.replace("\n", " ").strip()
 
+def clean_block(content: str) -> str:
+    """``clean_text`` for one block of a stream: keeps a single edge space so words on block edges stay apart."""
+    cleaned = clean_text(content)
+    if cleaned and content[:1].isspace():
+        cleaned = " " + cleaned
+    if cleaned and content[-1:].isspace():
+        cleaned += " "
+    return cleaned
+
     
 def embed(text: str) -> list[float]:
     #if len(text) > 2000:  # or use token count
     #    raise ValueError("Text too long for embedding model")
     return embedder.encode(text).tolist()
 
-def chunk_text(text: str, max_tokens: int = 512) -> list[str]:
-    tokens = tokenizer.encode(text, truncation=False)
-    chunks = [tokens[i:i+max_tokens] for i in range(0, len(tokens), max_tokens)]
-    return [tokenizer.decode(chunk) for chunk in chunks]
+def embed_many(texts: Sequence[str], batch_size: int | None = None) -> Iterator[list[tuple[int, list[float]]]]:
+    """
+    Embed ``texts`` in batches sorted by length, so each forward pass pads as little
+    as possible. Yields one batch at a time as (index into ``texts``, vector) pairs.
+    """
+    batch_size = batch_size or settings.embedding_batch_size
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+    for start in range(0, len(order), batch_size):
+        indices = order[start:start + batch_size]
+        vectors = embedder.encode([texts[i] for i in indices], batch_size=len(indices))
+        yield list(zip(indices, vectors.tolist()))
+
+SENTENCE_ENDINGS = ".!?"
+
+class TextChunk(NamedTuple):
+    text: str
+    start: int  # character offsets into everything fed to the chunker
+    end: int
+
+
+class TokenChunker:
+    """
+    Streaming sliding-window chunker. Text is fed in arbitrary blocks and the
+    unfinished remainder is carried into the next one, so words are never cut at
+    block edges. Windows hold up to ``max_tokens`` tokens, share ``overlap`` tokens
+    with their neighbour, end on a sentence boundary when one falls in the last
+    ``sentence_search`` fraction of the window, and are sliced out of the original
+    text through the fast tokenizer's offset mapping instead of being decoded.
+    The last window is stretched backwards to full size instead of leaving a tiny
+    trailing chunk. Text without whitespace (CJK, base64, long URLs) is cut at
+    ``max_tokens`` once more than ``hard_cut`` windows of it are buffered.
+    Chunks carry their character span in the fed text, so callers can map them
+    back to pages.
+    """
+
+    hard_cut = 2  # windows of unbroken text buffered before cutting without a word boundary
+
+    def __init__(self, max_tokens: int = 512, overlap: int = 0, sentence_search: float = 0.25) -> None:
+        if not 0 <= overlap < max_tokens:
+            raise ValueError("overlap must be smaller than max_tokens")
+        self.max_tokens = max_tokens
+        self.overlap = overlap
+        self.sentence_search = max(1, int(max_tokens * sentence_search))
+        self._reset()
+
+    def _reset(self) -> None:
+        # Character positions in the buffer: where the next window starts, how far
+        # text was already emitted, and where the last window started (kept as
+        # history so the final window can be stretched backwards)
+        self.buffer = ""
+        self.offset = 0  # characters already trimmed off the front of the buffer
+        self.next_start = 0
+        self.covered_until = 0
+        self.last_start = 0
+
+    def feed(self, text: str) -> list[TextChunk]:
+        self.buffer += text
+        return self._drain(final=False)
+
+    def flush(self) -> list[TextChunk]:
+        chunks = self._drain(final=True)
+        self._reset()
+        return chunks
+
+    def _is_word_boundary(self, offsets: list[tuple[int, int]], j: int) -> bool:
+        """Whether whitespace follows token ``j``, so a window may end there without splitting a word."""
+        return j + 1 >= len(offsets) or offsets[j][1] != offsets[j + 1][0]
+
+    def _window_end(self, offsets: list[tuple[int, int]], start: int, end: int) -> int:
+        lowest = max(start + 1, end - self.sentence_search)
+        # Prefer the last sentence end in the tail of the window, then the last word end
+        for j in range(end - 1, lowest - 1, -1):
+            if self.buffer[offsets[j][1] - 1] in SENTENCE_ENDINGS and self._is_word_boundary(offsets, j):
+                return j + 1
+        for j in range(end - 1, start, -1):
+            if self._is_word_boundary(offsets, j):
+                return j + 1
+        return end
+
+    def _word_start(self, offsets: list[tuple[int, int]], candidate: int, end: int) -> int:
+        while 0 < candidate < end and not self._is_word_boundary(offsets, candidate - 1):
+            candidate += 1
+        return candidate
+
+    def _drain(self, final: bool) -> list[TextChunk]:
+        offsets = [
+            (start, end) for start, end in tokenizer(
+                self.buffer, add_special_tokens=False, return_offsets_mapping=True, truncation=False
+            )["offset_mapping"] if end > start
+        ]
+        if final:
+            stable = len(offsets)
+        else:
+            # Tokens running into the last whitespace may still grow with the next block
+            boundary = self.buffer.rfind(" ")
+            stable = bisect_right([end for _, end in offsets], boundary)
+            if len(offsets) - stable > self.hard_cut * self.max_tokens:
+                # No whitespace in sight: only the last window's tokens may still change
+                stable = len(offsets) - self.max_tokens
+
+        chunks = []
+        start = bisect_left([s for s, _ in offsets], self.next_start)
+        while True:
+            remaining = stable - start
+            if remaining <= 0 or (not final and remaining <= self.max_tokens):
+                break
+            end = start + self.max_tokens
+            if end >= stable:
+                if offsets[stable - 1][1] <= self.covered_until:
+                    break  # tail already inside the previous window's overlap
+                start = max(0, stable - self.max_tokens)
+                if (word_start := self._word_start(offsets, start, stable)) < stable:
+                    start = word_start
+                end = stable
+            else:
+                end = self._window_end(offsets, start, end)
+            span = (offsets[start][0], offsets[end - 1][1])
+            chunks.append(TextChunk(self.buffer[span[0]:span[1]].strip(), self.offset + span[0], self.offset + span[1]))
+            self.last_start = offsets[start][0]
+            self.covered_until = offsets[end - 1][1]
+            if end >= stable:
+                break
+            # Step back ``overlap`` tokens, then forward to the start of a word unless
+            # the window was cut inside one
+            start = max(end - self.overlap, start + 1)
+            if self._is_word_boundary(offsets, end - 1):
+                start = self._word_start(offsets, start, end)
+            self.next_start = offsets[start][0]
+
+        if not final and self.last_start > 0:
+            cut = self.last_start
+            self.buffer = self.buffer[cut:]
+            self.offset += cut
+            self.next_start -= cut
+            self.covered_until -= cut
+            self.last_start = 0
+        return [chunk for chunk in chunks if chunk.text]
+
+def chunk_text(text: str, max_tokens: int = 512, overlap: int = 0) -> list[str]:
+    chunker = TokenChunker(max_tokens, overlap)
+    return [chunk.text for chunk in chunker.feed(text) + chunker.flush()]
@@ -0,0 +1,217 @@
+# app/api/rag/ingestion_pipeline.py
+import asyncio, time
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable
+
+from loguru import logger
+
+from app.api.core.config import settings
+from app.api.rag.data_transformation import clean_block, embed_many, TextChunk, TokenChunker
+from app.api.repository.vector_repository import ChunkRecord, VectorRepository, content_hash
+
+# Chunks handed to one embed call, in batches; a wider window sorts by length better
+SORT_WINDOW_BATCHES = 4
+
+_DONE = object()
+
+# Keeps the last words of a page apart from the first words of the next one
+PAGE_SEPARATOR = "\n\n"
+
+# Stage items: (page number or None, text) until chunking, then (chunk index, text, pages)
+Page = tuple[int | None, str]
+Chunk = tuple[int, str, tuple[int, ...]]
+
+# Embedding is CPU-bound and releases the GIL inside torch, so threads overlap it with I/O
+embed_executor = ThreadPoolExecutor(
+    max_workers=settings.ingestion_embed_workers, thread_name_prefix="embed"
+)
+
+
+@dataclass
+class StageStats:
+    name: str
+    workers: int = 1
+    items_in: int = 0
+    items_out: int = 0
+    busy_seconds: float = 0.0
+    max_queue_depth: int = 0
+
+    def summary(self, elapsed: float) -> str:
+        rate = self.items_in / elapsed if elapsed else 0.0
+        return (
+            f"{self.name:<8} workers={self.workers} in={self.items_in} out={self.items_out} "
+            f"busy={self.busy_seconds:.2f}s rate={rate:.1f}/s max_queue={self.max_queue_depth}"
+        )
+
+
+class IngestionPipeline:
+    """
+    Staged ingestion: extract -> clean -> chunk -> embed -> upsert, connected by
+    bounded queues so a fast stage blocks instead of buffering the whole document.
+    Order-sensitive stages (clean, chunk) run one worker; embed and upsert fan out.
+
+    Ingestion is incremental: chunks whose content hash is already stored for the
+    source are not embedded again, and stored chunks the new text no longer
+    produces are deleted once the run completes.
+
+    Input is ``(page number, text)`` pairs, so chunks record the pages they span;
+    plain text streams pass ``None`` as the page.
+    """
+
+    def __init__(self, repository: VectorRepository, collection_name: str, source: str,
+                 chunk_size: int = 512) -> None:
+        self.repository = repository
+        self.collection_name = collection_name
+        self.source = source
+        self.chunker = TokenChunker(chunk_size, min(settings.chunk_overlap_tokens, chunk_size - 1))
+        self.queue_size = settings.ingestion_queue_size
+        self.stats: list[StageStats] = []
+        self._next_index = 0
+        self._stored: dict[str, str] = {}
+        self._seen: set[str] = set()
+        self.skipped = 0
+        # Character offset in the chunker input where each page starts, and its number
+        self._page_starts: list[int] = []
+        self._page_numbers: list[int | None] = []
+        self._fed = 0
+
+    async def run(self, pages: AsyncIterator[Page]) -> list[StageStats]:
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in range(5)]
+        raw, cleaned, chunks, windows, records = queues
+        start = time.perf_counter()
+        self._stored = await self.repository.source_hashes(self.collection_name, self.source)
+        async with asyncio.TaskGroup() as group:
+            group.create_task(self._source("extract", pages, raw))
+            group.create_task(self._stage("clean", raw, cleaned, self._clean))
+            group.create_task(self._stage("chunk", cleaned, chunks, self._chunk, flush=self._flush_chunks))
+            group.create_task(self._batch(
+                "batch", chunks, windows, settings.embedding_batch_size * SORT_WINDOW_BATCHES
+            ))
+            group.create_task(self._stage(
+                "embed", windows, records, self._embed, settings.ingestion_embed_workers
+            ))
+            group.create_task(self._stage(
+                "upsert", records, None, self._upsert, settings.ingestion_upsert_workers
+            ))
+        # Only reached when every stage succeeded, so a failed run never deletes live chunks
+        stale = [point for text_hash, point in self._stored.items() if text_hash not in self._seen]
+        await self.repository.delete_points(self.collection_name, stale)
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"Ingested {self.source} into {self.collection_name} in {elapsed:.2f}s: "
+            f"{self._next_index} chunks, {self.skipped} unchanged, {len(stale)} deleted"
+        )
+        for stats in self.stats:
+            logger.info(stats.summary(elapsed))
+        return self.stats
+
+    # ----- stage bodies -----
+    async def _clean(self, page: Page) -> list[Page]:
+        number, text = page
+        return [(number, clean_block(text + PAGE_SEPARATOR if number is not None else text))]
+
+    async def _chunk(self, page: Page) -> list[Chunk]:
+        number, text = page
+        if number is not None and (not self._page_numbers or self._page_numbers[-1] != number):
+            self._page_starts.append(self._fed)
+            self._page_numbers.append(number)
+        self._fed += len(text)
+        return self._number(self.chunker.feed(text))
+
+    async def _flush_chunks(self) -> list[Chunk]:
+        return self._number(self.chunker.flush())
+
+    def _pages(self, chunk: TextChunk) -> tuple[int, ...]:
+        if not self._page_starts:
+            return ()
+        first = max(0, bisect_right(self._page_starts, chunk.start) - 1)
+        last = max(0, bisect_right(self._page_starts, chunk.end - 1) - 1)
+        return tuple(self._page_numbers[first:last + 1])
+
+    def _number(self, texts: list[TextChunk]) -> list[Chunk]:
+        chunks = []
+        for chunk in texts:
+            index, self._next_index = self._next_index, self._next_index + 1
+            text, text_hash = chunk.text, content_hash(chunk.text)
+            # Stored or repeated chunks already have their point; only the diff is embedded
+            if text_hash in self._stored or text_hash in self._seen:
+                self.skipped += 1
+            else:
+                chunks.append((index, text, self._pages(chunk)))
+            self._seen.add(text_hash)
+        return chunks
+
+    async def _embed(self, window: list[Chunk]) -> list[list[ChunkRecord]]:
+        def run() -> list[ChunkRecord]:
+            texts = [text for _, text, _ in window]
+            return [
+                ChunkRecord(window[i][0], texts[i], vector, window[i][2])
+                for batch in embed_many(texts)
+                for i, vector in batch
+            ]
+        loop = asyncio.get_running_loop()
+        return [await loop.run_in_executor(embed_executor, run)]
+
+    async def _upsert(self, records: list[ChunkRecord]) -> list:
+        await self.repository.create_many(self.collection_name, records, self.source)
+        return []
+
+    # ----- plumbing -----
+    def _stats(self, name: str, workers: int = 1) -> StageStats:
+        stats = StageStats(name, workers)
+        self.stats.append(stats)
+        return stats
+
+    async def _source(self, name: str, items: AsyncIterator[Any], outq: asyncio.Queue) -> None:
+        stats = self._stats(name)
+        started = time.perf_counter()
+        async for item in items:
+            stats.items_in += 1
+            stats.items_out += 1
+            await outq.put(item)
+        stats.busy_seconds = time.perf_counter() - started
+        await outq.put(_DONE)
+
+    async def _stage(self, name: str, inq: asyncio.Queue, outq: asyncio.Queue | None,
+                     fn: Callable[[Any], Awaitable[list]], workers: int = 1,
+                     flush: Callable[[], Awaitable[list]] | None = None) -> None:
+        stats = self._stats(name, workers)
+
+        async def worker() -> None:
+            while (item := await inq.get()) is not _DONE:
+                stats.items_in += 1
+                stats.max_queue_depth = max(stats.max_queue_depth, inq.qsize() + 1)
+                started = time.perf_counter()
+                results = await fn(item)
+                stats.busy_seconds += time.perf_counter() - started
+                for result in results:
+                    stats.items_out += 1
+                    await outq.put(result)
+            # Pass the end marker on to sibling workers
+            await inq.put(_DONE)
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        # Stateful stages (the chunker) hold a remainder until their input ends
+        for result in (await flush()) if flush else []:
+            stats.items_out += 1
+            await outq.put(result)
+        if outq is not None:
+            await outq.put(_DONE)
+
+    async def _batch(self, name: str, inq: asyncio.Queue, outq: asyncio.Queue, size: int) -> None:
+        stats = self._stats(name)
+        batch: list = []
+        while (item := await inq.get()) is not _DONE:
+            stats.items_in += 1
+            stats.max_queue_depth = max(stats.max_queue_depth, inq.qsize() + 1)
+            batch.append(item)
+            if len(batch) >= size:
+                stats.items_out += 1
+                await outq.put(batch)
+                batch = []
+        if batch:
+            stats.items_out += 1
+            await outq.put(batch)
+        await outq.put(_DONE)
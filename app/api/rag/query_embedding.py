@@ -0,0 +1,179 @@
+# app/api/rag/query_embedding.py
+
+import asyncio, glob, os, re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Sequence
+
+from loguru import logger
+
+from app.api.common.cache import LRUCache, MemmapVectorCache
+from app.api.core.config import settings
+from app.api.rag.data_transformation import embed_many
+
+_Pending = tuple[str, asyncio.Future]
+
+DISK_CACHE_NAME = "query-embeddings"
+
+
+class QueryEmbeddingService:
+    """
+    Embeds query strings off the event loop. Concurrent callers are coalesced into
+    batches of up to ``max_batch`` queries: a batch closes when it is full or
+    ``max_wait_ms`` after its first query, and while every worker is busy new
+    queries keep accumulating, so batches grow with load instead of queueing
+    single forward passes.
+
+    Vectors are cached per whitespace-normalized query: an in-memory LRU, backed
+    by a memory-mapped file when ``cache_dir`` is set, and identical queries in
+    flight share one embedding.
+    """
+
+    def __init__(self, workers: int, max_batch: int, max_wait_ms: float,
+                 cache_size: int = 0, cache_dir: str | None = None, disk_capacity: int = 100_000) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="query-embed")
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.workers = workers
+        self._queue: asyncio.Queue[_Pending] | None = None
+        self._collector: asyncio.Task | None = None
+        self.cache: LRUCache[str, list[float]] = LRUCache(cache_size)
+        self.cache_dir = cache_dir
+        self.disk_capacity = disk_capacity
+        self.disk_cache: MemmapVectorCache | None = None
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def cache_key(text: str) -> str:
+        return re.sub(r"\s+", " ", text).strip()
+
+    async def embed(self, text: str) -> list[float]:
+        return (await self.embed_many([text]))[0]
+
+    async def embed_many(self, texts: Sequence[str]) -> list[list[float]]:
+        keys = [self.cache_key(text) for text in texts]
+        # Shielded: one caller giving up must not cancel an embedding other callers share
+        futures = [asyncio.shield(self._lookup(key)) for key in keys]
+        return list(await asyncio.gather(*futures))
+
+    def _lookup(self, key: str) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        if (vector := self.cache.get(key)) is None and self._disk_cache() is not None:
+            if (cached := self.disk_cache.get(key)) is not None:
+                vector = cached.tolist()
+                self.cache.put(key, vector)
+        if vector is not None:
+            future = loop.create_future()
+            future.set_result(vector)
+            return future
+        if (future := self._inflight.get(key)) is not None:
+            return future
+        self._start()
+        future = loop.create_future()
+        self._inflight[key] = future
+        future.add_done_callback(lambda done: self._store(key, done))
+        self._queue.put_nowait((key, future))
+        return future
+
+    def _store(self, key: str, future: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        vector = future.result()
+        self.cache.put(key, vector)
+        if (disk_cache := self._disk_cache(len(vector))) is not None:
+            disk_cache.put(key, vector)
+
+    def _disk_cache(self, dim: int | None = None) -> MemmapVectorCache | None:
+        """Open the on-disk tier; before the first embedding, only if a previous run left one."""
+        if not self.cache_dir or (self.disk_cache is not None and dim in (None, self.disk_cache.dim)):
+            return self.disk_cache
+        if dim is None:
+            found = glob.glob(os.path.join(self.cache_dir, f"{DISK_CACHE_NAME}-*d-{self.disk_capacity}.f32"))
+            if not found:
+                return None
+            dim = int(os.path.basename(found[0]).split("-")[-2].rstrip("d"))
+        self.disk_cache = MemmapVectorCache(self.cache_dir, DISK_CACHE_NAME, dim, self.disk_capacity)
+        return self.disk_cache
+
+    async def shutdown(self) -> None:
+        if self._collector is not None:
+            self._collector.cancel()
+            await asyncio.gather(self._collector, return_exceptions=True)
+            self._collector = None
+        if self.disk_cache is not None:
+            self.disk_cache.flush()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _start(self) -> None:
+        if self._collector is None or self._collector.done():
+            self._queue = asyncio.Queue()
+            self._collector = asyncio.create_task(self._collect())
+
+    async def _collect(self) -> None:
+        slots = asyncio.Semaphore(self.workers)
+        running: set[asyncio.Task] = set()
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                # Wait for a free worker first, so queries pile up while all are busy
+                await slots.acquire()
+                batch = [await self._queue.get()]
+                deadline = loop.time() + self.max_wait
+                while len(batch) < self.max_batch:
+                    if not self._queue.empty():
+                        batch.append(self._queue.get_nowait())
+                        continue
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except TimeoutError:
+                        break
+                task = asyncio.create_task(self._run(batch, slots))
+                running.add(task)
+                task.add_done_callback(running.discard)
+        finally:
+            for task in running:
+                task.cancel()
+
+    async def _run(self, batch: list[_Pending], slots: asyncio.Semaphore) -> None:
+        try:
+            # Callers that gave up (client disconnect) are not worth a forward pass
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                return
+            texts = [text for text, _ in batch]
+            vectors = await asyncio.get_running_loop().run_in_executor(self.executor, self._encode, texts)
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"Query embedding batch of {len(batch)} failed: {e!r}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            slots.release()
+
+    @staticmethod
+    def _encode(texts: list[str]) -> list[list[float]]:
+        vectors: list[list[float]] = [[] for _ in texts]
+        for batch in embed_many(texts, len(texts)):
+            for i, vector in batch:
+                vectors[i] = vector
+        return vectors
+
+
+query_embedding_service = QueryEmbeddingService(
+    settings.query_embed_workers,
+    settings.query_embed_batch_max,
+    settings.query_embed_wait_ms,
+    settings.query_cache_size,
+    settings.query_cache_dir,
+    settings.query_cache_disk_capacity,
+)
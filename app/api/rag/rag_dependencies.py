@@ -1,20 +1,16 @@
 # app/api/rag/rag_deppendencies.py
-import asyncio
-from fastapi import Body
-from loguru import logger
+from fastapi import Body, Request
 
 
 from app.api.core.huggingface.schemas import TextModelRequest
-from app.api.rag.data_transformation import embed
-from app.api.rag.rag_services import vector_service
+from app.api.rag.context_assembly import AssembledContext, assemble_context, retrieve
 
 
 async def get_rag_content(body: TextModelRequest = Body(...)) -> str:
-    rag_content = await vector_service.search(
-            "knowledgebase",
-            embed(body.prompt),
-            3,
-            0.7
-        )
-    rag_content_str = "\n".join([c.payload['original_text'] for c in rag_content])
+    rag_content_str = await retrieve(body.prompt)
     return rag_content_str
+
+
+async def get_context(request: Request, body: TextModelRequest = Body(...)) -> AssembledContext:
+    # URL fetching and retrieval side by side under settings.context_deadline
+    return await assemble_context(body.prompt, getattr(request.app.state, "http_session", None))
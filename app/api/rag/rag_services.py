@@ -1,8 +1,18 @@
 # app/api/rag/rag_services.py
 import os
+from typing import AsyncIterator
 from loguru import logger
+from app.api.common.pdf_extractor import extract_pages
+from app.api.repository.vector_interface import CollectionOptions
 from app.api.repository.vector_repository import VectorRepository
-from app.api.rag.data_transformation import clean_text,embed,load, chunk_text
+from app.api.rag.data_transformation import load
+from app.api.rag.ingestion_pipeline import IngestionPipeline, Page
+
+
+async def unpaged(blocks: AsyncIterator[str]) -> AsyncIterator[Page]:
+    async for block in blocks:
+        yield None, block
+
 
 class VectorService(VectorRepository):
     def __init__(self):
@@ -13,20 +23,24 @@ class VectorService(VectorRepository):
         filepath: str,
         chunk_size:int = 512,
         collection_name: str="knowledgebase",
-        collection_size: int = 768
+        collection_size: int = 768,
+        options: CollectionOptions = CollectionOptions(),
+        recreate: bool = False,
     )-> None:
         await self.create_collection(
             collection_name,
-            collection_size
+            collection_size,
+            recreate,
+            options,
         )
         logger.debug(f'Inserting {filepath} content to database')
-        async for chunk in load(filepath):
-            logger.debug(f'Inserting {chunk[0:20]}.. into database')
-            
-            for sub_chunk in chunk_text(clean_text(chunk)):
-                embedding_vector = embed(sub_chunk)
-                filename = os.path.basename(filepath)
-                await self.create(collection_name, embedding_vector, sub_chunk, filename)
+        pipeline = IngestionPipeline(self, collection_name, os.path.basename(filepath), chunk_size)
+        # PDFs stream page texts from the extraction pool straight into chunking
+        pages = extract_pages(filepath) if filepath.lower().endswith('.pdf') else unpaged(load(filepath))
+        await pipeline.run(pages)
+
+    async def remove_content_from_db(self, filename: str, collection_name: str = "knowledgebase") -> None:
+        await self.delete_source(collection_name, os.path.basename(filename))
 
 
 vector_service = VectorService()
\ No newline at end of file
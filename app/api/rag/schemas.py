@@ -0,0 +1,19 @@
+# app/api/rag/schemas.py
+from typing import Annotated, Literal
+from pydantic import BaseModel, Field
+
+QueryText = Annotated[str, Field(min_length=1, max_length=10000)]
+
+class EmbeddingRequest(BaseModel):
+    texts: Annotated[list[QueryText], Field(min_length=1, max_length=64)]
+
+class EmbeddingResponse(BaseModel):
+    model: str
+    dimensions: int
+    embeddings: list[list[float]]
+
+class SourceTiming(BaseModel):
+    source: str                     # "url:<address>", "embedding" or "vector_search"
+    status: Literal["ok", "timeout", "error", "skipped"]
+    elapsed_ms: float
+    chars: int = 0                  # context contributed
@@ -0,0 +1,50 @@
+# app/api/repository/job_repository.py
+from datetime import timedelta
+from typing import Any
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.db.entities import Job
+
+
+class JobRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def get(self, job_id: str) -> Job | None:
+        result = await self.session.execute(select(Job).where(Job.id == job_id))
+        return result.scalars().first()
+
+    async def get_by_idempotency_key(self, kind: str, key: str) -> Job | None:
+        result = await self.session.execute(select(Job).where(Job.kind == kind, Job.idempotency_key == key))
+        return result.scalars().first()
+
+    async def touch(self, job_ids: list[str]) -> None:
+        await self.session.execute(update(Job).where(Job.id.in_(job_ids)).values(updated_at=func.now()))
+        await self.session.commit()
+
+    async def fail_stale(self, statuses: list[str], lease_seconds: float, error: str) -> int:
+        # The cutoff comes from the database clock, like updated_at itself
+        cutoff = (await self.session.execute(select(func.now()))).scalar_one() - timedelta(seconds=lease_seconds)
+        result = await self.session.execute(
+            update(Job).where(Job.status.in_(statuses), Job.updated_at < cutoff).values(status="failed", error=error)
+        )
+        await self.session.commit()
+        return result.rowcount
+
+    async def create(self, job: Job) -> Job:
+        self.session.add(job)
+        await self.session.commit()
+        await self.session.refresh(job)
+        return job
+
+    async def update(self, job_id: str, **fields: Any) -> None:
+        await self.session.execute(update(Job).where(Job.id == job_id).values(**fields))
+        await self.session.commit()
+
+    async def advance_progress(self, job_id: str, progress: float) -> None:
+        # Progress only moves forward, so late reports from the worker thread cannot rewind it
+        await self.session.execute(
+            update(Job).where(Job.id == job_id, Job.progress < progress).values(progress=progress)
+        )
+        await self.session.commit()
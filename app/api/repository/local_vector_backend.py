@@ -0,0 +1,434 @@
+# app/api/repository/local_vector_backend.py
+
+import asyncio, json, math, os, shutil, threading
+from dataclasses import asdict
+from typing import Any, Callable, Sequence, TypeVar
+
+import numpy as np
+from loguru import logger
+from numpy.typing import NDArray
+from qdrant_client.http.models import PointStruct, ScoredPoint
+
+from app.api.repository.vector_interface import CollectionOptions, IVectorBackend, SearchOptions
+
+T = TypeVar("T")
+
+INITIAL_CAPACITY = 1024
+# Rows scored per matrix product, to bound temporaries on big collections
+SCORE_BLOCK = 65536
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 50_000
+
+
+# Set bits per byte value, for Hamming distances over packed binary codes
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], np.uint8)
+
+
+def normalize(vectors: NDArray[np.float32]) -> NDArray[np.float32]:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def scalar_codes(rows: NDArray[np.float32]) -> tuple[NDArray[np.int8], NDArray[np.float32]]:
+    """int8 codes with one scale per row: row ~= codes * scale."""
+    scales = np.maximum(np.abs(rows).max(axis=1), 1e-12) / 127.0
+    return np.round(rows / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+
+def binary_codes(rows: NDArray[np.float32]) -> NDArray[np.uint8]:
+    return np.packbits(rows > 0, axis=1)
+
+
+def top(rows: NDArray[np.intp], scores: NDArray[np.float32], limit: int) -> tuple[NDArray, NDArray]:
+    if len(rows) <= limit:
+        return rows, scores
+    best = np.argpartition(-scores, limit - 1)[:limit]
+    return rows[best], scores[best]
+
+
+class IVFIndex:
+    """
+    Inverted-file index over unit vectors: spherical k-means centroids plus the
+    list each row belongs to. A query scores only rows in its ``nprobe`` nearest
+    lists. Assignments live in a memmap next to the vectors, so new rows are
+    appended to their nearest list without retraining.
+    """
+
+    def __init__(self, centroids: NDArray[np.float32], assignments: np.memmap, trained_on: int) -> None:
+        self.centroids = centroids
+        self.assignments = assignments
+        self.trained_on = trained_on
+
+    @staticmethod
+    def train(vectors: NDArray[np.float32], nlist: int, seed: int = 0) -> NDArray[np.float32]:
+        rng = np.random.default_rng(seed)
+        sample = vectors[rng.choice(len(vectors), min(len(vectors), KMEANS_SAMPLE), replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=nlist)
+            # Empty lists keep their old centroid instead of collapsing to zero
+            centroids = np.where(counts[:, None] > 0, normalize(sums), centroids)
+        return centroids.astype(np.float32)
+
+    def nearest(self, vectors: NDArray[np.float32]) -> NDArray[np.int32]:
+        labels = np.empty(len(vectors), np.int32)
+        for start in range(0, len(vectors), SCORE_BLOCK):
+            block = vectors[start:start + SCORE_BLOCK]
+            labels[start:start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        return labels
+
+    def candidates(self, query: NDArray[np.float32], size: int, nprobe: int) -> NDArray[np.intp]:
+        probe = np.argpartition(-(self.centroids @ query), min(nprobe, len(self.centroids)) - 1)[:nprobe]
+        return np.flatnonzero(np.isin(self.assignments[:size], probe))
+
+
+class LocalCollection:
+    """
+    One collection on disk: ``vectors.f32`` is a memory-mapped (capacity x dim)
+    matrix of unit vectors, and ``points.jsonl`` an append-only log of point
+    writes and deletes (id, row, payload) replayed on open. Deleted rows are
+    reused. The log is rewritten once it is mostly dead entries.
+
+    Quantized collections also keep int8 (``codes.i8`` + ``scales.f32``) or
+    1-bit (``codes.u1``) codes. Search scans the codes and only reads full
+    vectors to rescore the best candidates, so the originals can stay paged out.
+    """
+
+    def __init__(self, directory: str, dim: int | None = None,
+                 ivf_min_vectors: int = 50_000, nprobe: int = 32,
+                 options: CollectionOptions = CollectionOptions()) -> None:
+        self.directory = directory
+        self.ivf_min_vectors = ivf_min_vectors
+        self.nprobe = nprobe
+        self.lock = threading.Lock()
+        meta_path = os.path.join(directory, "meta.json")
+        if dim is not None:
+            os.makedirs(directory, exist_ok=True)
+            self.meta = {"dim": dim, "capacity": INITIAL_CAPACITY, "options": asdict(options)}
+            self._write_meta()
+        else:
+            with open(meta_path, encoding="utf-8") as f:
+                self.meta = json.load(f)
+        self.dim = self.meta["dim"]
+        self.options = CollectionOptions(**self.meta.get("options", {}))
+        self._open_storage()
+        self.ids: list[str | None] = []
+        self.payloads: list[dict | None] = []
+        self.slots: dict[str, int] = {}
+        self.log_entries = 0
+        self._replay()
+        self.alive = np.zeros(self.meta["capacity"], bool)
+        self.alive[list(self.slots.values())] = True
+        self.free = [slot for slot, point in enumerate(self.ids) if point is None]
+        self.log = open(self._path("points.jsonl"), "a", encoding="utf-8")
+        self.ivf = self._load_ivf()
+
+    # ----- storage -----
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _write_meta(self) -> None:
+        with open(self._path("meta.json"), "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+
+    def _open_storage(self) -> None:
+        self.vectors = self._open_rows("vectors.f32", np.float32, (self.dim,))
+        self.codes = self.scales = None
+        if self.options.quantization == "scalar":
+            self.codes = self._open_rows("codes.i8", np.int8, (self.dim,))
+            self.scales = self._open_rows("scales.f32", np.float32, ())
+        elif self.options.quantization == "binary":
+            self.codes = self._open_rows("codes.u1", np.uint8, ((self.dim + 7) // 8,))
+
+    def memory_bytes(self) -> int:
+        """Bytes a search touches on every scan: codes when quantized, else the full vectors."""
+        scanned = [self.codes, self.scales] if self.codes is not None else [self.vectors]
+        return sum(array[:len(self.ids)].nbytes for array in scanned if array is not None)
+
+    def _open_rows(self, name: str, dtype, row_shape: tuple[int, ...]) -> np.memmap:
+        path = self._path(name)
+        shape = (self.meta["capacity"], *row_shape)
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        with open(path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+    def _replay(self) -> None:
+        path = self._path("points.jsonl")
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                self.log_entries += 1
+                entry = json.loads(line)
+                if "delete" in entry:
+                    slot = self.slots.pop(entry["delete"], None)
+                    if slot is not None:
+                        self.ids[slot] = self.payloads[slot] = None
+                    continue
+                slot = entry["slot"]
+                while len(self.ids) <= slot:
+                    self.ids.append(None)
+                    self.payloads.append(None)
+                self.ids[slot], self.payloads[slot] = entry["id"], entry["payload"]
+                self.slots[entry["id"]] = slot
+
+    def _grow(self, needed: int) -> None:
+        capacity = self.meta["capacity"]
+        while capacity < needed:
+            capacity *= 2
+        if capacity == self.meta["capacity"]:
+            return
+        self.flush()
+        self.meta["capacity"] = capacity
+        self._open_storage()
+        self.alive = np.concatenate([self.alive, np.zeros(capacity - len(self.alive), bool)])
+        if self.ivf is not None:
+            self.ivf.assignments.flush()
+            self.ivf.assignments = self._open_rows("ivf.assign", np.int32, ())
+        self._write_meta()
+
+    def _compact(self) -> None:
+        live = len(self.slots)
+        if self.log_entries < 2 * live + 1024:
+            return
+        self.log.close()
+        tmp = self._path("points.jsonl.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for point, slot in self.slots.items():
+                f.write(json.dumps({"id": point, "slot": slot, "payload": self.payloads[slot]}) + "\n")
+        os.replace(tmp, self._path("points.jsonl"))
+        self.log = open(self._path("points.jsonl"), "a", encoding="utf-8")
+        self.log_entries = live
+
+    def flush(self) -> None:
+        for array in (self.vectors, self.codes, self.scales):
+            if array is not None:
+                array.flush()
+
+    def close(self) -> None:
+        self.flush()
+        if self.ivf is not None:
+            self.ivf.assignments.flush()
+        self.log.close()
+
+    # ----- IVF -----
+    def _load_ivf(self) -> IVFIndex | None:
+        path = self._path("ivf.npz")
+        if not os.path.exists(path):
+            return None
+        saved = np.load(path)
+        return IVFIndex(saved["centroids"], self._open_rows("ivf.assign", np.int32, ()), int(saved["trained_on"]))
+
+    def _maybe_train(self) -> None:
+        live = len(self.slots)
+        if live < self.ivf_min_vectors or (self.ivf is not None and live < 2 * self.ivf.trained_on):
+            return
+        rows = np.flatnonzero(self.alive)
+        nlist = max(1, min(int(4 * np.sqrt(live)), live // 39))
+        logger.debug(f"Training IVF index with {nlist} lists on {live} vectors in {self.directory}")
+        centroids = IVFIndex.train(np.asarray(self.vectors[rows]), nlist)
+        np.savez(self._path("ivf.npz"), centroids=centroids, trained_on=live)
+        self.ivf = IVFIndex(centroids, self._open_rows("ivf.assign", np.int32, ()), live)
+        self.ivf.assignments[:] = -1
+        self.ivf.assignments[rows] = self.ivf.nearest(np.asarray(self.vectors[rows]))
+
+    # ----- operations (callers hold ``lock``) -----
+    def upsert(self, points: Sequence[PointStruct]) -> None:
+        slots = []
+        for point in points:
+            point_id = str(point.id)
+            slot = self.slots.get(point_id)
+            if slot is None:
+                slot = self.free.pop() if self.free else len(self.ids)
+                if slot == len(self.ids):
+                    self.ids.append(None)
+                    self.payloads.append(None)
+            slots.append(slot)
+            self.slots[point_id] = slot
+            self.ids[slot], self.payloads[slot] = point_id, point.payload or {}
+        self._grow(len(self.ids))
+        if points:
+            rows = normalize(np.asarray([point.vector for point in points], np.float32))
+            self.vectors[slots] = rows
+            if self.options.quantization == "scalar":
+                self.codes[slots], self.scales[slots] = scalar_codes(rows)
+            elif self.options.quantization == "binary":
+                self.codes[slots] = binary_codes(rows)
+            self.alive[slots] = True
+            if self.ivf is not None:
+                self.ivf.assignments[slots] = self.ivf.nearest(rows)
+            self.flush()
+        # The log is written last: a crash before it leaves unreferenced rows, never dangling ids
+        for point, slot in zip(points, slots):
+            self.log.write(json.dumps({"id": str(point.id), "slot": slot, "payload": point.payload or {}}) + "\n")
+        self.log.flush()
+        self.log_entries += len(points)
+        self._maybe_train()
+        self._compact()
+
+    def delete(self, point_ids: Sequence[str]) -> None:
+        for point_id in map(str, point_ids):
+            slot = self.slots.pop(point_id, None)
+            if slot is None:
+                continue
+            self.ids[slot] = self.payloads[slot] = None
+            self.alive[slot] = False
+            self.free.append(slot)
+            self.log.write(json.dumps({"delete": point_id}) + "\n")
+            self.log_entries += 1
+        self.log.flush()
+        self._compact()
+
+    def where(self, key: str, value: Any) -> list[tuple[str, dict]]:
+        return [
+            (point_id, self.payloads[slot]) for point_id, slot in self.slots.items()
+            if self.payloads[slot].get(key) == value
+        ]
+
+    def _blocks(self, rows: NDArray[np.intp], score: Callable[[NDArray[np.intp]], NDArray[np.float32]]) -> NDArray[np.float32]:
+        if not len(rows):
+            return np.empty(0, np.float32)
+        return np.concatenate([score(rows[i:i + SCORE_BLOCK]) for i in range(0, len(rows), SCORE_BLOCK)])
+
+    def _exact_scores(self, rows: NDArray[np.intp], query: NDArray[np.float32]) -> NDArray[np.float32]:
+        return self._blocks(rows, lambda block: np.asarray(self.vectors[block]) @ query)
+
+    def _code_scores(self, rows: NDArray[np.intp], query: NDArray[np.float32]) -> NDArray[np.float32]:
+        if self.options.quantization == "scalar":
+            return self._blocks(
+                rows, lambda block: (self.codes[block].astype(np.float32) @ query) * self.scales[block]
+            )
+        # Sign bits: the angle between two vectors is about pi * hamming / dim
+        query_bits = binary_codes(query[None, :])[0]
+        return self._blocks(rows, lambda block: np.cos(
+            np.pi * POPCOUNT[np.bitwise_xor(self.codes[block], query_bits)].sum(axis=1) / self.dim
+        ).astype(np.float32))
+
+    def search(self, query_vector: Sequence[float], limit: int, score_threshold: float | None,
+               options: SearchOptions = SearchOptions(), with_vectors: bool = False) -> list[ScoredPoint]:
+        query = normalize(np.asarray(query_vector, np.float32))
+        size = len(self.ids)
+        if self.ivf is not None:
+            rows = self.ivf.candidates(query, size, self.nprobe)
+            rows = rows[self.alive[rows]]
+        else:
+            rows = np.flatnonzero(self.alive[:size])
+        if self.codes is None:
+            scores = self._exact_scores(rows, query)
+        else:
+            scores = self._code_scores(rows, query)
+            if options.rescore:
+                rows, scores = top(rows, scores, max(limit, math.ceil(limit * options.oversampling)))
+                rows = np.sort(rows)  # sequential reads from the memmap
+                scores = self._exact_scores(rows, query)
+        if score_threshold is not None:
+            keep = scores >= score_threshold
+            rows, scores = rows[keep], scores[keep]
+        rows, scores = top(rows, scores, limit)
+        order = np.argsort(-scores, kind="stable")
+        return [
+            ScoredPoint(
+                id=self.ids[rows[i]], version=0, score=float(scores[i]), payload=self.payloads[rows[i]],
+                vector=self.vectors[rows[i]].tolist() if with_vectors else None,
+            )
+            for i in order
+        ]
+
+
+class LocalVectorBackend(IVectorBackend):
+    """
+    Embedded vector store for single-node deployments and tests: no server and
+    no network hop. Each collection is a directory under ``path``. Search is an
+    exact vectorized cosine scan until a collection reaches ``ivf_min_vectors``,
+    then an IVF index probing ``nprobe`` lists. ``on_disk`` and the HNSW options
+    have no effect here: originals are always memory-mapped and the index is IVF.
+    """
+
+    def __init__(self, path: str, ivf_min_vectors: int = 50_000, nprobe: int = 32) -> None:
+        self.path = path
+        self.ivf_min_vectors = ivf_min_vectors
+        self.nprobe = nprobe
+        self.collections: dict[str, LocalCollection] = {}
+        os.makedirs(path, exist_ok=True)
+
+    def _collection(self, collection_name: str) -> LocalCollection:
+        collection = self.collections.get(collection_name)
+        if collection is None:
+            directory = os.path.join(self.path, collection_name)
+            if not os.path.exists(os.path.join(directory, "meta.json")):
+                raise ValueError(f"Collection {collection_name} not found")
+            collection = LocalCollection(directory, None, self.ivf_min_vectors, self.nprobe)
+            self.collections[collection_name] = collection
+        return collection
+
+    async def _run(self, collection_name: str, fn: Callable[[LocalCollection], T]) -> T:
+        collection = self._collection(collection_name)
+
+        def locked() -> T:
+            with collection.lock:
+                return fn(collection)
+        return await asyncio.get_running_loop().run_in_executor(None, locked)
+
+    async def collection_exists(self, collection_name: str) -> bool:
+        return os.path.exists(os.path.join(self.path, collection_name, "meta.json"))
+
+    async def create_collection(self, collection_name: str, size: int, indexed_fields: Sequence[str] = (),
+                                options: CollectionOptions = CollectionOptions()) -> bool:
+        await self.delete_collection(collection_name)
+        self.collections[collection_name] = LocalCollection(
+            os.path.join(self.path, collection_name), size, self.ivf_min_vectors, self.nprobe, options
+        )
+        return True
+
+    async def delete_collection(self, collection_name: str) -> bool:
+        if (collection := self.collections.pop(collection_name, None)) is not None:
+            with collection.lock:
+                collection.close()
+        directory = os.path.join(self.path, collection_name)
+        if not os.path.exists(directory):
+            return False
+        shutil.rmtree(directory)
+        return True
+
+    async def upsert(self, collection_name: str, points: Sequence[PointStruct], wait: bool = True) -> None:
+        await self._run(collection_name, lambda collection: collection.upsert(points))
+
+    async def payloads_where(self, collection_name: str, key: str, value: Any,
+                             fields: Sequence[str]) -> list[tuple[str, dict[str, Any]]]:
+        matches = await self._run(collection_name, lambda collection: collection.where(key, value))
+        return [(point_id, {f: payload[f] for f in fields if f in payload}) for point_id, payload in matches]
+
+    async def delete(self, collection_name: str, point_ids: Sequence[str]) -> None:
+        await self._run(collection_name, lambda collection: collection.delete(point_ids))
+
+    async def delete_where(self, collection_name: str, key: str, value: Any) -> None:
+        def delete(collection: LocalCollection) -> None:
+            collection.delete([point_id for point_id, _ in collection.where(key, value)])
+        await self._run(collection_name, delete)
+
+    async def search(self, collection_name: str, query_vector: Sequence[float],
+                     limit: int, score_threshold: float | None = None,
+                     options: SearchOptions = SearchOptions(), with_vectors: bool = False) -> list[ScoredPoint]:
+        return await self._run(
+            collection_name, lambda collection: collection.search(query_vector, limit, score_threshold, options, with_vectors)
+        )
+
+    async def search_batch(self, collection_name: str, query_vectors: Sequence[Sequence[float]],
+                           limit: int, score_threshold: float | None = None,
+                           options: SearchOptions = SearchOptions(),
+                           with_vectors: bool = False) -> list[list[ScoredPoint]]:
+        return await self._run(collection_name, lambda collection: [
+            collection.search(query_vector, limit, score_threshold, options, with_vectors)
+            for query_vector in query_vectors
+        ])
+
+    async def close(self) -> None:
+        for collection in self.collections.values():
+            with collection.lock:
+                collection.close()
+        self.collections.clear()
@@ -0,0 +1,135 @@
+# app/api/repository/qdrant_backend.py
+
+from typing import Any, Sequence
+
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http import models
+from qdrant_client.http.models import PointStruct, ScoredPoint
+
+from app.api.repository.vector_interface import CollectionOptions, IVectorBackend, SearchOptions
+
+SCROLL_PAGE_SIZE = 1024
+
+
+def _quantization_config(options: CollectionOptions) -> models.QuantizationConfig | None:
+    # Codes stay in RAM even when the originals are on disk; that is the point of quantizing
+    if options.quantization == "scalar":
+        return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8, quantile=0.99, always_ram=True,
+        ))
+    if options.quantization == "binary":
+        return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
+def _search_params(options: SearchOptions) -> models.SearchParams:
+    return models.SearchParams(
+        hnsw_ef=options.hnsw_ef,
+        # Ignored by Qdrant for collections without quantization
+        quantization=models.QuantizationSearchParams(
+            rescore=options.rescore, oversampling=options.oversampling,
+        ),
+    )
+
+
+def _match(key: str, value: Any) -> models.Filter:
+    return models.Filter(must=[models.FieldCondition(key=key, match=models.MatchValue(value=value))])
+
+
+class QdrantVectorBackend(IVectorBackend):
+    def __init__(self, host: str = "localhost", port: int = 6333, client: AsyncQdrantClient | None = None) -> None:
+        self.db_client = client or AsyncQdrantClient(host=host, port=port)
+
+    async def collection_exists(self, collection_name: str) -> bool:
+        response = await self.db_client.get_collections()
+        return any(collection.name == collection_name for collection in response.collections)
+
+    async def create_collection(self, collection_name: str, size: int, indexed_fields: Sequence[str] = (),
+                                options: CollectionOptions = CollectionOptions()) -> bool:
+        hnsw_config = None
+        if options.hnsw_m is not None or options.hnsw_ef_construct is not None:
+            hnsw_config = models.HnswConfigDiff(m=options.hnsw_m, ef_construct=options.hnsw_ef_construct)
+        created = await self.db_client.create_collection(
+            collection_name,
+            vectors_config=models.VectorParams(
+                size=size, distance=models.Distance.COSINE, on_disk=options.on_disk or None,
+            ),
+            hnsw_config=hnsw_config,
+            quantization_config=_quantization_config(options),
+        )
+        for field in indexed_fields:
+            await self.db_client.create_payload_index(
+                collection_name, field, field_schema=models.PayloadSchemaType.KEYWORD
+            )
+        return created
+
+    async def delete_collection(self, collection_name: str) -> bool:
+        return await self.db_client.delete_collection(collection_name)
+
+    async def upsert(self, collection_name: str, points: Sequence[PointStruct], wait: bool = True) -> None:
+        await self.db_client.upsert(collection_name=collection_name, points=list(points), wait=wait)
+
+    async def payloads_where(self, collection_name: str, key: str, value: Any,
+                             fields: Sequence[str]) -> list[tuple[str, dict[str, Any]]]:
+        found = []
+        offset = None
+        while True:
+            points, offset = await self.db_client.scroll(
+                collection_name=collection_name,
+                scroll_filter=_match(key, value),
+                limit=SCROLL_PAGE_SIZE,
+                offset=offset,
+                with_payload=list(fields),
+                with_vectors=False,
+            )
+            found.extend((str(point.id), point.payload or {}) for point in points)
+            if offset is None:
+                return found
+
+    async def delete(self, collection_name: str, point_ids: Sequence[str]) -> None:
+        await self.db_client.delete(
+            collection_name=collection_name,
+            points_selector=models.PointIdsList(points=list(point_ids)),
+        )
+
+    async def delete_where(self, collection_name: str, key: str, value: Any) -> None:
+        await self.db_client.delete(
+            collection_name=collection_name,
+            points_selector=models.FilterSelector(filter=_match(key, value)),
+        )
+
+    async def search(self, collection_name: str, query_vector: Sequence[float],
+                     limit: int, score_threshold: float | None = None,
+                     options: SearchOptions = SearchOptions(), with_vectors: bool = False) -> list[ScoredPoint]:
+        response = await self.db_client.query_points(
+            collection_name=collection_name,
+            query=list(query_vector),
+            limit=limit,
+            score_threshold=score_threshold,
+            with_vectors=with_vectors,
+            search_params=_search_params(options),
+        )
+        return response.points
+
+    async def search_batch(self, collection_name: str, query_vectors: Sequence[Sequence[float]],
+                           limit: int, score_threshold: float | None = None,
+                           options: SearchOptions = SearchOptions(),
+                           with_vectors: bool = False) -> list[list[ScoredPoint]]:
+        responses = await self.db_client.query_batch_points(
+            collection_name=collection_name,
+            requests=[
+                models.QueryRequest(
+                    query=list(query_vector),
+                    limit=limit,
+                    score_threshold=score_threshold,
+                    params=_search_params(options),
+                    with_payload=True,
+                    with_vector=with_vectors,
+                )
+                for query_vector in query_vectors
+            ],
+        )
+        return [response.points for response in responses]
+
+    async def close(self) -> None:
+        await self.db_client.close()
@@ -0,0 +1,78 @@
+# app/api/repository/vector_interface.py
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Literal, Sequence, TypeAlias
+
+from qdrant_client.http.models import PointStruct, ScoredPoint
+
+# Backends share Qdrant's point models so callers see the same shapes whichever store is used
+
+Quantization: TypeAlias = Literal["none", "scalar", "binary"]
+
+
+@dataclass(frozen=True)
+class CollectionOptions:
+    """Storage layout fixed when a collection is created."""
+    quantization: Quantization = "none"   # scalar = int8 codes, binary = 1 bit per dimension
+    on_disk: bool = False                 # keep full-precision vectors on disk, only codes in RAM
+    hnsw_m: int | None = None             # graph degree; None keeps the server default
+    hnsw_ef_construct: int | None = None
+
+
+@dataclass(frozen=True)
+class SearchOptions:
+    """Per-query accuracy/speed knobs; ``hnsw_ef`` only applies to HNSW backends."""
+    hnsw_ef: int | None = None
+    oversampling: float = 2.0             # candidates scored on codes = limit * oversampling
+    rescore: bool = True                  # re-rank those candidates with full-precision vectors
+
+
+class IVectorBackend(ABC):
+    @abstractmethod
+    async def collection_exists(self, collection_name: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def create_collection(self, collection_name: str, size: int, indexed_fields: Sequence[str] = (),
+                                options: CollectionOptions = CollectionOptions()) -> bool:
+        pass
+
+    @abstractmethod
+    async def delete_collection(self, collection_name: str) -> bool:
+        pass
+
+    @abstractmethod
+    async def upsert(self, collection_name: str, points: Sequence[PointStruct], wait: bool = True) -> None:
+        pass
+
+    @abstractmethod
+    async def payloads_where(self, collection_name: str, key: str, value: Any,
+                             fields: Sequence[str]) -> list[tuple[str, dict[str, Any]]]:
+        """(point id, payload restricted to ``fields``) of every point whose ``key`` equals ``value``."""
+        pass
+
+    @abstractmethod
+    async def delete(self, collection_name: str, point_ids: Sequence[str]) -> None:
+        pass
+
+    @abstractmethod
+    async def delete_where(self, collection_name: str, key: str, value: Any) -> None:
+        pass
+
+    @abstractmethod
+    async def search(self, collection_name: str, query_vector: Sequence[float],
+                     limit: int, score_threshold: float | None = None,
+                     options: SearchOptions = SearchOptions(), with_vectors: bool = False) -> list[ScoredPoint]:
+        pass
+
+    @abstractmethod
+    async def search_batch(self, collection_name: str, query_vectors: Sequence[Sequence[float]],
+                           limit: int, score_threshold: float | None = None,
+                           options: SearchOptions = SearchOptions(),
+                           with_vectors: bool = False) -> list[list[ScoredPoint]]:
+        """One result list per query vector, in a single round trip."""
+        pass
+
+    async def close(self) -> None:
+        pass
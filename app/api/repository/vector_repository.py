@@ -1,61 +1,111 @@
 # app/api/repository/vector.py
 
+import asyncio, hashlib
+import numpy as np
 from operator import is_
+from typing import Any, NamedTuple, Sequence
+from uuid import NAMESPACE_URL, uuid4, uuid5
 from loguru import logger
-from qdrant_client import AsyncQdrantClient
 from qdrant_client.http import models
 from qdrant_client.http.models import ScoredPoint
 
-class VectorRepository:
-    def __init__(self, host: str="localhost", port: int = 6333) -> None:
-        self.db_client = AsyncQdrantClient(host=host,port=port)
-    
-    async def create_collection(self, collection_name: str, size: int) -> bool:
-        vectors_config = models.VectorParams(
-            size=size,
-            distance=models.Distance.COSINE
+from app.api.common.cache import TTLCache
+from app.api.core.config import settings
+from app.api.repository.vector_interface import CollectionOptions, IVectorBackend, SearchOptions
+
+# Namespace for deterministic point ids, so re-ingesting a chunk lands on its own point
+POINT_NAMESPACE = uuid5(NAMESPACE_URL, "generative-ai-service/vector-points")
+
+
+class ChunkRecord(NamedTuple):
+    index: int
+    text: str
+    vector: list[float]
+    pages: tuple[int, ...] = ()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def point_id(source: str, text_hash: str) -> str:
+    # Position is left out on purpose: an unchanged chunk keeps its id when text before it changes
+    return str(uuid5(POINT_NAMESPACE, f"{source}:{text_hash}"))
+
+# Payload fields filtered on during incremental ingestion
+INDEXED_PAYLOAD_FIELDS = ("source", "content_hash")
+
+
+def make_vector_backend() -> IVectorBackend:
+    if settings.vector_backend == "local":
+        from app.api.repository.local_vector_backend import LocalVectorBackend  # lazy import
+        return LocalVectorBackend(
+            settings.vector_store_path, settings.local_ivf_min_vectors, settings.local_ivf_nprobe
         )
-        response = await self.db_client.get_collections()
+    from app.api.repository.qdrant_backend import QdrantVectorBackend  # lazy import
+    return QdrantVectorBackend(settings.qdrant_host, settings.qdrant_port)
+
+
+def default_search_options() -> SearchOptions:
+    return SearchOptions(settings.search_hnsw_ef, settings.search_oversampling, settings.search_rescore)
+
+
+def vector_hash(vector: Sequence[float]) -> str:
+    return hashlib.blake2b(np.asarray(vector, dtype=np.float32).tobytes(), digest_size=16).hexdigest()
 
-        is_collection_exist = any(
-            collection.name == collection_name
-            for collection in response.collections
+
+class VectorRepository:
+    def __init__(self, backend: IVectorBackend | None = None) -> None:
+        self.backend = backend or make_vector_backend()
+        # Search results per (collection, version, query); writes bump the version
+        self.search_cache: TTLCache[tuple, list[ScoredPoint]] = TTLCache(
+            settings.search_cache_size, settings.search_cache_ttl
         )
+        self.collection_versions: dict[str, int] = {}
+
+    def invalidate(self, collection_name: str) -> None:
+        self.collection_versions[collection_name] = self.collection_versions.get(collection_name, 0) + 1
+    
+    async def create_collection(self, collection_name: str, size: int, recreate: bool = False,
+                                options: CollectionOptions = CollectionOptions()) -> bool:
+        """Create ``collection_name`` with ``options``; an existing collection keeps its own unless ``recreate``."""
+        is_collection_exist = await self.backend.collection_exists(collection_name)
+
+        if is_collection_exist and not recreate:
+            logger.debug(f'Collection name: {collection_name} exist. Keeping it')
+            return True
 
         if is_collection_exist:
             logger.debug(
                 f'Collection name: {collection_name} exist. Recreating it'
             )
-            await self.db_client.delete_collection(collection_name)
-            return await self.db_client.create_collection(
-                collection_name,
-                vectors_config=vectors_config
-            )
-
-        logger.debug(f'Creating collection {collection_name}')
-        return await self.db_client.create_collection(
-                collection_name,
-                vectors_config=vectors_config
-            )
+            await self.backend.delete_collection(collection_name)
+        else:
+            logger.debug(f'Creating collection {collection_name} with {options}')
+        created = await self.backend.create_collection(collection_name, size, INDEXED_PAYLOAD_FIELDS, options)
+        self.invalidate(collection_name)
+        return created
 
     async def delete_collection(self, collection_name: str) -> bool:
         logger.debug(f'Deleting collection {collection_name}')
-        return await self.db_client.delete_collection(collection_name)
+        self.invalidate(collection_name)
+        return await self.backend.delete_collection(collection_name)
 
     async def create(self, collection_name: str, 
                     embedding_vector:list[float],
                     original_text:str,
                     source:str) -> None:
-            response = await self.db_client.count(collection_name=collection_name)
+            # Random ids: a count()-derived id races with concurrent writers
+            vector_id = uuid4().hex
             logger.debug(
-                f'Creating a new vector with ID {response} inside the {collection_name}'
+                f'Creating a new vector with ID {vector_id} inside the {collection_name}'
             )
 
-            await self.db_client.upsert(
-                collection_name=collection_name,
-                points=[
+            await self.backend.upsert(
+                collection_name,
+                [
                         models.PointStruct(
-                            id=response.count,
+                            id=vector_id,
                             vector=embedding_vector,
                             payload={
                                 "source": source,
@@ -64,20 +114,137 @@ class VectorRepository:
                         )
                     ],
             )
+            self.invalidate(collection_name)
+
+    async def create_many(self, collection_name: str,
+                          records: Sequence[ChunkRecord],
+                          source: str,
+                          wait: bool = True) -> None:
+        """
+        Upsert ``records`` in batches with bounded parallelism. Ids are UUIDv5 of
+        source and content hash, so concurrent ingestions never collide and retries
+        overwrite instead of duplicating.
+        """
+        points = []
+        for record in records:
+            text_hash = content_hash(record.text)
+            payload = {
+                "source": source,
+                "original_text": record.text,
+                "chunk_index": record.index,
+                "content_hash": text_hash,
+            }
+            if record.pages:
+                payload["pages"] = list(record.pages)
+            points.append(models.PointStruct(id=point_id(source, text_hash), vector=record.vector, payload=payload))
+        if not points:
+            return
+        batch_size = settings.vector_upsert_batch_size
+        batches = [points[i:i + batch_size] for i in range(0, len(points), batch_size)]
+        semaphore = asyncio.Semaphore(settings.vector_upsert_parallelism)
+
+        async def upsert(batch: list[models.PointStruct], wait_batch: bool) -> None:
+            async with semaphore:
+                await self.backend.upsert(collection_name, batch, wait=wait_batch)
+
+        logger.debug(f'Upserting {len(points)} vectors in {len(batches)} batches into {collection_name}')
+        # Qdrant applies updates in order, so acknowledging the last batch covers the earlier ones
+        await asyncio.gather(*(upsert(batch, False) for batch in batches[:-1]))
+        await upsert(batches[-1], wait)
+        self.invalidate(collection_name)
+
+    async def source_hashes(self, collection_name: str, source: str) -> dict[str, str]:
+        """Map content hash -> point id for every chunk stored for ``source``."""
+        points = await self.backend.payloads_where(collection_name, "source", source, ["content_hash"])
+        return {payload["content_hash"]: point for point, payload in points if payload.get("content_hash")}
+
+    async def delete_points(self, collection_name: str, point_ids: Sequence[str]) -> None:
+        if not point_ids:
+            return
+        logger.debug(f'Deleting {len(point_ids)} vectors from {collection_name}')
+        await self.backend.delete(collection_name, point_ids)
+        self.invalidate(collection_name)
+
+    async def delete_source(self, collection_name: str, source: str) -> None:
+        logger.debug(f'Deleting every vector of {source} from {collection_name}')
+        await self.backend.delete_where(collection_name, "source", source)
+        self.invalidate(collection_name)
 
     async def search(self,
                     collection_name: str,
                     query_vector: list[float],
                     retrieval_limit: int,
                     score_threshold: float,
+                    options: SearchOptions | None = None,
+                    with_vectors: bool = False,
                     ) -> list[ScoredPoint]:
+        options = options or default_search_options()
+        key = (
+            collection_name, self.collection_versions.get(collection_name, 0),
+            vector_hash(query_vector), retrieval_limit, score_threshold, options, with_vectors,
+        )
+        if (cached := self.search_cache.get(key)) is not None:
+            logger.debug(f"Search cache hit in the {collection_name} collection")
+            return cached
         logger.debug(
             f"Searching for relevant items in the {collection_name} collection"
         )
-        response = await self.db_client.query_points(
-                        collection_name=collection_name,
-                        query=query_vector,
-                        limit=retrieval_limit,
-                        score_threshold=score_threshold,
-                    )
-        return response.points
\ No newline at end of file
+        points = await self.backend.search(
+            collection_name, query_vector, retrieval_limit, score_threshold, options, with_vectors
+        )
+        # A write that finished during the query bumped the version; don't cache its stale view
+        if key[1] == self.collection_versions.get(collection_name, 0):
+            self.search_cache.put(key, points)
+        return points
+
+    async def search_batch(self,
+                           collection_name: str,
+                           query_vectors: Sequence[list[float]],
+                           retrieval_limit: int,
+                           score_threshold: float,
+                           options: SearchOptions | None = None,
+                           with_vectors: bool = False,
+                           ) -> list[list[ScoredPoint]]:
+        """Search every vector of ``query_vectors``; cache misses go to the backend in one batch call."""
+        options = options or default_search_options()
+        version = self.collection_versions.get(collection_name, 0)
+        keys = [
+            (collection_name, version, vector_hash(vector), retrieval_limit, score_threshold, options, with_vectors)
+            for vector in query_vectors
+        ]
+        results: list[list[ScoredPoint] | None] = [self.search_cache.get(key) for key in keys]
+        missing = [i for i, points in enumerate(results) if points is None]
+        if not missing:
+            logger.debug(f"Search cache hit for {len(keys)} queries in the {collection_name} collection")
+            return results
+        logger.debug(
+            f"Batch searching {len(missing)} of {len(keys)} queries in the {collection_name} collection"
+        )
+        found = await self.backend.search_batch(
+            collection_name, [query_vectors[i] for i in missing], retrieval_limit, score_threshold,
+            options, with_vectors,
+        )
+        fresh = version == self.collection_versions.get(collection_name, 0)
+        for i, points in zip(missing, found):
+            results[i] = points
+            if fresh:
+                self.search_cache.put(keys[i], points)
+        return results
+
+    async def search_collections(self,
+                                 collection_names: Sequence[str],
+                                 query_vectors: Sequence[list[float]],
+                                 retrieval_limit: int,
+                                 score_threshold: float,
+                                 options: SearchOptions | None = None,
+                                 with_vectors: bool = False,
+                                 ) -> dict[str, list[list[ScoredPoint]]]:
+        """``search_batch`` over several collections concurrently, one round trip each."""
+        found = await asyncio.gather(*(
+            self.search_batch(name, query_vectors, retrieval_limit, score_threshold, options, with_vectors)
+            for name in collection_names
+        ))
+        return dict(zip(collection_names, found))
+
+    async def close(self) -> None:
+        await self.backend.close()
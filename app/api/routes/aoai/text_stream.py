@@ -1,15 +1,23 @@
 # app/api/routes/aoai/text_streaming.py
 
 from fastapi.responses import StreamingResponse
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 
+from app.api.core.aoai.governor import rate_governor
 from app.api.core.aoai.service import azure_chat_client
+from app.api.core.config import settings
+from app.api.core.huggingface.utils import count_tokens
 
 router = APIRouter()
 
 @router.get('/text/stream')
-async def serve_text_streaming(prompt: str) -> StreamingResponse:
+async def serve_text_streaming(req: Request, prompt: str) -> StreamingResponse:
+    # Azure charges prompt + max completion against TPM when the request arrives; so do we,
+    # with an estimate standing in for the completion when no cap is sent
+    completion = settings.azure_max_completion_tokens or settings.azure_completion_token_estimate
+    cost = count_tokens(prompt) + completion
+    waited = await rate_governor.acquire(req.client.host if req.client else "unknown", cost)
     return StreamingResponse(
-        azure_chat_client.chat_stream(prompt), media_type='text/event-stream'
+        azure_chat_client.chat_stream(prompt), media_type='text/event-stream',
+        headers={"X-Queue-Wait-Ms": f"{waited * 1000:.0f}"},
     )
-
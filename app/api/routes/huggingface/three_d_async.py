@@ -1,23 +1,50 @@
 # generative-ai-service/app/api/routes/huggingface/three_d_async.py
-import asyncio
+import asyncio, json
 from fastapi import APIRouter, HTTPException, Depends, Query
 from fastapi.responses import StreamingResponse
 
 from app.api.core.huggingface.service import GenerationService
-from app.api.core.huggingface.utils import mesh_to_obj_buffer 
+from app.api.core.huggingface.mesh import (
+    export_lod,
+    export_lod_bundle,
+    mesh_media_types,
+    LevelOfDetail,
+    MeshFormat,
+)
 
 
 router = APIRouter()
 
 @router.get("/3d")
-async def generate_3d_endpoint(prompt: str, num_steps: int = Query(25, ge=1), svc: GenerationService = Depends()):
+async def generate_3d_endpoint(prompt: str,
+                               num_steps: int = Query(25, ge=1),
+                               format: MeshFormat = Query("obj", description="obj (ASCII), ply (binary) or glb"),
+                               lod: LevelOfDetail = Query("full", description="Fraction of faces kept after decimation"),
+                               target_faces: int | None = Query(None, ge=4, description="Overrides lod"),
+                               lods: list[LevelOfDetail] | None = Query(None, description="Return several LODs as a zip"),
+                               svc: GenerationService = Depends()):
     try:
         loop = asyncio.get_running_loop()
         mesh = await loop.run_in_executor(None, svc.generate_3d, prompt, num_steps)
-        buffer = mesh_to_obj_buffer(mesh)
+        if lods:
+            bundle, manifest = await loop.run_in_executor(None, export_lod_bundle, mesh, format, lods)
+            return StreamingResponse(
+                bundle, media_type="application/zip",
+                headers={
+                    "Content-Disposition": f"attachment; filename={prompt}.zip",
+                    "X-Mesh-LODs": json.dumps(manifest, separators=(",", ":")),
+                }
+            )
+        export = await loop.run_in_executor(None, export_lod, mesh, format, lod, target_faces)
         return StreamingResponse(
-            buffer, media_type="application/octet-stream",
-            headers={"Content-Disposition": f"attachment; filename={prompt}.obj"}
+            export.buffer, media_type=mesh_media_types[format],
+            headers={
+                "Content-Disposition": f"attachment; filename={prompt}.{format}",
+                "Content-Length": str(export.size),
+                "X-Mesh-Vertices": str(export.vertices),
+                "X-Mesh-Faces": str(export.faces),
+                "X-Mesh-Bytes": str(export.size),
+            }
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -5,18 +5,30 @@ from fastapi import APIRouter, HTTPException, Depends, Query, UploadFile,File
 from fastapi.responses import StreamingResponse
 
 from app.api.core.huggingface.service import GenerationService
-from app.api.core.huggingface.utils import export_to_video_buffer
+from app.api.core.huggingface.utils import export_to_video_buffer, stream_video_fragments, VideoEncoding
 
 router = APIRouter()
 
 @router.post("/video")
-async def generate_video_endpoint(image: UploadFile = File(...), num_frames: int = Query(25, ge=1), svc: GenerationService=Depends()):
+async def generate_video_endpoint(image: UploadFile = File(...),
+                                  num_frames: int = Query(25, ge=1),
+                                  stream: bool = Query(False, description="Stream fragmented MP4 while frames are decoded"),
+                                  encoding: VideoEncoding = Query("archival"),
+                                  svc: GenerationService=Depends()):
     try:
         loop = asyncio.get_running_loop()
         image_bytes = await image.read()
+        if stream:
+            # StreamingResponse iterates sync generators in the threadpool, so diffusion,
+            # VAE decode and encoding all stay off the event loop
+            chunk_size = svc.video_decode_chunk_size(num_frames)
+            frame_chunks = svc.generate_video_chunks(image_bytes, num_frames, chunk_size)
+            return StreamingResponse(
+                stream_video_fragments(frame_chunks, encoding, gop_size=chunk_size),
+                media_type="video/mp4",
+            )
         frames = await loop.run_in_executor(None,svc.generate_video, image_bytes, num_frames)
-        video_buffer = export_to_video_buffer(frames)
+        video_buffer = await loop.run_in_executor(None, export_to_video_buffer, frames, encoding)
         return StreamingResponse(video_buffer, media_type="video/mp4")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
-
@@ -0,0 +1,76 @@
+# app/api/routes/jobs/jobs.py
+
+import os
+from typing import Annotated
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Response, UploadFile, status
+from fastapi.responses import FileResponse
+
+from app.api.core.huggingface.service import GenerationService
+from app.api.core.huggingface.mesh import export_lod, mesh_media_types, LevelOfDetail, MeshFormat
+from app.api.core.huggingface.utils import export_to_video_buffer, VideoEncoding
+from app.api.core.jobs.service import job_service, get_job, JobWork
+from app.api.db.entities import Job
+from app.api.db.schemas import JobOut
+
+router = APIRouter()
+
+GetJobDependency = Annotated[Job, Depends(get_job)]
+
+
+async def submit(response: Response, kind: str, work: JobWork, idempotency_key: str | None) -> JobOut:
+    job, _ = await job_service.submit(kind, work, idempotency_key)
+    response.headers["Location"] = f"/jobs/{job.id}"
+    return job
+
+
+@router.post("/video", status_code=status.HTTP_202_ACCEPTED, response_model=JobOut)
+async def submit_video_job(response: Response,
+                           image: UploadFile = File(...),
+                           num_frames: int = Query(25, ge=1),
+                           encoding: VideoEncoding = Query("archival"),
+                           idempotency_key: str | None = Header(None),
+                           svc: GenerationService = Depends()):
+    image_bytes = await image.read()
+
+    def work(progress):
+        frames = svc.generate_video(image_bytes, num_frames, progress)
+        return export_to_video_buffer(frames, encoding), "video/mp4", "video.mp4"
+
+    return await submit(response, "video", work, idempotency_key)
+
+
+@router.post("/3d", status_code=status.HTTP_202_ACCEPTED, response_model=JobOut)
+async def submit_3d_job(response: Response,
+                        prompt: str,
+                        num_steps: int = Query(25, ge=1),
+                        format: MeshFormat = Query("obj"),
+                        lod: LevelOfDetail = Query("full"),
+                        target_faces: int | None = Query(None, ge=4),
+                        idempotency_key: str | None = Header(None),
+                        svc: GenerationService = Depends()):
+    def work(progress):
+        mesh = svc.generate_3d(prompt, num_steps, progress)
+        export = export_lod(mesh, format, lod, target_faces)
+        return export.buffer, mesh_media_types[format], f"{prompt}.{format}"
+
+    return await submit(response, "3d", work, idempotency_key)
+
+
+@router.get("/{job_id}", response_model=JobOut)
+async def retrieve(job: GetJobDependency):
+    return JobOut.model_validate(job)
+
+
+@router.get("/{job_id}/result")
+async def retrieve_result(job: GetJobDependency):
+    if job.status != "succeeded":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job is {job.status}",
+        )
+    if not job.result_path or not os.path.exists(job.result_path):
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail="Job result is no longer available",
+        )
+    return FileResponse(job.result_path, media_type=job.media_type, filename=job.filename)
@@ -0,0 +1,21 @@
+# app/api/routes/rag/embed_async.py
+from fastapi import APIRouter, Body, HTTPException
+
+from app.api.rag.data_transformation import EMBEDDING_MODEL
+from app.api.rag.query_embedding import query_embedding_service
+from app.api.rag.schemas import EmbeddingRequest, EmbeddingResponse
+
+router = APIRouter()
+
+
+@router.post("/embed")
+async def embed_endpoint(body: EmbeddingRequest = Body(...)) -> EmbeddingResponse:
+    try:
+        embeddings = await query_embedding_service.embed_many(body.texts)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return EmbeddingResponse(
+        model=EMBEDDING_MODEL,
+        dimensions=len(embeddings[0]),
+        embeddings=embeddings,
+    )
@@ -7,18 +7,24 @@ from fastapi import (
         status, 
         File, 
         UploadFile,
-        BackgroundTasks
+        BackgroundTasks,
+        Query,
         )
 from pathlib import Path
-from app.api.common.pdf_extractor import pdf_to_text_extractor
 from app.api.rag.rag_services import vector_service
+from app.api.repository.vector_interface import CollectionOptions, Quantization
 
 
 router = APIRouter()
 
 @router.post('/upload')
 async def file_upload(file: Annotated[UploadFile, File(description="Uploaded PDF Documents")],
-                     bg_text_processor: BackgroundTasks):
+                     bg_text_processor: BackgroundTasks,
+                     quantization: Quantization = Query("none", description="Vector codes kept in RAM: int8 (scalar) or 1-bit (binary)"),
+                     on_disk: bool = Query(False, description="Keep full-precision vectors on disk"),
+                     hnsw_m: int | None = Query(None, ge=4),
+                     hnsw_ef_construct: int | None = Query(None, ge=4),
+                     recreate: bool = Query(False, description="Rebuild the collection so the options above apply")):
     if file.content_type != 'application/pdf':
         raise HTTPException(
             detail = "Only PDF are supported",
@@ -27,13 +33,12 @@ async def file_upload(file: Annotated[UploadFile, File(description="Uploaded PDF
 
     try:
         filepath = await save_file(file)
-        
-        # Derive the text path safely
-        text_path = str(Path(filepath).with_suffix('.txt'))
 
-        # Schedule background work (PASS CALLABLE + ARGS)
-        bg_text_processor.add_task(pdf_to_text_extractor, filepath)
-        bg_text_processor.add_task(vector_service.store_content_in_db, text_path, 512, "knowledgebase", 768)
+        # Schedule background work (PASS CALLABLE + ARGS); pages are extracted while chunks embed
+        options = CollectionOptions(quantization, on_disk, hnsw_m, hnsw_ef_construct)
+        bg_text_processor.add_task(
+            vector_service.store_content_in_db, filepath, 512, "knowledgebase", 768, options, recreate
+        )
 
         
     except Exception as e:
@@ -43,3 +48,16 @@ async def file_upload(file: Annotated[UploadFile, File(description="Uploaded PDF
         )
     
     return {"filename": file.filename, "message": "File uploaded successfully"}
+
+
+@router.delete('/{filename}')
+async def file_delete(filename: str):
+    try:
+        await vector_service.remove_content_from_db(Path(filename).name)
+    except Exception as e:
+        raise HTTPException(
+            detail = f"Failed to delete {filename}: {e}",
+            status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+    return {"filename": filename, "message": "File content removed"}
@@ -11,8 +11,8 @@ from fastapi import (
 
 from app.api.core.huggingface.service import GenerationService
 from app.api.core.huggingface.schemas import TextModelRequest,TextModelResponse
-from app.api.rag.rag_dependencies import  get_rag_content
-from app.api.dependencies import get_urls_contents
+from app.api.rag.context_assembly import AssembledContext
+from app.api.rag.rag_dependencies import get_context
 router = APIRouter()
 
 
@@ -20,8 +20,7 @@ router = APIRouter()
 async def chat_endpoint(req: Request,
                         body: TextModelRequest = Body(...), 
                         svc: GenerationService = Depends(), 
-                        urls_content = Depends(get_urls_contents),
-                        rag_content: str = Depends(get_rag_content)) -> TextModelResponse:
+                        context: AssembledContext = Depends(get_context)) -> TextModelResponse:
     try:
         if body.model not in ['tinyLlama','gemma2b']:
             raise HTTPException(
@@ -29,13 +28,14 @@ async def chat_endpoint(req: Request,
                 status_code=status.HTTP_400_BAD_REQUEST,
             )
         loop = asyncio.get_running_loop()
-        prompt = body.prompt + " " + urls_content + " " + rag_content
+        prompt = body.prompt + " " + context.urls_content + " " + context.rag_content
         response = await loop.run_in_executor(None,svc.generate_text, prompt, body.temperature)
         return TextModelResponse(
             content=response,
             model = body.model,
             temperature = body.temperature,
-            ip = req.client.host
+            ip = req.client.host,
+            context_timings = context.timings,
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -13,11 +13,14 @@ from app.api.routes.huggingface.text_async import router as text_router
 # rag
 from app.api.routes.rag.fileupload_async import router as upload_router
 from app.api.routes.rag.rag_text_async import router as rag_text_router
+from app.api.routes.rag.embed_async import router as embed_router
 
 # aoai
 from app.api.routes.aoai.text_stream import router as stream_router
 # postgres
 from app.api.routes.postgres.conversation import router as conversation_router
+# jobs
+from app.api.routes.jobs.jobs import router as jobs_router
 
 from app.api.core.lifespan import ai_lifespan
 
@@ -44,8 +47,10 @@ app.include_router(video_router,          prefix="/generate", tags=['huggingface
 app.include_router(text_router,           prefix="/generate", tags=['huggingface'])
 app.include_router(upload_router,         prefix="/file",     tags=['rag'])
 app.include_router(rag_text_router,       prefix="/rag",      tags=['rag'])
+app.include_router(embed_router,          prefix="/rag",      tags=['rag'])
 app.include_router(stream_router,         prefix="/generate", tags=['azure openai'])
 app.include_router(conversation_router,   prefix="/postgres", tags=['database'])
+app.include_router(jobs_router,           prefix="/jobs",     tags=['jobs'])
 
 
 @app.get("/")
@@ -0,0 +1,76 @@
+# generative-ai-service/benchmarks/diffusion_memory.py
+"""
+Peak memory per diffusion memory mode.
+
+Every (model, mode) pair runs in a fresh interpreter because peak RSS can only
+grow within a process. Run from the repository root:
+
+    python -m benchmarks.diffusion_memory --models image video 3d --modes none balanced low minimal
+"""
+import argparse, json, resource, subprocess, sys, time
+
+MODELS = ("image", "video", "3d")
+MODES = ("none", "balanced", "low", "minimal")
+
+
+def run_child(model: str, mode: str, num_frames: int, steps: int) -> dict:
+    import torch
+    from PIL import Image
+    from app.api.models.huggingface import models
+
+    start = time.perf_counter()
+    if model == "image":
+        pipe = models.load_image_model(mode)
+        models.generate_image(pipe, "a photo of an astronaut riding a horse")
+    elif model == "video":
+        pipe = models.load_video_model(mode)
+        image = Image.new("RGB", (1024, 576), color=(120, 140, 160))
+        models.generate_video(pipe, image, num_frames)
+    else:
+        pipe = models.load_3d_model(mode)
+        models.generate_3d_geometry(pipe, "a shark", steps)
+    elapsed = time.perf_counter() - start
+
+    # ru_maxrss is reported in KiB on Linux
+    result = {
+        "model": model,
+        "mode": mode,
+        "seconds": round(elapsed, 2),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+    if torch.cuda.is_available():
+        result["peak_cuda_mb"] = round(torch.cuda.max_memory_allocated() / 1024**2, 1)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--models", nargs="+", choices=MODELS, default=list(MODELS))
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--num-frames", type=int, default=25)
+    parser.add_argument("--steps", type=int, default=25)
+    parser.add_argument("--child", nargs=2, metavar=("MODEL", "MODE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(*args.child, args.num_frames, args.steps)))
+        return
+
+    print(f"{'model':<6} {'mode':<9} {'seconds':>8} {'peak RSS MB':>12} {'peak CUDA MB':>13}")
+    for model in args.models:
+        for mode in args.modes:
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.diffusion_memory",
+                 "--num-frames", str(args.num_frames), "--steps", str(args.steps),
+                 "--child", model, mode],
+                capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                print(f"{model:<6} {mode:<9} failed: {proc.stderr.strip().splitlines()[-1:]}")
+                continue
+            r = json.loads(proc.stdout.strip().splitlines()[-1])
+            print(f"{model:<6} {mode:<9} {r['seconds']:>8} {r['peak_rss_mb']:>12} {r.get('peak_cuda_mb', '-'):>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# generative-ai-service/benchmarks/embedding_throughput.py
+"""
+Embeddings/sec of the RAG embedder on CPU: one call per chunk vs embed_many at
+several batch sizes. Chunks come from a text file (``--file``) split with the
+ingestion chunker, or are synthesized with realistic length variance.
+
+    python -m benchmarks.embedding_throughput --batch-sizes 1 4 8 16 32 --chunks 128
+"""
+import argparse, random, time
+
+WORDS = (
+    "fastapi service vector embedding retrieval document context model token "
+    "qdrant chunk ingestion pipeline latency throughput batch query answer"
+).split()
+
+
+def synthetic_chunks(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    # Mostly full 512-token chunks with a tail of short ones, like a chunked PDF
+    lengths = [rng.choice([380, 380, 380, 200, 60]) for _ in range(count)]
+    return [" ".join(rng.choices(WORDS, k=n)) for n in lengths]
+
+
+def file_chunks(path: str, count: int) -> list[str]:
+    from app.api.rag.data_transformation import chunk_text, clean_text
+
+    with open(path, encoding="utf-8") as f:
+        chunks = chunk_text(clean_text(f.read()))
+    return chunks[:count]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="Text file to chunk instead of synthetic chunks")
+    parser.add_argument("--chunks", type=int, default=128)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 4, 8, 16, 32, 64])
+    args = parser.parse_args()
+
+    import torch
+    from app.api.rag.data_transformation import embed, embed_many
+
+    texts = file_chunks(args.file, args.chunks) if args.file else synthetic_chunks(args.chunks)
+    print(f"{len(texts)} chunks, torch threads={torch.get_num_threads()}")
+
+    embed(texts[0])  # warm-up
+
+    start = time.perf_counter()
+    for text in texts:
+        embed(text)
+    baseline = len(texts) / (time.perf_counter() - start)
+    print(f"{'embed() per chunk':<22} {baseline:>8.1f} emb/s")
+
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        count = sum(len(batch) for batch in embed_many(texts, batch_size))
+        rate = count / (time.perf_counter() - start)
+        print(f"{f'embed_many bs={batch_size}':<22} {rate:>8.1f} emb/s  ({rate / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# generative-ai-service/benchmarks/html_extraction.py
+"""
+Milliseconds per page and bytes parsed: the BeautifulSoup tree previously used
+by ``parse_inner_text`` vs the streaming lxml extractor fed in 64 KiB chunks as
+``read_text`` does. Pages are saved HTML files (``--pages``) or synthesized
+Wikipedia-like pages with a large tail after the article (navigation, footers,
+scripts).
+
+    python -m benchmarks.html_extraction --pages saved/*.html --repeat 20
+"""
+import argparse, glob, random, time
+
+WORDS = "retrieval context model token service latency document page article index query answer".split()
+CHUNK = 64 * 1024
+
+
+def synthetic_page(paragraphs: int, tail_kib: int, seed: int = 0) -> bytes:
+    rng = random.Random(seed)
+    text = lambda n: " ".join(rng.choices(WORDS, k=n))
+    body = "".join(f"<p>{text(80)} <a href='/wiki/x'>{text(2)}</a> {text(40)}</p>\n" for _ in range(paragraphs))
+    tail = "".join(f"<li><a href='/wiki/{i}'>{text(3)}</a></li>" for i in range(tail_kib * 20))
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'><title>Page</title>"
+        "<script>var config = {};</script><style>.x{}</style></head><body>"
+        f"<header><nav>{text(30)}</nav></header><main id='content'><h1>Title</h1>"
+        f"<div id='bodyContent'>{body}<script>track()</script></div></main>"
+        f"<div id='footer'><ul>{tail}</ul></div></body></html>"
+    ).encode("utf-8")
+
+
+def beautifulsoup_text(page: bytes) -> str:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(page.decode("utf-8", errors="replace"), "lxml")
+    content = soup.find("div", id="bodyContent")
+    return content.get_text() if content else ""
+
+
+def streaming_text(page: bytes) -> tuple[str, int]:
+    from app.api.common.html_extractor import StreamingTextExtractor
+
+    extractor = StreamingTextExtractor()
+    for i in range(0, len(page), CHUNK):
+        if extractor.feed(page[i:i + CHUNK]):
+            break
+    return extractor.close(), extractor.bytes_read
+
+
+def timed(function, page: bytes, repeat: int) -> tuple[float, object]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function(page)
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", nargs="*", default=[], help="Saved HTML files (globs allowed)")
+    parser.add_argument("--paragraphs", type=int, default=300)
+    parser.add_argument("--tail-kib", type=int, default=512)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    pages = []
+    for pattern in args.pages:
+        for path in sorted(glob.glob(pattern)):
+            with open(path, "rb") as f:
+                pages.append((path, f.read()))
+    if not pages:
+        pages = [("synthetic", synthetic_page(args.paragraphs, args.tail_kib))]
+
+    for name, page in pages:
+        soup_ms, soup_text = timed(beautifulsoup_text, page, args.repeat)
+        stream_ms, (stream_text, parsed) = timed(streaming_text, page, args.repeat)
+        print(f"{name:<32} {len(page) / 1024:>8.0f}KiB "
+              f"beautifulsoup={soup_ms:>8.2f}ms ({len(soup_text)} chars) "
+              f"streaming={stream_ms:>8.2f}ms ({len(stream_text)} chars, parsed {parsed / 1024:.0f}KiB) "
+              f"speedup={soup_ms / stream_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
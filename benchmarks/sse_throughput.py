@@ -0,0 +1,85 @@
+# generative-ai-service/benchmarks/sse_throughput.py
+"""
+Streaming throughput of ``AzureOpenAIChatClient.chat_stream`` against a local
+fake OpenAI-compatible server that streams ``--tokens`` chat completion chunks
+(optionally ``--token-interval-ms`` apart). Reports tokens/sec, SSE frames and
+bytes written, and time to the first text frame, per flush setting.
+
+    python -m benchmarks.sse_throughput --tokens 5000 --flush-chars 1 16 48 256 --flush-interval-ms 0 40
+"""
+import argparse, asyncio, json, time
+
+PORT = 8799
+DEPLOYMENT = "fake-deployment"
+
+
+def completion_chunk(content: str | None, finish: str | None = None) -> bytes:
+    chunk = {
+        "id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": 0, "model": DEPLOYMENT,
+        "choices": [{"index": 0, "delta": {"content": content} if content else {}, "finish_reason": finish}],
+    }
+    return f"data: {json.dumps(chunk)}\n\n".encode()
+
+
+async def start_fake_server(tokens: int, interval: float):
+    from aiohttp import web
+
+    async def completions(request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for i in range(tokens):
+            await response.write(completion_chunk(f" tok{i % 10}"))
+            if interval:
+                await asyncio.sleep(interval)
+        await response.write(completion_chunk(None, "stop"))
+        await response.write(b"data: [DONE]\n\n")
+        return response
+
+    app = web.Application()
+    app.router.add_post("/openai/deployments/{deployment}/chat/completions", completions)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", PORT).start()
+    return runner
+
+
+async def measure(tokens: int, flush_chars: int, flush_interval_ms: float) -> str:
+    from app.api.core.aoai.service import AzureOpenAIChatClient
+
+    client = AzureOpenAIChatClient(
+        endpoint=f"http://127.0.0.1:{PORT}", api_key="benchmark", deployment=DEPLOYMENT,
+        flush_chars=flush_chars, flush_interval_ms=flush_interval_ms,
+    )
+    frames = size = 0
+    first = None
+    start = time.perf_counter()
+    async for frame in client.chat_stream("benchmark"):
+        if frame.startswith("data: ") and not frame.startswith("data: [DONE]"):
+            frames += 1
+            first = first or time.perf_counter() - start
+        size += len(frame)
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+    return (f"flush_chars={flush_chars:<5} interval={flush_interval_ms:>5g}ms tokens/s={tokens / elapsed:>9.0f} "
+            f"frames={frames:>6} bytes={size:>8} first={1000 * (first or 0):>7.2f}ms total={elapsed:>6.2f}s")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=5000)
+    parser.add_argument("--token-interval-ms", type=float, default=0.0)
+    parser.add_argument("--flush-chars", type=int, nargs="+", default=[1, 16, 48, 256])
+    parser.add_argument("--flush-interval-ms", type=float, nargs="+", default=[0.0, 40.0])
+    args = parser.parse_args()
+
+    runner = await start_fake_server(args.tokens, args.token_interval_ms / 1000)
+    try:
+        for flush_chars in args.flush_chars:
+            for flush_interval_ms in args.flush_interval_ms:
+                print(await measure(args.tokens, flush_chars, flush_interval_ms))
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
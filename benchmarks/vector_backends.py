@@ -0,0 +1,105 @@
+# generative-ai-service/benchmarks/vector_backends.py
+"""
+Recall@k and query latency of the vector backends on synthetic clustered
+embeddings. Ground truth is an exact NumPy cosine scan. The local backend runs
+exact and IVF (per nprobe); Qdrant runs against ``--qdrant host:port`` or, with
+``--qdrant memory``, qdrant-client's in-process mode.
+
+    python -m benchmarks.vector_backends --vectors 50000 --dim 768 --nprobe 8 32 64 --qdrant localhost:6333
+"""
+import argparse, asyncio, shutil, tempfile, time
+from uuid import UUID
+
+import numpy as np
+
+COLLECTION = "benchmark"
+
+
+def clustered(count: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    # Embeddings of real documents are clumpy, which is what IVF relies on
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    data = centers[rng.integers(0, clusters, count)] + 0.6 * rng.normal(size=(count, dim))
+    return (data / np.linalg.norm(data, axis=1, keepdims=True)).astype(np.float32)
+
+
+def ground_truth(data: np.ndarray, queries: np.ndarray, k: int) -> list[set[int]]:
+    scores = queries @ data.T
+    return [set(np.argpartition(-row, k - 1)[:k].tolist()) for row in scores]
+
+
+async def measure(name: str, backend, data: np.ndarray, queries: np.ndarray, truth: list[set[int]], k: int) -> None:
+    from qdrant_client.http.models import PointStruct
+
+    start = time.perf_counter()
+    await backend.create_collection(COLLECTION, data.shape[1])
+    for i in range(0, len(data), 1000):
+        await backend.upsert(COLLECTION, [
+            PointStruct(id=str(UUID(int=j)), vector=data[j].tolist(), payload={"row": j})
+            for j in range(i, min(i + 1000, len(data)))
+        ])
+    build = time.perf_counter() - start
+    await report(name, backend, queries, truth, k, build)
+
+
+async def report(name: str, backend, queries: np.ndarray, truth: list[set[int]], k: int, build: float) -> None:
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        points = await backend.search(COLLECTION, query.tolist(), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(expected & {point.payload["row"] for point in points}) / k)
+    p50, p95 = np.percentile(latencies, [50, 95])
+    print(f"{name:<22} build={build:>7.1f}s recall@{k}={np.mean(recalls):.3f} p50={p50:>7.2f}ms p95={p95:>7.2f}ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 32, 64])
+    parser.add_argument("--qdrant", help="host:port of a Qdrant server, or 'memory'")
+    args = parser.parse_args()
+
+    from app.api.repository.local_vector_backend import LocalVectorBackend
+
+    data = clustered(args.vectors, args.dim, args.clusters, seed=0)
+    queries = clustered(args.queries, args.dim, args.clusters, seed=1)
+    truth = ground_truth(data, queries, args.k)
+    print(f"{args.vectors} vectors x {args.dim} dims, {args.queries} queries")
+
+    path = tempfile.mkdtemp(prefix="vector-bench-")
+    try:
+        exact = LocalVectorBackend(path, ivf_min_vectors=args.vectors + 1)
+        await measure("local exact", exact, data, queries, truth, args.k)
+        await exact.close()
+        for nprobe in args.nprobe:
+            # Reopening with a lower threshold trains IVF on the next write; time that as the build
+            ivf = LocalVectorBackend(path, ivf_min_vectors=1, nprobe=nprobe)
+            start = time.perf_counter()
+            await ivf.upsert(COLLECTION, [])
+            await report(f"local ivf nprobe={nprobe}", ivf, queries, truth, args.k, time.perf_counter() - start)
+            await ivf.close()
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+    if args.qdrant:
+        from qdrant_client import AsyncQdrantClient
+        from app.api.repository.qdrant_backend import QdrantVectorBackend
+
+        if args.qdrant == "memory":
+            client = AsyncQdrantClient(":memory:")
+        else:
+            host, _, port = args.qdrant.partition(":")
+            client = AsyncQdrantClient(host=host, port=int(port or 6333))
+        qdrant = QdrantVectorBackend(client=client)
+        await measure(f"qdrant {args.qdrant}", qdrant, data, queries, truth, args.k)
+        await qdrant.delete_collection(COLLECTION)
+        await qdrant.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+# generative-ai-service/benchmarks/vector_quantization.py
+"""
+Memory, latency and recall@k per quantization configuration. Memory is what a
+search scans on every query: full vectors without quantization, codes with it.
+Each quantized collection is searched without rescoring and with rescoring at
+several oversampling factors.
+
+    python -m benchmarks.vector_quantization --vectors 50000 --dim 768 --oversampling 1 2 4 --qdrant localhost:6333
+"""
+import argparse, asyncio, shutil, tempfile, time
+from uuid import UUID
+
+import numpy as np
+
+from benchmarks.vector_backends import COLLECTION, clustered, ground_truth
+
+QUANTIZATIONS = ("none", "scalar", "binary")
+
+
+async def load(backend, data: np.ndarray, options) -> float:
+    from qdrant_client.http.models import PointStruct
+
+    start = time.perf_counter()
+    await backend.delete_collection(COLLECTION)
+    await backend.create_collection(COLLECTION, data.shape[1], (), options)
+    for i in range(0, len(data), 1000):
+        await backend.upsert(COLLECTION, [
+            PointStruct(id=str(UUID(int=j)), vector=data[j].tolist(), payload={"row": j})
+            for j in range(i, min(i + 1000, len(data)))
+        ])
+    return time.perf_counter() - start
+
+
+async def evaluate(backend, queries: np.ndarray, truth: list[set[int]], k: int, search) -> tuple[float, float, float]:
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        points = await backend.search(COLLECTION, query.tolist(), k, None, search)
+        latencies.append((time.perf_counter() - start) * 1000)
+        recalls.append(len(expected & {point.payload["row"] for point in points}) / k)
+    p50, p95 = np.percentile(latencies, [50, 95])
+    return float(np.mean(recalls)), p50, p95
+
+
+def searches(quantization: str, oversampling: list[float]):
+    from app.api.repository.vector_interface import SearchOptions
+
+    if quantization == "none":
+        return [("exact", SearchOptions())]
+    return [("no rescore", SearchOptions(rescore=False))] + [
+        (f"rescore x{factor:g}", SearchOptions(oversampling=factor)) for factor in oversampling
+    ]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--oversampling", type=float, nargs="+", default=[1.0, 2.0, 4.0])
+    parser.add_argument("--qdrant", help="host:port of a Qdrant server, or 'memory'")
+    args = parser.parse_args()
+
+    from app.api.repository.local_vector_backend import LocalVectorBackend
+    from app.api.repository.vector_interface import CollectionOptions
+
+    data = clustered(args.vectors, args.dim, args.clusters, seed=0)
+    queries = clustered(args.queries, args.dim, args.clusters, seed=1)
+    truth = ground_truth(data, queries, args.k)
+    print(f"{args.vectors} vectors x {args.dim} dims, {args.queries} queries, k={args.k}")
+
+    backends = []
+    path = tempfile.mkdtemp(prefix="quantization-bench-")
+    backends.append(("local", LocalVectorBackend(path, ivf_min_vectors=args.vectors + 1)))
+    if args.qdrant:
+        from qdrant_client import AsyncQdrantClient
+        from app.api.repository.qdrant_backend import QdrantVectorBackend
+
+        if args.qdrant == "memory":
+            client = AsyncQdrantClient(":memory:")
+        else:
+            host, _, port = args.qdrant.partition(":")
+            client = AsyncQdrantClient(host=host, port=int(port or 6333))
+        backends.append(("qdrant", QdrantVectorBackend(client=client)))
+
+    try:
+        for backend_name, backend in backends:
+            for quantization in QUANTIZATIONS:
+                build = await load(backend, data, CollectionOptions(quantization, on_disk=quantization != "none"))
+                collection = getattr(backend, "collections", {}).get(COLLECTION)
+                memory = f"{collection.memory_bytes() / 2**20:>8.1f}MB" if collection else "     n/a  "
+                for label, search in searches(quantization, args.oversampling):
+                    recall, p50, p95 = await evaluate(backend, queries, truth, args.k, search)
+                    print(f"{backend_name:<7} {quantization:<7} {label:<14} scanned={memory} build={build:>6.1f}s "
+                          f"recall@{args.k}={recall:.3f} p50={p50:>7.2f}ms p95={p95:>7.2f}ms")
+            await backend.delete_collection(COLLECTION)
+            await backend.close()
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,12 @@
+# generative-ai-service/tests/conftest.py
+import os
+
+# Settings() is built at import time and requires these; tests never reach the real services
+for name, value in {
+    "azure_endpoint_url": "https://tests.openai.azure.com",
+    "azure_openai_api_key": "test-key",
+    "postgres_username": "tests",
+    "postgres_password": "tests",
+    "postgres_db": "tests",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,202 @@
+# generative-ai-service/tests/test_aoai_pool.py
+import asyncio, json
+
+import pytest
+from aiohttp import web
+
+from app.api.core.aoai import service
+from app.api.core.aoai.pool import CircuitBreaker, azure_deployment
+from app.api.core.aoai.service import AzureOpenAIChatClient
+
+API_VERSION = "2024-12-01-preview"
+
+
+def chunk(**delta) -> str:
+    finish = delta.pop("finish_reason", None)
+    return json.dumps({
+        "id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": 0, "model": "stub",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish}],
+    })
+
+
+class StubDeployments:
+    """A local Azure OpenAI endpoint: each deployment streams its own name unless told to fail."""
+
+    def __init__(self) -> None:
+        self.requests: list[tuple[str, dict]] = []
+        self.failures: dict[str, list[tuple[int, dict[str, str]]]] = {}
+        self.headers: dict[str, dict[str, str]] = {}
+        self.broken: set[str] = set()  # accept the request, then send an error event instead of tokens
+        self.runner: web.AppRunner | None = None
+        self.endpoint = ""
+
+    async def __aenter__(self) -> "StubDeployments":
+        app = web.Application()
+        app.router.add_post("/openai/deployments/{name}/chat/completions", self.complete)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.endpoint = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.runner.cleanup()
+
+    def fail(self, name: str, status: int, times: int = 1, **headers: str) -> None:
+        self.failures.setdefault(name, []).extend([(status, headers)] * times)
+
+    async def complete(self, request: web.Request) -> web.StreamResponse:
+        name = request.match_info["name"]
+        self.requests.append((name, await request.json()))
+        if self.failures.get(name):
+            status, headers = self.failures[name].pop(0)
+            return web.json_response({"error": {"message": f"{name} says {status}", "code": str(status)}},
+                                     status=status, headers=headers)
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", **self.headers.get(name, {})})
+        await response.prepare(request)
+        events = (chunk(role="assistant", content=name), chunk(finish_reason="stop"), "[DONE]")
+        if name in self.broken:
+            events = (json.dumps({"error": {"message": f"{name} broke mid-stream"}}),)
+        for data in events:
+            await response.write(f"data: {data}\n\n".encode())
+        await response.write_eof()
+        return response
+
+    def deployment(self, name: str, weight: float = 1.0, failures: int = 3, reset: float = 30.0):
+        deployment = azure_deployment(self.endpoint, "stub-key", API_VERSION, name, weight, max_retries=0)
+        deployment.breaker = CircuitBreaker(failures, reset)
+        return deployment
+
+    def served(self) -> list[str]:
+        return [name for name, _ in self.requests]
+
+
+async def stream_text(client: AzureOpenAIChatClient, prompt: str = "hi") -> str:
+    """The text frames (and error frames) of one stream, without finish events and the DONE marker."""
+    frames = [frame async for frame in client.chat_stream(prompt)]
+    return "".join(frame[len("data: "):-2] for frame in frames if frame.startswith("data: ") and frame != service.DONE)
+
+
+def chat_client(*deployments) -> AzureOpenAIChatClient:
+    return AzureOpenAIChatClient(deployments=list(deployments), flush_interval_ms=0)
+
+
+@pytest.mark.parametrize("cap", [None, 256])
+def test_completion_cap_is_only_sent_when_configured(monkeypatch, cap):
+    monkeypatch.setattr(service.settings, "azure_max_completion_tokens", cap)
+
+    async def scenario() -> tuple[str, dict]:
+        async with StubDeployments() as stub:
+            text = await stream_text(chat_client(stub.deployment("primary")))
+            return text, stub.requests[0][1]
+
+    text, body = asyncio.run(scenario())
+    assert text == "primary"
+    assert body.get("max_completion_tokens") == cap
+
+
+def test_requests_go_to_the_deployment_with_the_most_remaining_capacity():
+    async def scenario() -> tuple[list[str], list[str]]:
+        async with StubDeployments() as stub:
+            stub.headers["low"] = {"x-ratelimit-remaining-requests": "5", "x-ratelimit-limit-requests": "100"}
+            stub.headers["high"] = {"x-ratelimit-remaining-requests": "90", "x-ratelimit-limit-requests": "100"}
+            client = chat_client(stub.deployment("low"), stub.deployment("high"))
+            texts = [await stream_text(client) for _ in range(3)]
+            return texts, stub.served()
+
+    texts, served = asyncio.run(scenario())
+    # Both unknown at first, then each reports its headroom
+    assert served == ["low", "high", "high"] and texts == served
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_throttled_or_failing_deployment_fails_over_before_the_first_token(status):
+    async def scenario() -> tuple[str, list[str], str]:
+        async with StubDeployments() as stub:
+            stub.fail("primary", status)
+            primary = stub.deployment("primary")
+            text = await stream_text(chat_client(primary, stub.deployment("secondary")))
+            return text, stub.served(), primary.breaker.state
+
+    assert asyncio.run(scenario()) == ("secondary", ["primary", "secondary"], "closed")
+
+
+@pytest.mark.parametrize("status", [401, 403, 404])
+def test_misconfigured_deployment_fails_over_and_is_taken_out(status):
+    async def scenario() -> tuple[list[str], list[str], str]:
+        async with StubDeployments() as stub:
+            stub.fail("misconfigured", status)
+            misconfigured = stub.deployment("misconfigured", weight=2.0)
+            client = chat_client(misconfigured, stub.deployment("healthy"))
+            texts = [await stream_text(client) for _ in range(2)]
+            return texts, stub.served(), misconfigured.breaker.state
+
+    texts, served, state = asyncio.run(scenario())
+    assert texts == ["healthy", "healthy"]
+    assert served == ["misconfigured", "healthy", "healthy"] and state == "open"
+
+
+def test_request_errors_are_returned_without_failing_over():
+    async def scenario() -> tuple[str, list[str], str]:
+        async with StubDeployments() as stub:
+            stub.fail("primary", 400)
+            primary = stub.deployment("primary")
+            text = await stream_text(chat_client(primary, stub.deployment("secondary")))
+            return text, stub.served(), primary.breaker.state
+
+    text, served, state = asyncio.run(scenario())
+    assert text.startswith("[ERROR] BadRequestError") and served == ["primary"] and state == "closed"
+
+
+def test_breaker_opens_after_consecutive_failures_and_probes_once_half_open():
+    async def scenario() -> tuple[list[str], list[str]]:
+        async with StubDeployments() as stub:
+            stub.fail("flaky", 500, times=2)
+            flaky = stub.deployment("flaky", weight=2.0, failures=2, reset=0.2)
+            client = chat_client(flaky, stub.deployment("steady"))
+            states = []
+            for _ in range(3):
+                await stream_text(client)
+                states.append(flaky.breaker.state)
+            await asyncio.sleep(0.25)
+            states.append(flaky.breaker.state)
+            await stream_text(client)  # the half-open probe, which succeeds
+            states.append(flaky.breaker.state)
+            return states, stub.served()
+
+    states, served = asyncio.run(scenario())
+    assert states == ["closed", "open", "open", "half-open", "closed"]
+    assert served == ["flaky", "steady", "flaky", "steady", "steady", "flaky"]
+
+
+def test_retry_after_keeps_a_throttled_deployment_out_for_that_long():
+    async def scenario() -> tuple[list[str], list[str]]:
+        async with StubDeployments() as stub:
+            stub.fail("throttled", 429, **{"retry-after-ms": "200"})
+            throttled = stub.deployment("throttled", weight=2.0)
+            client = chat_client(throttled, stub.deployment("other"))
+            states = []
+            await stream_text(client)
+            states.append(throttled.breaker.state)
+            await asyncio.sleep(0.25)
+            states.append(throttled.breaker.state)
+            await stream_text(client)
+            return states, stub.served()
+
+    states, served = asyncio.run(scenario())
+    # A single 429 opens the circuit when the server says how long to stay away
+    assert states == ["open", "half-open"]
+    assert served == ["throttled", "other", "throttled"]
+
+
+def test_stream_error_before_the_first_token_counts_as_a_failure():
+    async def scenario() -> tuple[str, int]:
+        async with StubDeployments() as stub:
+            stub.broken.add("broken")
+            broken = stub.deployment("broken")
+            text = await stream_text(chat_client(broken))
+            return text, broken.breaker.consecutive_failures
+
+    text, failures = asyncio.run(scenario())
+    assert text.startswith("[ERROR]") and failures == 1
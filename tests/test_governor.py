@@ -0,0 +1,90 @@
+# generative-ai-service/tests/test_governor.py
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.core.aoai.governor import RateGovernor, TokenBucket
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_refills_and_clamps_to_its_capacity():
+    clock = Clock()
+    bucket = TokenBucket(10, 2, clock)
+    bucket.take(10)
+    assert bucket.wait_time(4) == 2.0
+    clock.now = 1.0
+    assert bucket.wait_time(4) == 1.0
+    # More than the bucket holds waits for a full bucket instead of forever
+    assert bucket.wait_time(50) == 4.0
+    clock.now = 100.0
+    assert bucket.wait_time(10) == 0.0 and bucket.level == 10
+
+
+def test_waiting_clients_are_admitted_round_robin():
+    async def scenario() -> list[str]:
+        # One request in the bucket, refilled every 20ms
+        governor = RateGovernor(rpm=3000, tpm=None, burst_seconds=0.02)
+        order: list[str] = []
+
+        async def request(client: str) -> None:
+            await governor.acquire(client, 1)
+            order.append(client)
+
+        tasks = [asyncio.create_task(request("busy")) for _ in range(4)]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(request(client)) for client in ("quiet", "other")]
+        await asyncio.gather(*tasks)
+        return order
+
+    assert asyncio.run(scenario()) == ["busy", "busy", "quiet", "other", "busy", "busy"]
+
+
+def test_token_cost_is_charged_against_the_token_bucket():
+    async def scenario() -> float:
+        governor = RateGovernor(rpm=None, tpm=6000, burst_seconds=1)  # 100 tokens, 100 per second
+        await governor.acquire("client", 100)
+        return await governor.acquire("client", 50)
+
+    assert 0.4 <= asyncio.run(scenario()) < 1.0
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    async def scenario() -> HTTPException:
+        governor = RateGovernor(rpm=1, tpm=None, burst_seconds=1, queue_limit=1, queue_timeout=5)
+        await governor.acquire("client", 1)
+        waiting = asyncio.create_task(governor.acquire("client", 1))
+        await asyncio.sleep(0)
+        try:
+            with pytest.raises(HTTPException) as rejected:
+                await governor.acquire("client", 1)
+        finally:
+            waiting.cancel()
+        return rejected.value
+
+    rejected = asyncio.run(scenario())
+    assert rejected.status_code == 429 and rejected.headers["Retry-After"] == "5"
+
+
+def test_timed_out_and_cancelled_waiters_leave_the_queue():
+    async def scenario() -> tuple[int, int]:
+        governor = RateGovernor(rpm=1, tpm=None, burst_seconds=1, queue_timeout=0.05)
+        await governor.acquire("client", 1)
+        with pytest.raises(HTTPException) as timed_out:
+            await governor.acquire("client", 1)
+        assert timed_out.value.status_code == 429
+        after_timeout = governor.queued
+        gone = asyncio.create_task(governor.acquire("client", 1))
+        await asyncio.sleep(0)
+        gone.cancel()
+        await asyncio.gather(gone, return_exceptions=True)
+        return after_timeout, governor.queued
+
+    assert asyncio.run(scenario()) == (0, 0)
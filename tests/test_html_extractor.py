@@ -0,0 +1,29 @@
+# generative-ai-service/tests/test_html_extractor.py
+import pytest
+
+from app.api.common.html_extractor import StreamingTextExtractor
+
+TEXT = "Le café est servi à la terrasse."
+
+
+def extract(page: bytes, encoding: str | None) -> str:
+    extractor = StreamingTextExtractor(["div#bodyContent"], encoding=encoding)
+    extractor.feed(page)
+    return extractor.close()
+
+
+@pytest.mark.parametrize("charset, codec", [
+    ("latin-1", "latin-1"),
+    ("ISO-8859-1", "latin-1"),
+    ("utf-8-sig", "utf-8-sig"),
+    ("utf-8", "utf-8"),
+])
+def test_declared_charsets_libxml2_may_not_know_are_decoded(charset, codec):
+    page = f'<html><div id="bodyContent">{TEXT}</div></html>'.encode(codec)
+    assert extract(page, charset) == TEXT
+
+
+@pytest.mark.parametrize("charset", ["x-user-defined", "made-up"])
+def test_unknown_charset_falls_back_to_detection(charset):
+    page = b'<html><div id="bodyContent">plain ascii text</div></html>'
+    assert extract(page, charset) == "plain ascii text"
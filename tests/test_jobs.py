@@ -0,0 +1,125 @@
+# generative-ai-service/tests/test_jobs.py
+import asyncio
+from datetime import datetime, timedelta, UTC
+from io import BytesIO
+
+import pytest
+
+pytest.importorskip("greenlet")
+pytest.importorskip("aiosqlite")
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.api.core.jobs import service
+from app.api.core.jobs.service import JobService
+from app.api.db.entities import Base, Job
+
+
+@pytest.fixture
+def sessions(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+
+    async def create_tables():
+        async with engine.begin() as con:
+            await con.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_tables())
+    factory = async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    monkeypatch.setattr(service, "async_session", factory)
+    yield factory
+    asyncio.run(engine.dispose())
+
+
+def job_service(tmp_path) -> JobService:
+    return JobService(1, 4, str(tmp_path / "results"), heartbeat_seconds=0.05, lease_seconds=60.0)
+
+
+async def add_job(sessions, job_id: str, status: str, age: timedelta) -> None:
+    # updated_at as the database clock (UTC for SQLite) would have stamped it ``age`` ago
+    stamped = (datetime.now(UTC) - age).replace(tzinfo=None)
+    async with sessions() as session:
+        session.add(Job(id=job_id, kind="video", status=status, progress=0.0, updated_at=stamped))
+        await session.commit()
+
+
+async def statuses(sessions) -> dict[str, str]:
+    async with sessions() as session:
+        return dict((await session.execute(select(Job.id, Job.status))).all())
+
+
+def test_job_runs_and_stores_its_result(tmp_path, sessions):
+    async def scenario():
+        jobs = job_service(tmp_path)
+
+        def work(progress):
+            for step in range(1, 5):
+                progress(step / 4)
+            return BytesIO(b"video bytes"), "video/mp4", "video.mp4"
+
+        job, created = await jobs.submit("video", work)
+        await asyncio.gather(*jobs.tasks)
+        jobs.shutdown()
+        return created, await jobs.get(job.id)
+
+    created, job = asyncio.run(scenario())
+    assert created
+    assert (job.status, job.progress, job.media_type) == ("succeeded", 1.0, "video/mp4")
+    with open(job.result_path, "rb") as f:
+        assert f.read() == b"video bytes"
+
+
+def test_heartbeat_fails_only_jobs_whose_lease_ran_out(tmp_path, sessions):
+    async def scenario():
+        jobs = job_service(tmp_path)
+        # A job of a process that crashed, one another live process keeps touching,
+        # and one of this process whose last touch is old but which is still running
+        await add_job(sessions, "orphan", "running", timedelta(minutes=5))
+        await add_job(sessions, "elsewhere", "running", timedelta(seconds=5))
+        await add_job(sessions, "mine", "running", timedelta(minutes=5))
+        await add_job(sessions, "done", "succeeded", timedelta(hours=1))
+        jobs.active.add("mine")
+        await jobs.heartbeat()
+        return await statuses(sessions)
+
+    assert asyncio.run(scenario()) == {
+        "orphan": "failed", "elsewhere": "running", "mine": "running", "done": "succeeded",
+    }
+
+
+def test_lease_loop_keeps_running_jobs_alive(tmp_path, sessions):
+    async def scenario():
+        jobs = JobService(1, 4, str(tmp_path / "results"), heartbeat_seconds=0.05, lease_seconds=0.5)
+        released = asyncio.Event()
+        loop = asyncio.get_running_loop()
+
+        def work(progress):
+            asyncio.run_coroutine_threadsafe(released.wait(), loop).result()
+            return BytesIO(b"mesh"), "model/obj", "mesh.obj"
+
+        job, _ = await jobs.submit("3d", work)
+        jobs.start()
+        await asyncio.sleep(2)  # several leases, with SQLite's clock ticking in whole seconds
+        running = (await jobs.get(job.id)).status
+        released.set()
+        await asyncio.gather(*jobs.tasks)
+        jobs.shutdown()
+        return running, (await jobs.get(job.id)).status
+
+    assert asyncio.run(scenario()) == ("running", "succeeded")
+
+
+def test_idempotency_key_is_scoped_to_the_job_kind(tmp_path, sessions):
+    async def scenario():
+        jobs = job_service(tmp_path)
+        work = lambda progress: (BytesIO(b""), "video/mp4", "video.mp4")
+        # Concurrent retries race to the insert; the unique constraint settles them
+        retries = await asyncio.gather(*(jobs.submit("video", work, "key-1") for _ in range(3)))
+        other_kind, created = await jobs.submit("3d", work, "key-1")
+        await asyncio.gather(*jobs.tasks)
+        jobs.shutdown()
+        return retries, other_kind, created
+
+    retries, other_kind, created = asyncio.run(scenario())
+    assert len({job.id for job, _ in retries}) == 1
+    assert [fresh for _, fresh in retries].count(True) == 1
+    assert created and other_kind.kind == "3d" and other_kind.id != retries[0][0].id
@@ -0,0 +1,63 @@
+# generative-ai-service/tests/test_rag_context.py
+import pytest
+from qdrant_client.http.models import ScoredPoint
+
+from app.api.rag.context import mmr_select, query_variants, rrf_fuse
+
+
+def point(name: str, score: float, vector: list[float] | None) -> ScoredPoint:
+    return ScoredPoint(id=name, version=0, score=score, payload={"original_text": name}, vector=vector)
+
+
+def names(points: list[ScoredPoint]) -> list[str]:
+    return [p.id for p in points]
+
+
+def test_mmr_prefers_a_different_chunk_over_a_near_copy_of_the_best():
+    candidates = [
+        point("best", 0.90, [1.0, 0.0, 0.0]),
+        point("rephrased", 0.89, [0.9, 0.43, 0.0]),
+        point("other topic", 0.80, [0.0, 1.0, 0.0]),
+    ]
+    assert names(mmr_select(candidates, k=2, lambda_mult=0.5, duplicate_threshold=1.0)) == ["best", "other topic"]
+    # Pure relevance ignores redundancy
+    assert names(mmr_select(candidates, k=2, lambda_mult=1.0, duplicate_threshold=1.0)) == ["best", "rephrased"]
+
+
+def test_mmr_drops_near_duplicates_and_orders_by_retrieval_score():
+    candidates = [
+        point("c", 0.70, [0.0, 0.0, 1.0]),
+        point("a", 0.90, [1.0, 0.0, 0.0]),
+        point("a copy", 0.88, [1.0, 0.01, 0.0]),
+        point("b", 0.80, [0.0, 1.0, 0.0]),
+    ]
+    # Room for all four, but the copy is dropped outright
+    assert names(mmr_select(candidates, k=4, lambda_mult=0.7, duplicate_threshold=0.95)) == ["a", "b", "c"]
+
+
+def test_mmr_skips_points_retrieved_without_vectors():
+    candidates = [point("no vector", 0.99, None), point("kept", 0.5, [1.0, 0.0])]
+    assert names(mmr_select(candidates, k=3)) == ["kept"]
+    assert mmr_select([], k=3) == []
+
+
+def test_rrf_rewards_points_found_by_several_queries():
+    first = [point("a", 0.9, None), point("b", 0.8, None), point("c", 0.7, None)]
+    second = [point("c", 0.95, None), point("b", 0.6, None)]
+    fused = rrf_fuse([first, second], k=60)
+    # c (ranks 3 and 1) edges out b (2 and 2); a, found once at the top, comes last
+    assert names(fused) == ["c", "b", "a"]
+    assert fused[0].score == 1.0
+    assert fused[1].score == pytest.approx((2 / 62) / (1 / 63 + 1 / 61))
+    assert fused[2].score == pytest.approx((1 / 61) / (1 / 63 + 1 / 61))
+    assert rrf_fuse([[], []]) == []
+
+
+def test_query_variants_add_keywords_and_sub_questions():
+    prompt = "What is RAG? How does it compare to fine-tuning?"
+    assert query_variants(prompt, limit=4) == [
+        prompt, "RAG compare fine-tuning", "What is RAG?", "How does it compare to fine-tuning?",
+    ]
+    assert query_variants(prompt, limit=2) == [prompt, "RAG compare fine-tuning"]
+    # Nothing to vary: the prompt alone, without duplicates
+    assert query_variants("Explain HNSW", limit=4) == ["Explain HNSW"]
@@ -0,0 +1,36 @@
+# generative-ai-service/tests/test_token_chunker.py
+import pytest
+
+try:
+    # Loads the embedding model and its tokenizer at import
+    data_transformation = pytest.importorskip("app.api.rag.data_transformation", exc_type=ImportError)
+except OSError as e:
+    pytest.skip(f"embedding model unavailable: {e}", allow_module_level=True)
+
+MAX_TOKENS = 32
+OVERLAP = 4
+
+
+def token_count(text: str) -> int:
+    return len(data_transformation.tokenizer(text, add_special_tokens=False)["input_ids"])
+
+
+def test_text_without_whitespace_is_cut_while_streaming():
+    text = "北京是中国的首都也是政治文化中心" * 200
+    chunker = data_transformation.TokenChunker(MAX_TOKENS, OVERLAP)
+    chunks, largest_buffer = [], 0
+    for i in range(0, len(text), 64):
+        chunks += chunker.feed(text[i:i + 64])
+        largest_buffer = max(largest_buffer, token_count(chunker.buffer))
+    streamed = len(chunks)
+    chunks += chunker.flush()
+
+    assert streamed > 0, "no window closed before flush"
+    assert largest_buffer <= (chunker.hard_cut + 2) * MAX_TOKENS
+    for chunk in chunks:
+        assert text[chunk.start:chunk.end] == chunk.text
+        assert token_count(chunk.text) <= MAX_TOKENS
+    # Windows cover the text and overlap their neighbour
+    assert chunks[0].start == 0 and chunks[-1].end == len(text)
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.start < previous.end
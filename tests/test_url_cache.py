@@ -0,0 +1,125 @@
+# generative-ai-service/tests/test_url_cache.py
+import asyncio, threading
+
+import pytest
+from aiohttp import web
+
+from app.api.common.url_cache import URLContentCache
+from app.api.common.web_scraping import create_http_session, fetch
+
+PAGE = '<html><div id="bodyContent">cached article text</div></html>'
+
+
+async def fetch_twice(tmp_path, cache_control: str) -> tuple[list[str], list[dict]]:
+    requests: list[dict] = []
+
+    async def page(request: web.Request) -> web.Response:
+        requests.append(dict(request.headers))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304, headers={"ETag": '"v1"', "Cache-Control": cache_control})
+        return web.Response(text=PAGE, content_type="text/html",
+                            headers={"ETag": '"v1"', "Cache-Control": cache_control})
+
+    app = web.Application()
+    app.router.add_get("/page", page)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/page"
+    cache = URLContentCache(8, 300.0, str(tmp_path))
+    try:
+        async with create_http_session() as session:
+            texts = [await fetch(session, url, cache=cache) for _ in range(2)]
+    finally:
+        await runner.cleanup()
+    return texts, requests
+
+
+@pytest.mark.parametrize("cache_control", [
+    "private, s-maxage=0, max-age=0, must-revalidate",
+    "no-cache",
+])
+def test_must_revalidate_page_is_reused_on_304(tmp_path, cache_control):
+    texts, requests = asyncio.run(fetch_twice(tmp_path, cache_control))
+    assert texts == ["cached article text"] * 2
+    assert len(requests) == 2
+    assert "If-None-Match" not in requests[0]
+    assert requests[1]["If-None-Match"] == '"v1"'
+
+
+def test_no_store_page_is_not_cached(tmp_path):
+    texts, requests = asyncio.run(fetch_twice(tmp_path, "no-store"))
+    assert texts == ["cached article text"] * 2
+    assert all("If-None-Match" not in headers for headers in requests)
+
+
+def test_fresh_page_is_served_without_a_request(tmp_path):
+    texts, requests = asyncio.run(fetch_twice(tmp_path, "max-age=600"))
+    assert texts == ["cached article text"] * 2
+    assert len(requests) == 1
+
+
+def test_disk_tier_prunes_oldest_and_survives_restart(tmp_path):
+    async def fill():
+        cache = URLContentCache(8, 300.0, str(tmp_path), disk_capacity=3)
+        for i in range(5):
+            await cache.put(f"https://example.com/{i}", f"text {i}")
+
+    asyncio.run(fill())
+    assert len(list(tmp_path.glob("*.json"))) == 3
+
+    reopened = URLContentCache(8, 300.0, str(tmp_path), disk_capacity=3)
+    assert len(reopened.disk_index) == 3
+    assert asyncio.run(reopened.get("https://example.com/0")) is None
+    assert asyncio.run(reopened.get("https://example.com/4")).text == "text 4"
+
+
+def test_disk_reads_and_writes_stay_off_the_event_loop(tmp_path, monkeypatch):
+    threads: list[tuple[str, int]] = []
+    for name in ("_read", "_write", "_remove"):
+        method = getattr(URLContentCache, name)
+        monkeypatch.setattr(URLContentCache, name, lambda self, *args, method=method, name=name: (
+            threads.append((name, threading.get_ident())), method(self, *args))[1])
+
+    # Built outside the loop like the module-level cache; only the startup scan runs inline
+    writer = URLContentCache(8, 300.0, str(tmp_path), disk_capacity=1)
+    reader = URLContentCache(8, 300.0, str(tmp_path))
+    threads.clear()
+
+    async def scenario() -> int:
+        await writer.put("https://example.com/a", "a")
+        await writer.put("https://example.com/b", "b")
+        await reader.get("https://example.com/b")
+        return threading.get_ident()
+
+    loop_thread = asyncio.run(scenario())
+    assert {name for name, _ in threads} == {"_read", "_write", "_remove"}
+    assert all(thread != loop_thread for _, thread in threads)
+
+
+def test_spellings_sharing_a_cache_entry_fetch_the_normalized_url(tmp_path):
+    paths: list[str] = []
+
+    async def page(request: web.Request) -> web.Response:
+        paths.append(request.path_qs)
+        return web.Response(text=PAGE, content_type="text/html")
+
+    async def scenario() -> list[str]:
+        app = web.Application()
+        app.router.add_get("/page", page)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/page?b=2&a=1"
+        cache = URLContentCache(8, 300.0, str(tmp_path))
+        try:
+            async with create_http_session() as session:
+                # As extract_url finds them in prose: trailing punctuation included
+                return await asyncio.gather(*(fetch(session, spelling, cache=cache) for spelling in (url + ").", url)))
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(scenario()) == ["cached article text"] * 2
+    assert paths == ["/page?a=1&b=2"]
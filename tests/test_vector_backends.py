@@ -0,0 +1,175 @@
+# generative-ai-service/tests/test_vector_backends.py
+import asyncio
+from uuid import NAMESPACE_OID, uuid5
+
+import numpy as np
+import pytest
+from qdrant_client import AsyncQdrantClient
+from qdrant_client.http.models import PointStruct
+
+from app.api.repository.local_vector_backend import LocalVectorBackend
+from app.api.repository.qdrant_backend import QdrantVectorBackend
+from app.api.repository.vector_interface import CollectionOptions, SearchOptions
+
+DIM = 32
+
+
+def ids(count: int) -> list[str]:
+    return [str(uuid5(NAMESPACE_OID, str(i))) for i in range(count)]
+
+
+def unit_vectors(count: int, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).normal(size=(count, DIM)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def points(vectors: np.ndarray) -> list[PointStruct]:
+    return [
+        PointStruct(id=point, vector=vector.tolist(), payload={"source": "ab"[i % 2], "n": i})
+        for i, (point, vector) in enumerate(zip(ids(len(vectors)), vectors))
+    ]
+
+
+@pytest.fixture(params=["local", "qdrant"])
+def make_backend(request, tmp_path):
+    # Built inside each scenario: the in-process Qdrant client belongs to the loop that made it
+    if request.param == "local":
+        return lambda: LocalVectorBackend(str(tmp_path))
+    return lambda: QdrantVectorBackend(client=AsyncQdrantClient(location=":memory:"))
+
+
+def test_points_can_be_written_searched_and_deleted(make_backend):
+    vectors = unit_vectors(40)
+
+    async def scenario():
+        backend = make_backend()
+        try:
+            assert not await backend.collection_exists("docs")
+            await backend.create_collection("docs", DIM, ("source",))
+            assert await backend.collection_exists("docs")
+            await backend.upsert("docs", points(vectors))
+
+            found = await backend.search("docs", vectors[3].tolist(), 5, with_vectors=True)
+            assert str(found[0].id) == ids(40)[3] and found[0].score == pytest.approx(1.0, abs=1e-4)
+            assert [p.score for p in found] == sorted((p.score for p in found), reverse=True)
+            assert np.allclose(found[0].vector, vectors[3], atol=1e-5)
+            assert all(p.score >= 0.5 for p in await backend.search("docs", vectors[3].tolist(), 40, 0.5))
+
+            batch = await backend.search_batch("docs", [vectors[1].tolist(), vectors[2].tolist()], 3)
+            singles = [await backend.search("docs", vectors[i].tolist(), 3) for i in (1, 2)]
+            assert [[str(p.id) for p in hits] for hits in batch] == [[str(p.id) for p in hits] for hits in singles]
+
+            matches = await backend.payloads_where("docs", "source", "a", ["n"])
+            assert sorted(payload["n"] for _, payload in matches) == list(range(0, 40, 2))
+            assert all(set(payload) == {"n"} for _, payload in matches)
+
+            await backend.delete("docs", [ids(40)[3]])
+            await backend.delete_where("docs", "source", "a")
+            left = await backend.search("docs", vectors[3].tolist(), 40)
+            assert {p.payload["source"] for p in left} == {"b"} and len(left) == 19
+
+            assert await backend.delete_collection("docs")
+            assert not await backend.collection_exists("docs")
+        finally:
+            await backend.close()
+
+    asyncio.run(scenario())
+
+
+def test_local_collection_survives_a_reopen(tmp_path):
+    vectors = unit_vectors(30)
+
+    async def scenario():
+        backend = LocalVectorBackend(str(tmp_path))
+        await backend.create_collection("docs", DIM)
+        await backend.upsert("docs", points(vectors))
+        await backend.delete("docs", ids(30)[:10])
+        await backend.close()
+
+        reopened = LocalVectorBackend(str(tmp_path))
+        hits = await reopened.search("docs", vectors[12].tolist(), 30)
+        # A freed row is reused by the next write
+        await reopened.upsert("docs", points(unit_vectors(1, seed=5)))
+        rows = len(reopened.collections["docs"].ids)
+        await reopened.close()
+        return hits, rows
+
+    hits, rows = asyncio.run(scenario())
+    assert str(hits[0].id) == ids(30)[12] and len(hits) == 20
+    assert hits[0].payload == {"source": "a", "n": 12}
+    assert rows == 30
+
+
+def test_local_ivf_index_keeps_recall_close_to_exact_search(tmp_path):
+    rng = np.random.default_rng(1)
+    # Clustered data, like embeddings of related documents
+    centers = unit_vectors(20, seed=2)
+    vectors = centers[rng.integers(0, 20, 2000)] + 0.1 * rng.normal(size=(2000, DIM)).astype(np.float32)
+    queries = vectors[rng.choice(2000, 20, replace=False)] + 0.05 * rng.normal(size=(20, DIM)).astype(np.float32)
+
+    async def top_ids(backend: LocalVectorBackend) -> list[set[str]]:
+        await backend.create_collection("docs", DIM)
+        await backend.upsert("docs", points(vectors))
+        found = await backend.search_batch("docs", queries.tolist(), 10)
+        trained = backend.collections["docs"].ivf is not None
+        await backend.close()
+        return trained, [{str(p.id) for p in hits} for hits in found]
+
+    exact_trained, exact = asyncio.run(top_ids(LocalVectorBackend(str(tmp_path / "exact"))))
+    ivf_trained, approximate = asyncio.run(top_ids(LocalVectorBackend(str(tmp_path / "ivf"), 1000, 8)))
+    recall = np.mean([len(a & e) / 10 for a, e in zip(approximate, exact)])
+    assert not exact_trained and ivf_trained
+    assert recall >= 0.9
+
+
+@pytest.mark.parametrize("quantization, bytes_per_row", [("scalar", DIM + 4), ("binary", DIM // 8)])
+def test_quantized_search_rescores_with_full_precision(tmp_path, quantization, bytes_per_row):
+    vectors = unit_vectors(500, seed=3)
+    # Queries near stored chunks, as a question is to the passage answering it
+    queries = vectors[:50:5] + 0.05 * unit_vectors(10, seed=4)
+
+    async def scenario():
+        backend = LocalVectorBackend(str(tmp_path))
+        await backend.create_collection("exact", DIM)
+        await backend.create_collection("codes", DIM, options=CollectionOptions(quantization=quantization))
+        for name in ("exact", "codes"):
+            await backend.upsert(name, points(vectors))
+        exact = await backend.search_batch("exact", queries.tolist(), 5)
+        rescored = await backend.search_batch("codes", queries.tolist(), 5, options=SearchOptions(oversampling=8.0))
+        raw = await backend.search_batch("codes", queries.tolist(), 5, options=SearchOptions(rescore=False))
+        scanned = backend.collections["codes"].memory_bytes()
+        await backend.close()
+        # Codes and options come back with the collection
+        reopened = LocalVectorBackend(str(tmp_path))
+        again = await reopened.search_batch("codes", queries.tolist(), 5, options=SearchOptions(oversampling=8.0))
+        options = reopened.collections["codes"].options
+        await reopened.close()
+        return exact, rescored, raw, scanned, again, options
+
+    exact, rescored, raw, scanned, again, options = asyncio.run(scenario())
+    assert scanned == 500 * bytes_per_row
+    assert options.quantization == quantization
+    for exact_hits, rescored_hits, raw_hits, again_hits in zip(exact, rescored, raw, again):
+        # Rescored hits carry the exact cosine, and the best ones survive the code scan
+        exact_scores = {str(p.id): p.score for p in exact_hits}
+        for hit in rescored_hits:
+            if str(hit.id) in exact_scores:
+                assert hit.score == pytest.approx(exact_scores[str(hit.id)], abs=1e-5)
+        assert str(rescored_hits[0].id) == str(exact_hits[0].id)
+        assert [str(p.id) for p in again_hits] == [str(p.id) for p in rescored_hits]
+        assert len(raw_hits) == 5
+
+
+def test_qdrant_backend_accepts_quantized_collections():
+    vectors = unit_vectors(20)
+
+    async def scenario():
+        backend = QdrantVectorBackend(client=AsyncQdrantClient(location=":memory:"))
+        try:
+            await backend.create_collection("docs", DIM, options=CollectionOptions("binary", True, 16, 100))
+            await backend.upsert("docs", points(vectors))
+            return await backend.search("docs", vectors[7].tolist(), 1, options=SearchOptions(64, 3.0, True))
+        finally:
+            await backend.close()
+
+    assert str(asyncio.run(scenario())[0].id) == ids(20)[7]
@@ -0,0 +1,90 @@
+# generative-ai-service/tests/test_vector_repository.py
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.api.repository import vector_repository
+from app.api.repository.local_vector_backend import LocalVectorBackend
+from app.api.repository.vector_repository import ChunkRecord, VectorRepository, content_hash, point_id
+
+DIM = 16
+
+
+class RecordingBackend(LocalVectorBackend):
+    """The local backend, remembering every upsert batch and search call."""
+
+    def __init__(self, path: str) -> None:
+        super().__init__(path)
+        self.upserts: list[tuple[int, bool]] = []
+        self.batch_searches: list[int] = []
+
+    async def upsert(self, collection_name, points, wait=True):
+        self.upserts.append((len(points), wait))
+        await super().upsert(collection_name, points, wait)
+
+    async def search_batch(self, collection_name, query_vectors, *args, **kwargs):
+        self.batch_searches.append(len(query_vectors))
+        return await super().search_batch(collection_name, query_vectors, *args, **kwargs)
+
+
+def records(texts: list[str], seed: int = 0) -> list[ChunkRecord]:
+    rng = np.random.default_rng(seed)
+    return [ChunkRecord(i, text, rng.normal(size=DIM).tolist()) for i, text in enumerate(texts)]
+
+
+@pytest.fixture
+def repository(tmp_path) -> VectorRepository:
+    repository = VectorRepository(RecordingBackend(str(tmp_path)))
+    asyncio.run(repository.create_collection("docs", DIM))
+    return repository
+
+
+def test_create_many_upserts_in_batches_and_only_waits_for_the_last(repository, monkeypatch):
+    monkeypatch.setattr(vector_repository.settings, "vector_upsert_batch_size", 2)
+    asyncio.run(repository.create_many("docs", records([f"chunk {i}" for i in range(5)]), "a.pdf"))
+    assert sorted(repository.backend.upserts) == [(1, True), (2, False), (2, False)]
+    assert repository.backend.upserts[-1] == (1, True)
+
+
+def test_reingesting_a_source_overwrites_its_points(repository):
+    texts = ["first chunk", "second chunk", "third chunk"]
+
+    async def scenario() -> dict[str, str]:
+        await repository.create_many("docs", records(texts), "a.pdf")
+        # Same chunks at other positions: ids come from source and content, not position
+        await repository.create_many("docs", records(texts[::-1], seed=1), "a.pdf")
+        await repository.create_many("docs", records(texts[:1]), "b.pdf")
+        return await repository.source_hashes("docs", "a.pdf")
+
+    hashes = asyncio.run(scenario())
+    assert hashes == {content_hash(text): point_id("a.pdf", content_hash(text)) for text in texts}
+    assert len(repository.backend.collections["docs"].slots) == 4
+
+
+def test_writes_invalidate_cached_searches(repository):
+    async def scenario() -> tuple[int, int]:
+        query = records(["query"], seed=7)[0].vector
+        await repository.create_many("docs", records(["one"]), "a.pdf")
+        before = await repository.search("docs", query, 10, -1.0)
+        assert await repository.search("docs", query, 10, -1.0) is before  # served from the cache
+        await repository.create_many("docs", records(["two"], seed=3), "a.pdf")
+        return len(before), len(await repository.search("docs", query, 10, -1.0))
+
+    assert asyncio.run(scenario()) == (1, 2)
+
+
+def test_search_batch_sends_only_cache_misses_in_one_call(repository):
+    queries = [vector for _, _, vector, _ in records(["q1", "q2", "q3"], seed=9)]
+
+    async def scenario():
+        await repository.create_many("docs", records(["one", "two"]), "a.pdf")
+        first = await repository.search_batch("docs", queries[:2], 5, -1.0)
+        again = await repository.search_batch("docs", queries, 5, -1.0)
+        both = await repository.search_collections(["docs", "docs"], queries[2:], 5, -1.0)
+        return first, again, both
+
+    first, again, both = asyncio.run(scenario())
+    assert repository.backend.batch_searches == [2, 1]
+    assert again[:2] == first and len(again[2]) == 2
+    assert both == {"docs": [again[2]]}
@@ -0,0 +1,36 @@
+# generative-ai-service/tests/test_video_streaming.py
+import pytest
+
+pytest.importorskip("av")
+utils = pytest.importorskip("app.api.core.huggingface.utils", exc_type=ImportError)
+from PIL import Image
+
+CHUNK = 8
+
+
+def frames(count: int) -> list[Image.Image]:
+    return [Image.new("RGB", (320, 192), (i * 9 % 256, 80, 160)) for i in range(count)]
+
+
+@pytest.mark.parametrize("encoding", ["archival", "web"])
+def test_each_chunk_yields_a_fragment_before_the_next_is_decoded(encoding):
+    events: list[tuple[str, int]] = []
+    images = frames(25)
+
+    def decoded_chunks():
+        for i in range(0, len(images), CHUNK):
+            events.append(("decode", i // CHUNK))
+            yield images[i:i + CHUNK]
+
+    fragments = []
+    for data in utils.stream_video_fragments(decoded_chunks(), encoding, gop_size=CHUNK):
+        events.append(("yield", len(fragments)))
+        fragments.append(data)
+
+    chunks = -(-len(images) // CHUNK)
+    for i in range(chunks):
+        # Whatever chunk i produced was handed out before chunk i + 1 was requested
+        decoded = events.index(("decode", i))
+        following = events[decoded + 1] if decoded + 1 < len(events) else None
+        assert following is not None and following[0] == "yield", events
+        assert b"moof" in fragments[following[1]], f"chunk {i} yielded no media fragment"